@@ -0,0 +1,576 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TV 방송 스케줄 비동기 서비스 (asyncio 이벤트 루프 하나로 동작)
+
+- 타이머: 다음 방송 시각에 정확히 깨어나 전송 (매분 폴링 없음)
+- 파일 감시: tv_schedules.json / users.json 이 바뀌면 타이머만 다시 구성
+- 전송: 수신자별 요청을 동시에 처리 (aiohttp 가 있으면 비동기 HTTP, 없으면 스레드 풀)
+  전송 시각은 앱/다른 프로세스와 같은 공유 속도 제한(send_rate.state)에서 받고, ALERT/REMINDER/BULK
+  레인 가중치에 따라 나눠 줌 (PrioritySendQueue 와 같은 방식)
+- 지표: 같은 이벤트 루프에서 /metrics, /metrics.json 제공
+
+실행:
+    python schedule_service_server.py --async
+"""
+
+import asyncio
+import heapq
+import json
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from config import BOT_TOKEN
+from delivery_journal import delivery_key, journaled_result, occurrence_key
+from delivery_state import (
+    retryable_recipients, unserved_recipients, delivery_counts, deferred_due, next_deferred_time, next_retry_time,
+    DONE_STATUSES, PENDING
+)
+from segments import SegmentError
+from send_queue import ALERT, REMINDER, BULK, BULK_HOLD_SECONDS, LANE_WEIGHTS, RateLimiter
+from schedule_service_server import (
+    ScheduleService, get_korean_time, parse_schedule_time, RETRY_WINDOW_SECONDS, SHUTDOWN_TIMEOUT
+)
+
+try:
+    import aiohttp
+except ImportError:  # 선택 의존성: 없으면 스레드 풀에서 requests 사용
+    aiohttp = None
+
+# 파일 변경 확인 간격 (초, stat 한 번이므로 가벼움)
+WATCH_INTERVAL = 1.0
+# 변경이 없어도 타이머/지표를 다시 계산하는 간격 (초)
+FULL_RESCAN_INTERVAL = 60
+
+
+class AsyncLaneLimiter:
+    """공유 속도 제한(RateLimiter)에서 받은 전송 시각을 레인 가중치에 따라 코루틴에 나눠 줌
+
+    PrioritySendQueue 와 같은 스트라이드 스케줄링: 시각이 하나 날 때마다 누적 통과 값이 가장 작은
+    레인의 대기자에게 주고, ALERT 대기자가 있으면 다른 프로세스의 BULK 전송을 잠시 멈춥니다.
+    상태 파일 잠금/읽기는 스레드 풀에서 하므로 이벤트 루프를 막지 않습니다.
+    """
+    def __init__(self, rate_limiter=None, weights=None):
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.weights = dict(weights or LANE_WEIGHTS)
+        self.lanes = {lane: deque() for lane in self.weights}
+        self._pass = {lane: 0.0 for lane in self.weights}
+        self._virtual_time = 0.0
+        self._last_hold = 0.0
+        self._dispatcher = None
+
+    async def acquire(self, lane=BULK):
+        """이 레인 차례의 전송 시각까지 대기"""
+        if lane not in self.lanes:
+            raise ValueError(f"알 수 없는 레인입니다: {lane}")
+        future = asyncio.get_running_loop().create_future()
+        queue = self.lanes[lane]
+        if not queue:
+            # 쉬던 레인이 밀린 몫을 한꺼번에 가져가지 않도록 현재 가상 시각부터 시작
+            self._pass[lane] = max(self._pass[lane], self._virtual_time)
+        queue.append(future)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    def _next_lane(self):
+        for queue in self.lanes.values():
+            while queue and queue[0].done():  # 취소된 대기자
+                queue.popleft()
+        ready = [lane for lane, queue in self.lanes.items() if queue]
+        if not ready:
+            return None
+        return min(ready, key=lambda lane: self._pass[lane])
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            if self.lanes[ALERT] and time.time() - self._last_hold > BULK_HOLD_SECONDS / 2:
+                self._last_hold = time.time()
+                await loop.run_in_executor(None, self.rate_limiter.hold_bulk)
+            slot, wait = await loop.run_in_executor(None, self.rate_limiter.take, lane)
+            if slot is None:
+                await asyncio.sleep(wait)
+                continue
+            delay = slot - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # 기다리는 동안 더 급한 대기자가 들어왔으면 그쪽에 줌
+            lane = self._next_lane()
+            if lane is None:
+                return
+            self._virtual_time = self._pass[lane]
+            self._pass[lane] += 1.0 / self.weights[lane]
+            self.lanes[lane].popleft().set_result(None)
+
+
+class AsyncTelegramSender:
+    """asyncio 용 텔레그램 메시지 전송 클래스"""
+    def __init__(self, bot_token=None, concurrency=100, rate_limiter=None):
+        """
+        Args:
+            bot_token (str): 텔레그램 봇 토큰
+            concurrency (int): 동시에 진행할 최대 전송 요청 수
+            rate_limiter (RateLimiter): 공유 속도 제한 (None이면 기본값, send_rate.state)
+        """
+        self.bot_token = bot_token or BOT_TOKEN
+        self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self.concurrency = concurrency
+        self.limiter = AsyncLaneLimiter(rate_limiter)
+        self._session = None
+        self._executor = None
+        self._thread_local = threading.local()
+
+    async def start(self):
+        if aiohttp is not None:
+            # 기존 TelegramSender 의 verify=False 와 동일하게 인증서 검증 생략
+            connector = aiohttp.TCPConnector(limit=self.concurrency, ssl=False)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=30)
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=min(self.concurrency, 64), thread_name_prefix="tg-send"
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _post_blocking(self, data):
+        """스레드 풀에서 실행 (스레드마다 연결을 재사용하는 Session 하나)"""
+        session = getattr(self._thread_local, "session", None)
+        if session is None:
+            session = self._thread_local.session = requests.Session()
+        response = session.post(f"{self.base_url}/sendMessage", data=data, verify=False, timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    async def send_message(self, chat_id, message, parse_mode="HTML"):
+        """한 명에게 전송하고 send_message_to_multiple 과 같은 형식의 결과 반환"""
+        data = {"chat_id": chat_id, "text": message, "parse_mode": parse_mode}
+        try:
+            if self._session is not None:
+                async with self._session.post(f"{self.base_url}/sendMessage", data=data) as response:
+                    result = await response.json(content_type=None)
+                    if response.status >= 400:
+                        raise RuntimeError(f"HTTP {response.status}: {result}")
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, self._post_blocking, data)
+        except Exception as e:
+            return {"chat_id": chat_id, "success": False, "error": str(e)}
+        message_id = (result.get("result") or {}).get("message_id")
+        return {"chat_id": chat_id, "success": True, "result": result, "message_id": message_id}
+
+    async def _send_journaled(self, journal, key, chat_id, message, parse_mode):
+        """API 호출 앞뒤로 멱등성 키를 기록하며 전송 (저널 파일 입출력은 스레드 풀에서)"""
+        loop = asyncio.get_running_loop()
+        try:
+            record = await loop.run_in_executor(None, journal.begin, key)
+        except OSError as e:
+            return {"chat_id": chat_id, "success": False, "error": f"전송 저널 기록 실패: {e}"}
+        if record is not None:
+            return journaled_result(chat_id, record)
+        result = await self.send_message(chat_id, message, parse_mode)
+        try:
+            await loop.run_in_executor(None, journal.finish, key, result)
+        except OSError as e:
+            print(f"[ERROR] 전송 저널 기록 실패 ({chat_id}): {e}")
+        return result
+
+    async def send_message_to_multiple(self, message, chat_ids, parse_mode="HTML", stopping=None,
+                                       journal=None, key=None, lane=ALERT):
+        """여러 채팅에 동시에 전송 (동시 요청 수는 concurrency, 초당 전송 수는 공유 속도 제한)
+
+        수신자 수만큼 코루틴을 만들지 않고 concurrency 개의 작업자가 차례로 가져가,
+        lane 차례의 전송 시각을 받은 뒤 전송합니다.
+        stopping (asyncio.Event) 이 설정되면 보내는 중인 요청만 마치고 멈추며,
+        이때 보내지 못한 수신자는 결과 리스트에서 빠집니다.
+        journal (DeliveryJournal) 과 key (스케줄 회차) 를 주면 이미 전송된 수신자는 건너뜁니다.
+        """
+        chat_ids = list(chat_ids)
+        results = [None] * len(chat_ids)
+        use_journal = journal is not None and key is not None
+        done = {}
+        if use_journal:
+            # 이미 전송된 수신자는 전송 시각을 받지 않고 바로 결과 처리
+            loop = asyncio.get_running_loop()
+            done = await loop.run_in_executor(
+                None, journal.completed, [delivery_key(key, chat_id) for chat_id in chat_ids]
+            )
+            for i, chat_id in enumerate(chat_ids):
+                record = done.get(delivery_key(key, chat_id))
+                if record is not None:
+                    results[i] = journaled_result(chat_id, record)
+            if done:
+                print(f"[INFO] 이미 전송된 수신자 {len(done)}명 건너뜀")
+        positions = iter([i for i in range(len(chat_ids)) if results[i] is None])
+
+        async def worker():
+            for i in positions:
+                if stopping is not None and stopping.is_set():
+                    return
+                await self.limiter.acquire(lane)
+                if stopping is not None and stopping.is_set():
+                    return
+                if use_journal:
+                    results[i] = await self._send_journaled(
+                        journal, delivery_key(key, chat_ids[i]), chat_ids[i], message, parse_mode
+                    )
+                else:
+                    results[i] = await self.send_message(chat_ids[i], message, parse_mode)
+
+        workers = min(self.concurrency, len(chat_ids))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        results = [r for r in results if r is not None]
+        success_count = sum(1 for r in results if r["success"])
+        print(f"📊 전송 결과: {success_count}/{len(chat_ids)}명 성공")
+        return results
+
+
+class AsyncScheduleService:
+    """타이머/파일 감시/전송/지표를 이벤트 루프 하나에서 처리하는 스케줄 서비스"""
+    def __init__(self, service=None, sender=None):
+        # 저장소, 사용자 캐시, 전송 기록, 지표는 동기 서비스의 것을 그대로 사용
+        self.service = service or ScheduleService()
+        self.sender = sender or AsyncTelegramSender()
+        self.metrics = self.service.metrics
+        self._timers = []  # (전송 시각 timestamp, 스케줄 ID) 힙
+        self._inflight = {}  # 스케줄 ID -> 전송 Task
+        self._wakeup = None
+        self._stopping = None
+        self._metrics_server = None
+        # 저장소 접근은 이 스레드 하나에서만 (파일 I/O 가 이벤트 루프를 막지 않도록)
+        self._store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+
+    async def _in_store_thread(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._store_executor, func, *args)
+
+    def _build_timers(self):
+        """저장소 내용으로 타이머 힙과 대기 지표를 다시 계산 (저장소 스레드에서 실행)"""
+        start = time.perf_counter()
+        now = get_korean_time()
+        timers = []
+        stats = {"scanned": 0, "pending": 0, "overdue": 0, "pending_recipients": 0}
+
+        for schedule_item in self.service.store.items():
+            stats["scanned"] += 1
+            if not schedule_item["active"] or schedule_item["sent"]:
+                continue
+            try:
+                schedule_datetime = parse_schedule_time(schedule_item)
+            except ValueError:
+                continue
+
+            elapsed = (now - schedule_datetime).total_seconds()
+            if elapsed > 0:
+                stats["overdue"] += 1
+            else:
+                stats["pending"] += 1
+
+            if schedule_item.get("deliveries"):
+                counts = delivery_counts(schedule_item)
+                stats["pending_recipients"] += sum(n for status, n in counts.items() if status not in DONE_STATUSES)
+                deferred_at = next_deferred_time(schedule_item)
+                if deferred_at is not None:
+                    # 방해 금지 시간으로 미뤄 둔 수신자는 재시도 기간과 관계없이 그 시각에 전송
+                    timers.append((deferred_at, schedule_item["id"]))
+                if elapsed <= RETRY_WINDOW_SECONDS:
+                    if counts[PENDING]:
+                        # 종료로 중단된 전송은 기다리지 않고 바로 이어서 보냄
+                        timers.append((now.timestamp(), schedule_item["id"]))
+                    else:
+                        # 실패한 수신자는 마지막 시도 기준으로 늘어나는 간격(retry_at)마다 재전송
+                        retry_at = next_retry_time(schedule_item)
+                        if retry_at is not None:
+                            timers.append((retry_at, schedule_item["id"]))
+            elif elapsed <= 60:
+                # 서비스가 늦게 시작됐어도 1분 이내면 바로 전송 (기존 허용 오차와 동일)
+                timers.append((schedule_datetime.timestamp(), schedule_item["id"]))
+
+        heapq.heapify(timers)
+        self.metrics.record_tick(time.perf_counter() - start, ok=self.service.store.last_error is None, **stats)
+        if self.service.metrics_file:
+            self.metrics.write_file(self.service.metrics_file)
+        return timers
+
+    def _refresh(self):
+        """변경된 파일만 다시 읽음 (스케줄 변경 여부 반환)"""
+        changed, removed = self.service.store.refresh()
+        self.service.user_manager.load_users()
+        if changed or removed:
+            print(f"[INFO] 스케줄 변경 감지: 변경 {len(changed)}개, 삭제 {len(removed)}개")
+        return bool(changed or removed)
+
+    async def _watch_loop(self):
+        """파일 변경 감시 → 바뀐 경우에만 타이머 재구성"""
+        last_rescan = time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                changed = await self._in_store_thread(self._refresh)
+                if changed or time.monotonic() - last_rescan >= FULL_RESCAN_INTERVAL:
+                    self._timers = await self._in_store_thread(self._build_timers)
+                    last_rescan = time.monotonic()
+                    self._wakeup.set()
+            except Exception as e:
+                print(f"[ERROR] 파일 감시 오류: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=WATCH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _timer_loop(self):
+        """가장 이른 타이머 시각까지 잠들었다가 정확히 깨어나 전송 작업 시작"""
+        while not self._stopping.is_set():
+            now_ts = time.time()
+            while self._timers and self._timers[0][0] <= now_ts:
+                fire_ts, schedule_id = heapq.heappop(self._timers)
+                if schedule_id not in self._inflight:
+                    task = asyncio.create_task(self._fire(schedule_id, fire_ts))
+                    self._inflight[schedule_id] = task
+                    task.add_done_callback(lambda t, sid=schedule_id: self._inflight.pop(sid, None))
+
+            timeout = self._timers[0][0] - time.time() if self._timers else FULL_RESCAN_INTERVAL
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, min(timeout, FULL_RESCAN_INTERVAL)))
+            except asyncio.TimeoutError:
+                pass
+
+    def _prepare_fire(self, schedule_id):
+        """전송할 수신자와 메시지를 정하고 미루기/제외를 기록 (저장소 스레드에서 실행)
+
+        저장소 항목과 사용자 캐시는 이 스레드에서만 읽으므로 이벤트 루프에는 값만 넘깁니다.
+        전송할 수신자가 없으면 미룬 전송 시각만 담아 반환합니다 (없으면 None).
+        """
+        schedule_item = self.service.store.get(schedule_id)
+        if schedule_item is None or not schedule_item["active"] or schedule_item["sent"]:
+            return None
+
+        active_users = self.service.user_manager.get_active_user_ids()
+        if not active_users:
+            print("[WARNING] 활성 사용자가 없습니다.")
+            return None
+        try:
+            targets = list(self.service.user_manager.get_recipients(schedule_item))
+        except SegmentError as e:
+            print(f"[ERROR] 대상 그룹 식 오류 ({schedule_item.get('audience')}): {e}")
+            return None
+        if not targets:
+            print(f"[SKIP] 구독한 사용자가 없습니다: {schedule_item['program_name']}")
+            self.service.record_results(schedule_id, [], targets)
+            return None
+        if not unserved_recipients(schedule_item, targets):
+            self.service.record_results(schedule_id, [], targets)
+            return None
+        schedule_datetime = parse_schedule_time(schedule_item)
+        now = get_korean_time()
+        in_window = (now - schedule_datetime).total_seconds() <= RETRY_WINDOW_SECONDS
+        recipients = retryable_recipients(schedule_item, targets, now_ts=now.timestamp()) if in_window else []
+        recipients += deferred_due(schedule_item, targets, now.timestamp())
+        if not recipients:
+            return None
+
+        # 방해 금지 시간인 수신자는 정책에 따라 미루거나 이번 알림에서 뺌
+        plan = self.service.user_manager.plan_delivery(recipients, now)
+        deferred_at = None
+        if plan.deferred or plan.dropped:
+            deferred_count = sum(len(ids) for ids in plan.deferred.values())
+            print(f"[QUIET] 방해 금지 시간: {deferred_count}명 나중에 전송, {len(plan.dropped)}명 전송 안 함")
+            self.service.record_results(schedule_id, [], targets, (), plan.deferred, plan.dropped)
+            if plan.deferred:
+                deferred_at = min(plan.deferred)
+        fire = {"deferred_at": deferred_at, "recipients": list(plan.now)}
+        if not fire["recipients"]:
+            return fire
+
+        # 종료로 중단된 전송(대기 상태 수신자)은 재시도가 아니라 원래 알림으로 이어서 보냄
+        resumed = delivery_counts(schedule_item)[PENDING] > 0
+        fire.update(
+            targets=targets,
+            message=schedule_item["message"],
+            key=occurrence_key(schedule_item),
+            schedule_ts=schedule_datetime.timestamp(),
+            is_retry=bool(schedule_item.get("deliveries")) and not resumed,
+            resumed=resumed,
+            program_name=schedule_item["program_name"],
+            channel=schedule_item["channel"],
+        )
+        return fire
+
+    def _finish_fire(self, schedule_id, results, targets, unfinished, schedule_ts):
+        """전송 결과를 기록하고 다음 재시도 시각을 반환 (저장소 스레드에서 실행)"""
+        updated = self.service.record_results(schedule_id, results, targets, unfinished)
+        if updated is None or updated["sent"]:
+            return None
+        retry_at = next_retry_time(updated)
+        if retry_at is not None and retry_at - schedule_ts <= RETRY_WINDOW_SECONDS:
+            return retry_at
+        return None
+
+    def _push_timer(self, when, schedule_id):
+        heapq.heappush(self._timers, (when, schedule_id))
+        self._wakeup.set()
+
+    async def _fire(self, schedule_id, fire_ts):
+        """스케줄 하나 전송 (아직 받지 못한 수신자에게만)"""
+        if self._stopping.is_set():
+            return
+        fire = await self._in_store_thread(self._prepare_fire, schedule_id)
+        if fire is None:
+            return
+        if fire["deferred_at"] is not None:
+            self._push_timer(fire["deferred_at"], schedule_id)
+        recipients = fire["recipients"]
+        if not recipients:
+            return
+
+        is_retry = fire["is_retry"]
+        label = "[RESUME] 중단됐던 방송 알림" if fire["resumed"] else "[RETRY] 실패한 수신자" if is_retry else "[SEND] 방송 알림"
+        print(f"{label} 전송 시작: {fire['program_name']} ({fire['channel']}) → {len(recipients)}명")
+
+        schedule_ts = fire["schedule_ts"]
+        fire_lag = time.time() - schedule_ts
+        results = await self.sender.send_message_to_multiple(
+            fire["message"], recipients, stopping=self._stopping,
+            journal=self.service.journal, key=fire["key"],
+            lane=REMINDER if is_retry else ALERT
+        )
+        completion_lag = time.time() - schedule_ts
+        attempted = {r["chat_id"] for r in results}
+        unfinished = [chat_id for chat_id in recipients if chat_id not in attempted]
+        if unfinished:
+            print(f"[STOP] 전송 중단: 남은 {len(unfinished)}명은 다음 시작 때 전송")
+
+        success_count = sum(1 for r in results if r["success"])
+        print(f"[SUCCESS] 전송 완료: {success_count}/{len(recipients)}명 (시작 지연 {fire_lag:.1f}초)")
+        self.metrics.record_broadcast(
+            fire_lag, completion_lag, success_count, len(results) - success_count, retry=is_retry
+        )
+
+        retry_at = await self._in_store_thread(
+            self._finish_fire, schedule_id, results, fire["targets"], unfinished, schedule_ts
+        )
+        if retry_at is not None and not self._stopping.is_set():
+            self._push_timer(retry_at, schedule_id)
+
+    async def _handle_metrics(self, reader, writer):
+        """최소한의 HTTP/1.0 응답으로 지표 제공"""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else "/"
+            if path == "/metrics":
+                status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+                body = self.metrics.to_prometheus().encode('utf-8')
+            elif path == "/metrics.json":
+                status, content_type = "200 OK", "application/json; charset=utf-8"
+                body = json.dumps(self.metrics.to_dict(), ensure_ascii=False).encode('utf-8')
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def stop(self):
+        """서비스 중지 요청 (이벤트 루프 스레드에서 호출)"""
+        if self._stopping is not None:
+            self._stopping.set()
+            self._wakeup.set()
+
+    def _install_signal_handlers(self):
+        """SIGTERM/SIGINT (Windows 는 Ctrl+Break 도) 를 받으면 정상 종료 절차 시작"""
+        loop = asyncio.get_running_loop()
+
+        def handle(signum=None, frame=None):
+            loop.call_soon_threadsafe(self.stop)
+
+        for name in ("SIGTERM", "SIGINT", "SIGBREAK"):
+            signum = getattr(signal, name, None)
+            if signum is None:
+                continue
+            try:
+                loop.add_signal_handler(signum, self.stop)
+            except NotImplementedError:  # Windows 이벤트 루프
+                signal.signal(signum, handle)
+            except (RuntimeError, ValueError):
+                return  # 메인 스레드가 아니면 신호 처리기를 등록할 수 없음
+
+    async def run(self):
+        """서비스 실행 (stop() 이 호출될 때까지)"""
+        print("[START] TV 방송 스케줄 비동기 서비스 시작...")
+        print(f"[INFO] 전송 방식: {'aiohttp' if aiohttp is not None else '스레드 풀 (requests)'}")
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        await self.sender.start()
+
+        port = self.service.metrics_port
+        if port:
+            try:
+                self._metrics_server = await asyncio.start_server(self._handle_metrics, "127.0.0.1", port)
+                print(f"[INFO] 지표 엔드포인트: http://127.0.0.1:{port}/metrics")
+            except OSError as e:
+                print(f"[WARNING] 지표 엔드포인트 시작 실패 (포트 {port}): {e}")
+
+        self._install_signal_handlers()
+        try:
+            kept = await self._in_store_thread(self.service.journal.compact)
+            print(f"[INFO] 전송 저널 정리 완료 (기록 {kept}건 유지)")
+        except OSError as e:
+            print(f"[WARNING] 전송 저널 정리 실패: {e}")
+        self._timers = await self._in_store_thread(self._build_timers)
+        try:
+            await asyncio.gather(self._watch_loop(), self._timer_loop())
+        finally:
+            # 새 요청은 멈추고 보내는 중인 요청만 마친 뒤 남은 수신자를 저장 (시한 초과 시 취소)
+            self.stop()
+            if self._inflight:
+                print(f"[STOP] 진행 중인 전송 {len(self._inflight)}건 마무리 대기 (최대 {SHUTDOWN_TIMEOUT:.0f}초)...")
+                _, unfinished = await asyncio.wait(list(self._inflight.values()), timeout=SHUTDOWN_TIMEOUT)
+                for task in unfinished:
+                    task.cancel()
+                if unfinished:
+                    print(f"[WARNING] 시한 안에 끝나지 않은 전송 {len(unfinished)}건 취소")
+                    await asyncio.gather(*unfinished, return_exceptions=True)
+            if self._metrics_server is not None:
+                self._metrics_server.close()
+                await self._metrics_server.wait_closed()
+            await self.sender.close()
+            self._store_executor.shutdown(wait=True)
+            print("[STOP] TV 방송 스케줄 비동기 서비스 중지")
+
+
+def run_async_service():
+    """비동기 서비스를 실행하고 Ctrl+C 로 중지"""
+    service = AsyncScheduleService()
+    try:
+        asyncio.run(service.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    run_async_service()
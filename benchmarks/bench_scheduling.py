@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스케줄링 경로 합성 데이터 벤치마크
+
+합성 tv_schedules.json / users.json 을 만들어 다음 항목을 측정합니다.
+- load_schedules: 서비스의 스케줄 전체 로드 (콜드)
+- save_schedules: 스케줄 한 건 갱신 트랜잭션 (파일 전체 저장)
+- tick_send:      전송 대상이 있는 check_and_send_messages 1회
+- tick_idle:      전송 대상이 없는 check_and_send_messages (반복 중앙값)
+- upcoming:       TVScheduler.get_upcoming_schedules(7) (반복 중앙값)
+- frame_build:    스케줄 목록용 열 기반 프레임 만들기 (반복 중앙값)
+- query:          프레임 필터+검색+다중 키 정렬, 캐시 없이 (반복 중앙값)
+각 항목의 최대 메모리(tracemalloc peak)도 함께 기록합니다.
+
+사용 예:
+    python benchmarks/bench_scheduling.py
+    python benchmarks/bench_scheduling.py --schedules 1000,10000,100000,1000000 --users 10,1000,100000
+    python benchmarks/bench_scheduling.py --output bench.json --baseline previous.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHANNELS = ["KBS1", "KBS2", "MBC", "SBS", "tvN", "JTBC", "채널A", "MBN", "EBS", "KBS WORLD"]
+
+
+class NullSender:
+    """네트워크 없이 모두 성공으로 응답하는 전송기"""
+    def __init__(self):
+        self.sent = 0
+
+    def send_message_to_multiple(self, message, chat_ids=None, parse_mode="HTML"):
+        self.sent += len(chat_ids)
+        return [
+            {"chat_id": chat_id, "success": True, "result": {"ok": True}, "message_id": i}
+            for i, chat_id in enumerate(chat_ids, 1)
+        ]
+
+    def send_message_to_chat(self, chat_id, message, parse_mode="HTML"):
+        self.sent += 1
+        return {"chat_id": chat_id, "success": True, "result": {"ok": True}, "message_id": self.sent}
+
+
+def generate_data(directory, schedule_count, user_count, now, due_count):
+    """합성 스케줄/사용자 파일 생성 (due_count 개는 now 시각에 전송 대상)"""
+    schedules = []
+    for i in range(schedule_count):
+        if i < due_count:
+            at = now
+        else:
+            # 과거/미래 30일 범위에 고르게 분포
+            at = now + timedelta(minutes=(i * 37) % (60 * 24 * 60) - 60 * 24 * 30)
+            if at == now:
+                at += timedelta(minutes=1)
+        channel = CHANNELS[i % len(CHANNELS)]
+        program_name = f"프로그램 {i}"
+        date_str = at.strftime("%Y-%m-%d")
+        time_str = at.strftime("%H:%M")
+        schedules.append({
+            "id": f"{date_str}_{time_str}_{channel}_{program_name}",
+            "date": date_str,
+            "hour": at.hour,
+            "minute": at.minute,
+            "time": time_str,
+            "channel": channel,
+            "program_name": program_name,
+            "message": f"📺 {channel}에서 '{program_name}' 방송이 시작됩니다!",
+            "active": i % 10 != 9,
+            "sent": at < now and i % 3 == 0,
+            "created_at": now.isoformat(),
+        })
+    users = [
+        {"id": 1_000_000_000 + i, "name": f"사용자{i}", "active": i % 20 != 0}
+        for i in range(user_count)
+    ]
+    with open(os.path.join(directory, "tv_schedules.json"), 'w', encoding='utf-8') as f:
+        json.dump({"schedules": schedules, "version": 0}, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(directory, "users.json"), 'w', encoding='utf-8') as f:
+        json.dump({"users": users, "version": 0}, f, ensure_ascii=False, indent=2)
+    return schedules[0]["id"] if schedules else None
+
+
+def measure(func, repeat=1, memory=True):
+    """실행 시간(중앙값, 초)과 최대 메모리(바이트) 측정"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"seconds": round(statistics.median(durations), 6), "peak_bytes": peak}
+
+
+def run_case(schedule_count, user_count, args):
+    import schedule_service_server
+    import tv_scheduler_1minute
+    from send_queue import PrioritySendQueue, RateLimiter
+    from delivery_journal import DeliveryJournal
+    from schedule_frame import build_frame, query_frame
+
+    kst = schedule_service_server.KST
+    now = kst.localize(datetime(2030, 1, 15, 20, 0))
+    original_clock = tv_scheduler_1minute.get_korean_time
+    original_cwd = os.getcwd()
+    result = {"schedules": schedule_count, "users": user_count}
+
+    with tempfile.TemporaryDirectory(prefix="tvbench_") as directory:
+        first_id = generate_data(directory, schedule_count, user_count, now, args.due)
+        result["file_bytes"] = os.path.getsize(os.path.join(directory, "tv_schedules.json"))
+        os.chdir(directory)
+        tv_scheduler_1minute.get_korean_time = lambda: now
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as quiet:
+                service = schedule_service_server.ScheduleService(clock=lambda: now)
+                service.telegram_sender = NullSender()
+                # 전송 속도 제한 없이 대기열 경로만 측정 (저널은 fsync 없이 기록)
+                service.journal = DeliveryJournal("delivery_journal.jsonl", fsync=False)
+                service.send_queue = PrioritySendQueue(
+                    service.telegram_sender, RateLimiter(rate=1e9, state_file="send_rate.state"),
+                    journal=service.journal,
+                )
+                service.metrics_file = None
+
+                def load():
+                    service.store.refresh(force=True)
+                    quiet.seek(0)
+                    quiet.truncate()
+
+                def save():
+                    with service.store.transaction() as tx:
+                        tx.update(first_id, created_at=now.isoformat())
+
+                def tick():
+                    service.check_and_send_messages()
+                    quiet.seek(0)
+                    quiet.truncate()
+
+                result["load_schedules"] = measure(load, args.repeat, args.memory)
+                result["save_schedules"] = measure(save, args.repeat, args.memory)
+                # 첫 체크는 전송 포함 (메모리 측정 없이 1회만)
+                result["tick_send"] = measure(tick, 1, memory=False)
+                result["messages_sent"] = service.telegram_sender.sent
+                result["tick_idle"] = measure(tick, args.repeat, args.memory)
+
+                scheduler = tv_scheduler_1minute.TVScheduler("tv_schedules.json")
+                result["upcoming"] = measure(
+                    lambda: scheduler.get_upcoming_schedules(7), args.repeat, args.memory
+                )
+                result["frame_build"] = measure(
+                    lambda: build_frame(scheduler.store.items()), args.repeat, args.memory
+                )
+                frame = scheduler.schedule_frame()
+                result["query"] = measure(
+                    lambda: query_frame(frame, "미전송", "채널순", "프로그램 1"), args.repeat, args.memory
+                )
+                service.send_queue.stop()
+        finally:
+            tv_scheduler_1minute.get_korean_time = original_clock
+            os.chdir(original_cwd)
+    return result
+
+
+def compare(results, baseline_path, threshold):
+    """기준 결과 대비 threshold 배 이상 느려진 항목 목록"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r["schedules"], r["users"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get((r["schedules"], r["users"]))
+        if not base:
+            continue
+        for metric in ("load_schedules", "save_schedules", "tick_send", "tick_idle", "upcoming", "frame_build", "query"):
+            if metric not in base or metric not in r or not base[metric]["seconds"]:
+                continue
+            ratio = r[metric]["seconds"] / base[metric]["seconds"]
+            if ratio >= threshold:
+                regressions.append({
+                    "schedules": r["schedules"], "users": r["users"], "metric": metric,
+                    "baseline": base[metric]["seconds"], "current": r[metric]["seconds"],
+                    "ratio": round(ratio, 2),
+                })
+    return regressions
+
+
+def parse_sizes(value):
+    return [int(v.replace("_", "")) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스케줄링 경로 합성 데이터 벤치마크")
+    parser.add_argument("--schedules", type=parse_sizes, default=parse_sizes("1000,10000,100000"),
+                        help="스케줄 수 목록 (예: 1000,10000,100000,1000000)")
+    parser.add_argument("--users", type=parse_sizes, default=parse_sizes("10,1000,100000"),
+                        help="사용자 수 목록 (예: 10,1000,100000)")
+    parser.add_argument("--due", type=int, default=1, help="체크 시각에 전송 대상이 되는 스케줄 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 측정 횟수 (중앙값 사용)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="메모리 측정 생략")
+    parser.add_argument("--output", help="결과 JSON 파일 경로 (기본: 표준 출력)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--threshold", type=float, default=1.5, help="회귀로 판단할 배율")
+    args = parser.parse_args()
+
+    # Streamlit 모듈을 스크립트 밖에서 import 할 때 나오는 경고 숨김
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    results = []
+    for schedule_count in args.schedules:
+        for user_count in args.users:
+            print(f"[BENCH] 스케줄 {schedule_count:,}개 / 사용자 {user_count:,}명 ...", file=sys.stderr)
+            results.append(run_case(schedule_count, user_count, args))
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    exit_code = 0
+    if args.baseline:
+        report["regressions"] = compare(results, args.baseline, args.threshold)
+        if report["regressions"]:
+            exit_code = 1
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"[BENCH] 결과 저장: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
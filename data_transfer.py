@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스케줄/사용자 데이터 CSV·JSONL 내보내기와 가져오기
+
+- 내보내기: 항목을 한 줄씩 써서 파일 전체를 메모리에 만들지 않음
+  (CSV 는 표 계산 프로그램용 평면 열, JSONL 은 전송 기록까지 포함한 전체 항목)
+- 가져오기: 한 줄씩 읽으면서 행 단위로 검증하고, 같은 id 는 뒤에 나온 행으로 합친 뒤
+  batch_size 건씩 한 트랜잭션으로 저장 (이미 있는 항목은 갱신, 없으면 추가, 같으면 그대로 둠)
+  행에 없는 선택 필드(구독 채널/키워드 등)는 기존 항목에서도 지움
+  잘못된 행은 건너뛰고 줄 번호와 이유를 모아 알려줌
+
+사용 예:
+    python data_transfer.py export schedules schedules.csv
+    python data_transfer.py import users users.jsonl --batch-size 1000
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytz
+
+from json_store import JsonStore, StoreError
+from quiet_hours import DEFER, POLICIES, parse_hhmm
+from segments import SegmentError, parse_audience, parse_segments, valid_segment_name
+from subscriptions import parse_keywords
+
+SCHEDULES = "schedules"
+USERS = "users"
+KINDS = (SCHEDULES, USERS)
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = (CSV, JSONL)
+
+DATA_FILES = {SCHEDULES: "tv_schedules.json", USERS: "users.json"}
+
+# CSV 열 순서
+CSV_COLUMNS = {
+    SCHEDULES: ["id", "date", "time", "channel", "program_name", "message", "active", "sent", "audience", "created_at"],
+    USERS: ["id", "name", "active", "channels", "keywords", "segments", "timezone", "quiet_start", "quiet_end", "quiet_policy"],
+}
+
+# 행에 값이 없으면 기존 항목에서 지우는 선택 필드 (가져온 행이 항목 전체를 나타냄)
+OPTIONAL_FIELDS = {
+    SCHEDULES: ("audience",),
+    USERS: ("channels", "keywords", "segments", "timezone", "quiet_hours"),
+}
+
+DEFAULT_BATCH_SIZE = 1000
+# 결과에 남길 잘못된 행 수 (건수는 모두 셈)
+MAX_REPORTED_ERRORS = 20
+
+
+class RowError(ValueError):
+    """가져올 수 없는 행"""
+
+
+def detect_format(filename):
+    """파일 이름의 확장자로 형식 판단 (.csv → csv, 그 밖에는 jsonl)"""
+    return CSV if filename.lower().endswith(".csv") else JSONL
+
+
+def _flag(value, default):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "1", "yes", "y", "o"):
+        return True
+    if text in ("false", "0", "no", "n", "x"):
+        return False
+    raise RowError(f"참/거짓 값이 아닙니다: {value!r}")
+
+
+def _text(record, name, required=False):
+    value = record.get(name)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise RowError(f"{name} 값이 없습니다.")
+    return value
+
+
+def _names(value, parse):
+    """리스트 또는 쉼표로 구분한 문자열 → 리스트"""
+    if isinstance(value, list):
+        return parse(",".join(str(v) for v in value))
+    return parse(value or "")
+
+
+def _passthrough(record, item, consumed=()):
+    """JSONL 의 나머지 필드(전송 기록 등)를 그대로 보존 (rev 는 저장소가 다시 매김)"""
+    for key, value in record.items():
+        if key not in item and key != "rev" and key not in consumed:
+            item[key] = value
+    return item
+
+
+def normalize_schedule(record, fmt=JSONL):
+    """행 → 스케줄 항목 (직접 추가할 때와 같은 형식)
+
+    Raises:
+        RowError: 필수 값 누락/형식 오류
+    """
+    date = _text(record, "date", required=True)
+    try:
+        datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise RowError(f"날짜 형식이 아닙니다 (YYYY-MM-DD): {date!r}")
+    time_str = _text(record, "time")
+    if not time_str and record.get("hour") not in (None, ""):
+        time_str = f"{int(record['hour']):02d}:{int(record.get('minute') or 0):02d}"
+    try:
+        minutes = parse_hhmm(time_str)
+    except ValueError:
+        raise RowError(f"시간 형식이 아닙니다 (HH:MM): {time_str!r}")
+    hour, minute = divmod(minutes, 60)
+    time_str = f"{hour:02d}:{minute:02d}"
+    channel = _text(record, "channel", required=True)
+    program_name = _text(record, "program_name", required=True)
+    audience = _text(record, "audience")
+    if audience:
+        try:
+            parse_audience(audience)
+        except SegmentError as e:
+            raise RowError(f"대상 그룹 식 오류: {e}")
+
+    item = {
+        "id": _text(record, "id") or f"{date}_{time_str}_{channel}_{program_name}",
+        "date": date,
+        "hour": hour,
+        "minute": minute,
+        "time": time_str,
+        "channel": channel,
+        "program_name": program_name,
+        "message": _text(record, "message") or f"📺 {channel}에서 '{program_name}' 방송이 시작됩니다!",
+        "active": _flag(record.get("active"), True),
+        "sent": _flag(record.get("sent"), False),
+    }
+    if audience:
+        item["audience"] = audience
+    created_at = _text(record, "created_at")
+    if created_at:
+        item["created_at"] = created_at
+    if fmt == JSONL:
+        deliveries = record.get("deliveries")
+        if deliveries is not None and not isinstance(deliveries, dict):
+            raise RowError("deliveries 는 객체여야 합니다.")
+        _passthrough(record, item)
+    return item
+
+
+def normalize_user(record, fmt=JSONL):
+    """행 → 사용자 항목
+
+    Raises:
+        RowError: 필수 값 누락/형식 오류
+    """
+    try:
+        user_id = int(_text(record, "id", required=True))
+    except ValueError:
+        raise RowError(f"채팅 ID 는 숫자여야 합니다: {record.get('id')!r}")
+    item = {
+        "id": user_id,
+        "name": _text(record, "name"),
+        "active": _flag(record.get("active"), True),
+    }
+    for field, parse in (("channels", parse_keywords), ("keywords", parse_keywords), ("segments", parse_segments)):
+        values = _names(record.get(field), parse)
+        if values:
+            item[field] = values
+    invalid = [name for name in item.get("segments", ()) if not valid_segment_name(name)]
+    if invalid:
+        raise RowError(f"그룹 이름에 공백이나 연산자 기호를 쓸 수 없습니다: {', '.join(invalid)}")
+    timezone = _text(record, "timezone")
+    if timezone:
+        if timezone not in pytz.all_timezones_set:
+            raise RowError(f"알 수 없는 시간대입니다: {timezone!r}")
+        item["timezone"] = timezone
+
+    quiet = record.get("quiet_hours")
+    if not isinstance(quiet, dict):
+        quiet = {"start": _text(record, "quiet_start"), "end": _text(record, "quiet_end"),
+                 "policy": _text(record, "quiet_policy")}
+    if quiet.get("start") or quiet.get("end"):
+        try:
+            parse_hhmm(quiet.get("start", "")), parse_hhmm(quiet.get("end", ""))
+        except ValueError:
+            raise RowError(f"방해 금지 시간 형식이 아닙니다 (HH:MM): {quiet.get('start')!r} ~ {quiet.get('end')!r}")
+        policy = quiet.get("policy") or DEFER
+        if policy not in POLICIES:
+            raise RowError(f"방해 금지 정책은 {', '.join(POLICIES)} 중 하나여야 합니다: {policy!r}")
+        item["quiet_hours"] = {"start": quiet["start"], "end": quiet["end"], "policy": policy}
+    if fmt == JSONL:
+        _passthrough(record, item, ("quiet_start", "quiet_end", "quiet_policy"))
+    return item
+
+
+NORMALIZERS = {SCHEDULES: normalize_schedule, USERS: normalize_user}
+
+
+def _csv_row(kind, item):
+    row = {column: item.get(column, "") for column in CSV_COLUMNS[kind]}
+    if kind == USERS:
+        for field in ("channels", "keywords", "segments"):
+            row[field] = ", ".join(item.get(field, ()))
+        quiet = item.get("quiet_hours") or {}
+        row["quiet_start"] = quiet.get("start", "")
+        row["quiet_end"] = quiet.get("end", "")
+        row["quiet_policy"] = quiet.get("policy", "")
+    for column in ("active", "sent"):
+        if column in row and isinstance(row[column], bool):
+            row[column] = "true" if row[column] else "false"
+    return row
+
+
+def export_records(items, kind, out, fmt=JSONL):
+    """항목을 한 줄씩 텍스트 스트림에 씀
+
+    Returns:
+        int: 내보낸 항목 수
+    """
+    count = 0
+    if fmt == CSV:
+        writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS[kind])
+        writer.writeheader()
+        for item in items:
+            writer.writerow(_csv_row(kind, item))
+            count += 1
+    else:
+        for item in items:
+            record = {k: v for k, v in item.items() if k != "rev"}
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def export_store(store, kind, path, fmt=None):
+    """저장소 항목을 파일로 내보냄 (임시 파일에 쓴 뒤 교체)"""
+    fmt = fmt or detect_format(path)
+    store.refresh()
+    items = list(store.items())  # 쓰는 동안 다른 트랜잭션이 목록을 바꿔도 영향 없도록 참조만 복사
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        count = export_records(items, kind, f, fmt)
+    os.replace(tmp_path, path)
+    return count
+
+
+def _iter_rows(text, fmt):
+    """(줄 번호, 레코드 dict) 를 하나씩 반환 (해석할 수 없는 줄은 RowError 를 레코드 자리에)"""
+    if fmt == CSV:
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(text, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, RowError(f"JSON 형식 오류: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_number, RowError("JSON 객체가 아닙니다.")
+            continue
+        yield line_number, record
+
+
+def import_records(store, kind, source, fmt=JSONL, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """CSV/JSONL 을 읽어 저장소에 추가/갱신
+
+    Args:
+        store (JsonStore): 대상 저장소
+        kind (str): SCHEDULES 또는 USERS
+        source: 파일 경로 또는 바이너리 파일 객체
+        progress (callable): 배치를 저장할 때마다 progress(stats) 호출
+            (stats 의 "position"/"size" 로 읽은 바이트 비율을 알 수 있음)
+
+    Returns:
+        dict: {"rows", "added", "updated", "unchanged", "duplicates", "invalid",
+               "errors": [(줄 번호, 이유)], ...}
+
+    Raises:
+        StoreError: 저장 실패 (이미 저장한 배치는 유지)
+    """
+    normalize = NORMALIZERS[kind]
+    stats = {"rows": 0, "added": 0, "updated": 0, "unchanged": 0, "duplicates": 0, "invalid": 0,
+             "errors": [], "position": 0, "size": None}
+    raw = open(source, 'rb') if isinstance(source, str) else source
+    try:
+        stats["size"] = os.fstat(raw.fileno()).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        stats["size"] = getattr(raw, "size", None)  # Streamlit 업로드 파일
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    batch = {}
+    seen = set()
+
+    def flush():
+        added = updated = unchanged = 0
+        with store.transaction() as tx:
+            for item in batch.values():
+                existing = tx.get(item["id"])
+                migrated = False
+                if existing is None and kind == USERS:
+                    # 문자열 ID 로 저장된 같은 사용자는 숫자 ID 항목으로 옮긴 뒤 갱신 (중복 방지)
+                    existing = tx.remove(str(item["id"]))
+                    if existing is not None:
+                        existing = tx.insert(dict(existing, id=item["id"]))
+                        migrated = True
+                if existing is None:
+                    tx.insert(item)
+                    added += 1
+                    continue
+                cleared = [field for field in OPTIONAL_FIELDS[kind] if field not in item and field in existing]
+                if not migrated and not cleared and all(existing.get(k) == v for k, v in item.items()):
+                    unchanged += 1  # 같은 내용이면 rev 를 올리지 않음
+                    continue
+                tx.upsert(item, clear=cleared)
+                updated += 1
+        stats["added"] += added
+        stats["updated"] += updated
+        stats["unchanged"] += unchanged
+        batch.clear()
+        try:
+            stats["position"] = raw.tell()
+        except (OSError, ValueError):
+            pass
+        if progress:
+            progress(dict(stats))
+
+    try:
+        for line_number, record in _iter_rows(text, fmt):
+            stats["rows"] += 1
+            try:
+                if isinstance(record, RowError):
+                    raise record
+                item = normalize(record, fmt)
+            except (ValueError, TypeError, AttributeError) as e:  # RowError 및 예상 못 한 값 형식
+                stats["invalid"] += 1
+                if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                    stats["errors"].append((line_number, str(e)))
+                continue
+            if item["id"] in seen:
+                stats["duplicates"] += 1
+            seen.add(item["id"])
+            batch[item["id"]] = item  # 같은 id 는 뒤에 나온 행으로
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except (UnicodeDecodeError, csv.Error) as e:
+        stats["invalid"] += 1
+        stats["errors"].append((stats["rows"] + 1, f"파일을 읽을 수 없습니다: {e}"))
+    finally:
+        # 호출자가 넘긴 파일 객체는 닫지 않도록 감싼 것만 떼어냄
+        text.detach()
+        if raw is not source:
+            raw.close()
+    return stats
+
+
+def describe_import(stats):
+    """가져오기 결과 요약 문장"""
+    return (f"{stats['rows']}행 중 추가 {stats['added']}건, 갱신 {stats['updated']}건, "
+            f"유지 {stats['unchanged']}건, 중복 id {stats['duplicates']}건, 오류 {stats['invalid']}건")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스케줄/사용자 데이터 CSV·JSONL 내보내기와 가져오기")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path", help="CSV/JSONL 파일 경로 (확장자로 형식 판단)")
+    parser.add_argument("--format", choices=FORMATS, help="파일 형식 (기본: 확장자로 판단)")
+    parser.add_argument("--data-file", help="데이터 파일 (기본: tv_schedules.json / users.json)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="한 번에 저장할 항목 수")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.path)
+    store = JsonStore(args.data_file or DATA_FILES[args.kind], args.kind)
+    if store.last_error:
+        print(f"[ERROR] {store.last_error}")
+        return 1
+    try:
+        if args.command == "export":
+            count = export_store(store, args.kind, args.path, fmt)
+            print(f"[INFO] {count}건을 {args.path} 로 내보냈습니다.")
+            return 0
+        stats = import_records(
+            store, args.kind, args.path, fmt, args.batch_size,
+            progress=lambda s: print(f"[INFO] 저장 중... {s['rows']}행 (추가 {s['added']} / 갱신 {s['updated']})"),
+        )
+    except (StoreError, OSError) as e:
+        print(f"[ERROR] {args.command} 실패: {e}")
+        return 1
+    print(f"[INFO] 가져오기 완료: {describe_import(stats)}")
+    for line_number, reason in stats["errors"]:
+        print(f"[WARNING] {line_number}행: {reason}")
+    return 0 if stats["invalid"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
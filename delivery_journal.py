@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+수신자별 전송 멱등성 기록 (추가 전용 저널)
+
+(스케줄 회차, chat_id) 마다 멱등성 키를 만들고, 텔레그램 API 호출 직전에 "begin",
+호출 직후에 "sent"/"failed" 를 한 줄씩 fsync 해서 남깁니다.
+    {"key": "2025-01-15_20:00_KBS1_뉴스@2025-01-15 20:00|6532057457", "event": "begin", "at": ...}
+    {"key": "...|6532057457", "event": "sent", "message_id": 123, "at": ...}
+
+전송 전에 키를 확인해서
+- 이미 "sent" 인 키는 다시 보내지 않고 기록된 결과를 그대로 사용
+- "begin" 만 있는 키(다른 인스턴스가 보내는 중이거나 결과를 모른 채 중단됨)는 중복을 피하려고 건너뛰고,
+  전송 기록에는 성공이 아닌 "확인 불가"(unknown) 로 남김
+- "failed" 인 키만 다시 보냄
+서비스가 전송 후 스케줄 저장 전에 죽거나 두 인스턴스가 동시에 떠 있어도 같은 알림을 두 번 보내지 않습니다.
+저널은 COMPACT_INTERVAL_SECONDS 마다, 또는 파일이 COMPACT_MAX_BYTES 를 넘으면 기록할 때 스스로 정리합니다.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from json_store import FileLock, copy_file_mode
+
+BEGIN = "begin"
+SENT = "sent"
+FAILED = "failed"
+
+# 이 기간(초)보다 오래된 기록은 compact() 때 정리
+RETENTION_SECONDS = 3 * 24 * 60 * 60
+# 기록할 때 이 간격(초)이 지났거나 파일이 이 크기를 넘었으면 자동 정리
+COMPACT_INTERVAL_SECONDS = 60 * 60
+COMPACT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def occurrence_key(schedule_item):
+    """스케줄 회차 키 (같은 스케줄이라도 날짜/시간이 바뀌면 다른 회차)"""
+    return f"{schedule_item['id']}@{schedule_item['date']} {schedule_item['time']}"
+
+
+def delivery_key(occurrence, chat_id):
+    """(스케줄 회차, chat_id) 멱등성 키"""
+    return f"{occurrence}|{chat_id}"
+
+
+class DeliveryJournal:
+    """멱등성 키 저널과 메모리 색인 (여러 프로세스가 같은 파일을 함께 사용)"""
+    def __init__(self, path="delivery_journal.jsonl", fsync=True,
+                 compact_interval=COMPACT_INTERVAL_SECONDS, compact_max_bytes=COMPACT_MAX_BYTES):
+        self.path = path
+        self.fsync = fsync
+        self.compact_interval = compact_interval
+        self.compact_max_bytes = compact_max_bytes
+        self._last_compact = time.time()
+        self.lock = FileLock(f"{path}.lock")
+        self._index = {}  # 키 -> 마지막 기록 {"event", "message_id", "at"}
+        self._offset = 0
+        self._inode = None
+        self._torn = False
+        self._thread_lock = threading.Lock()
+
+    def _catch_up(self):
+        """다른 프로세스가 덧붙인 기록만 읽어서 색인에 반영 (잠금 안에서 호출)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._index, self._offset, self._inode = {}, 0, None
+            return
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # 정리(compact)로 파일이 바뀌었으면 처음부터 다시 읽음
+            self._index, self._offset, self._inode = {}, 0, stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        # 잠금 안에서는 쓰는 중인 프로세스가 없으므로 줄바꿈 없는 마지막 줄은 비정상 종료로 잘린 줄
+        end = data.rfind(b"\n") + 1
+        self._torn = end < len(data)
+        for line in data.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # 비정상 종료로 잘린 줄
+            self._index[entry["key"]] = entry
+        self._offset += len(data)
+
+    def _append(self, entries):
+        with open(self.path, 'ab') as f:
+            if self._torn:
+                f.write(b"\n")
+                self._torn = False
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            self._offset = f.tell()
+        for entry in entries:
+            self._index[entry["key"]] = entry
+        if (time.time() - self._last_compact >= self.compact_interval
+                or (self.compact_max_bytes and self._offset >= self.compact_max_bytes)):
+            try:
+                self._compact(RETENTION_SECONDS)
+            except OSError as e:
+                self._last_compact = time.time()  # 다음 간격에 다시 시도
+                print(f"[WARNING] 전송 저널 정리 실패: {e}")
+
+    def lookup(self, key):
+        """키의 마지막 기록 반환 (없으면 None)"""
+        with self._thread_lock, self.lock:
+            self._catch_up()
+            return self._index.get(key)
+
+    def completed(self, keys):
+        """다시 보내면 안 되는 키들의 기록 {키: 기록} (전송 요청 전에 한꺼번에 거를 때 사용)"""
+        with self._thread_lock, self.lock:
+            self._catch_up()
+            found = {}
+            for key in keys:
+                record = self._index.get(key)
+                if record is not None and record["event"] != FAILED:
+                    found[key] = record
+            return found
+
+    def begin(self, key):
+        """전송 직전 호출: 보내도 되면 "begin" 을 기록하고 None, 아니면 기존 기록 반환"""
+        with self._thread_lock, self.lock:
+            self._catch_up()
+            record = self._index.get(key)
+            if record is not None and record["event"] != FAILED:
+                return record
+            self._append([{"key": key, "event": BEGIN, "at": time.time()}])
+            return None
+
+    def finish(self, key, result):
+        """전송 직후 호출: 결과(send_message_to_chat 형식)를 기록"""
+        entry = {"key": key, "event": SENT if result["success"] else FAILED, "at": time.time()}
+        if result["success"]:
+            entry["message_id"] = result.get("message_id")
+        else:
+            entry["error"] = result.get("error")
+        with self._thread_lock, self.lock:
+            self._catch_up()
+            self._append([entry])
+
+    def compact(self, retention_seconds=RETENTION_SECONDS):
+        """키마다 마지막 기록만 남기고 오래된 키는 버려서 파일을 다시 씀
+
+        Returns:
+            int: 남은 키 수
+        """
+        with self._thread_lock, self.lock:
+            self._catch_up()
+            return self._compact(retention_seconds)
+
+    def _compact(self, retention_seconds):
+        """compact() 본체 (잠금 안에서 호출, 색인은 최신 상태)"""
+        cutoff = time.time() - retention_seconds
+        kept = {k: e for k, e in self._index.items() if e.get("at", 0) >= cutoff}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".jsonl", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for entry in kept.values():
+                    f.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            copy_file_mode(self.path, tmp_path)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._index = kept
+        stat = os.stat(self.path)
+        self._offset, self._inode, self._torn = stat.st_size, stat.st_ino, False
+        self._last_compact = time.time()
+        return len(kept)
+
+
+def journaled_result(chat_id, record):
+    """저널 기록 때문에 보내지 않은 수신자의 결과
+
+    "sent" 기록은 성공으로, "begin" 만 있는 기록은 실제로 보냈는지 모르므로 unknown=True 인 실패로 돌려줍니다
+    (전송 기록에는 다시 보내지 않는 "확인 불가" 상태로 남음).
+    """
+    if record["event"] == SENT:
+        return {"chat_id": chat_id, "success": True, "message_id": record.get("message_id"), "skipped": "이미 전송됨"}
+    return {
+        "chat_id": chat_id,
+        "success": False,
+        "unknown": True,
+        "error": "전송 결과 확인 불가 (중복 방지로 건너뜀)",
+        "skipped": "전송 결과 확인 불가",
+    }
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스케줄별 수신자 전송 상태 관리
+
+스케줄 항목의 "deliveries" 에 채팅 ID별 전송 기록을 남깁니다.
+    "deliveries": {
+        "6532057457": {"status": "sent", "message_id": 123, "attempts": 1, ...},
+        "6998328049": {"status": "failed", "attempts": 2, "retry_at": 1736982240.0, "error": "...", ...},
+        "1164418904": {"status": "deferred", "not_before": 1736982000.0, "attempts": 0, ...}
+    }
+
+failed 는 retry_at 시각 이후에 다시 보낼 수신자 (시도할 때마다 기다리는 시간이 두 배),
+deferred 는 방해 금지 시간이 끝나는 not_before 시각에 보낼 수신자,
+dropped 는 방해 금지 정책으로 이번 알림을 보내지 않기로 한 수신자,
+unknown 은 전송 저널에 시작 기록만 있어 실제로 보냈는지 알 수 없는 수신자입니다
+(중복 전송을 피하려고 자동으로 다시 보내지 않고, 전송 결과에 따로 표시).
+"""
+
+from datetime import datetime
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+DEFERRED = "deferred"
+DROPPED = "dropped"
+UNKNOWN = "unknown"
+
+# 더 보낼 필요가 없는 상태 (unknown 은 중복 전송을 피하려고 다시 보내지 않음)
+DONE_STATUSES = (SENT, DROPPED, UNKNOWN)
+
+# 실패한 수신자에게 다시 보내는 최대 시도 횟수
+MAX_ATTEMPTS = 3
+# 실패한 수신자에게 다시 보내기 전 기다리는 시간 (초, 시도할 때마다 두 배, 최대 RETRY_MAX_DELAY)
+RETRY_BASE_DELAY = 120
+RETRY_MAX_DELAY = 600
+
+
+def retry_delay(attempts):
+    """attempts 번 시도하고 실패한 뒤 다시 보내기까지 기다릴 시간 (초)"""
+    return min(RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), RETRY_MAX_DELAY)
+
+
+def get_delivery(schedule, chat_id):
+    """채팅 ID의 전송 기록 반환 (없으면 빈 dict)"""
+    return schedule.get("deliveries", {}).get(str(chat_id), {})
+
+
+def unserved_recipients(schedule, chat_ids):
+    """아직 전송에 성공하지 않은 수신자만 반환 (보내지 않기로 한 수신자 제외)"""
+    deliveries = schedule.get("deliveries")
+    if not deliveries:
+        return list(chat_ids)
+    return [
+        chat_id for chat_id in chat_ids
+        if deliveries.get(str(chat_id), {}).get("status") not in DONE_STATUSES
+    ]
+
+
+def retryable_recipients(schedule, chat_ids, max_attempts=MAX_ATTEMPTS, now_ts=None):
+    """아직 성공하지 않았고 시도 횟수가 남은 수신자만 반환 (방해 금지로 미룬 수신자 제외)
+
+    now_ts 를 주면 실패한 수신자 중 다시 보낼 시각(retry_at)이 된 수신자만 포함합니다.
+    """
+    deliveries = schedule.get("deliveries")
+    if not deliveries:
+        return list(chat_ids)
+    recipients = []
+    for chat_id in chat_ids:
+        record = deliveries.get(str(chat_id), {})
+        status = record.get("status")
+        if status in DONE_STATUSES or status == DEFERRED or record.get("attempts", 0) >= max_attempts:
+            continue
+        if now_ts is not None and status == FAILED and record.get("retry_at", 0) > now_ts:
+            continue
+        recipients.append(chat_id)
+    return recipients
+
+
+def next_retry_time(schedule, max_attempts=MAX_ATTEMPTS):
+    """실패한 수신자를 다시 보낼 가장 이른 시각 timestamp (시도 횟수가 남은 수신자가 없으면 None)"""
+    times = [
+        record.get("retry_at", 0) for record in schedule.get("deliveries", {}).values()
+        if record.get("status") == FAILED and record.get("attempts", 0) < max_attempts
+    ]
+    return min(times) if times else None
+
+
+def deferred_due(schedule, chat_ids, now_ts):
+    """방해 금지로 미뤘다가 now_ts 시각에 보낼 때가 된 수신자"""
+    deliveries = schedule.get("deliveries")
+    if not deliveries:
+        return []
+    due = []
+    for chat_id in chat_ids:
+        record = deliveries.get(str(chat_id))
+        if record and record.get("status") == DEFERRED and record.get("not_before", 0) <= now_ts:
+            due.append(chat_id)
+    return due
+
+
+def next_deferred_time(schedule):
+    """미뤄 둔 수신자 중 가장 이른 전송 시각 timestamp (없으면 None)"""
+    times = [
+        record.get("not_before", 0) for record in schedule.get("deliveries", {}).values()
+        if record.get("status") == DEFERRED
+    ]
+    return min(times) if times else None
+
+
+def delivery_counts(schedule):
+    """상태별 수신자 수 {"sent": n, "failed": n, "pending": n, "unknown": n, ...}"""
+    counts = {SENT: 0, FAILED: 0, PENDING: 0, UNKNOWN: 0}
+    for record in schedule.get("deliveries", {}).values():
+        status = record.get("status", PENDING)
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def _writable(deliveries, key, default):
+    """고칠 수신자 기록 (저장소 항목과 공유하는 기록 dict 는 고치지 않도록 복사해서 바꿔 넣음)"""
+    record = deliveries[key] = dict(deliveries.get(key) or default)
+    return record
+
+
+def apply_results(deliveries, results, now=None):
+    """send_message_to_multiple 결과를 전송 기록에 반영
+
+    Args:
+        deliveries (dict): 스케줄 deliveries 의 복사본 (제자리에서 갱신, 수신자 기록은 복사해서 교체)
+        results (list): send_message_to_multiple 결과 리스트
+        now (datetime): 기록 시각
+    """
+    now = now or datetime.now()
+    timestamp = now.isoformat()
+    for r in results:
+        key = str(r["chat_id"])
+        record = _writable(deliveries, key, {"status": PENDING, "attempts": 0})
+        record["attempts"] = record.get("attempts", 0) + 1
+        record["updated_at"] = timestamp
+        record.pop("not_before", None)
+        record.pop("retry_at", None)
+        if r["success"]:
+            record["status"] = SENT
+            record["message_id"] = r.get("message_id")
+            record.pop("error", None)
+        elif r.get("unknown"):
+            record["status"] = UNKNOWN
+            record["error"] = r.get("error")
+        else:
+            record["status"] = FAILED
+            record["error"] = r.get("error")
+            # 마지막 시도 시각 기준으로 점점 길게 기다렸다가 재전송
+            record["retry_at"] = now.timestamp() + retry_delay(record["attempts"])
+    return deliveries
+
+
+def mark_pending(deliveries, chat_ids, now=None):
+    """전송 도중 중단되어 결과가 없는 수신자를 대기 상태로 기록 (시도 횟수는 그대로)
+
+    기록이 남아 있어야 다시 시작했을 때 이 수신자들에게 이어서 보냅니다.
+    """
+    timestamp = (now or datetime.now()).isoformat()
+    for chat_id in chat_ids:
+        deliveries.setdefault(str(chat_id), {"status": PENDING, "attempts": 0, "updated_at": timestamp})
+    return deliveries
+
+
+def mark_deferred(deliveries, deferred, now=None):
+    """방해 금지 시간이라 미룬 수신자 기록 {전송 시각 timestamp: 채팅 ID 리스트}"""
+    timestamp = (now or datetime.now()).isoformat()
+    for not_before, chat_ids in deferred.items():
+        for chat_id in chat_ids:
+            record = _writable(deliveries, str(chat_id), {"attempts": 0})
+            record.update(status=DEFERRED, not_before=not_before, updated_at=timestamp)
+    return deliveries
+
+
+def mark_dropped(deliveries, chat_ids, now=None):
+    """방해 금지 정책으로 보내지 않기로 한 수신자 기록"""
+    timestamp = (now or datetime.now()).isoformat()
+    for chat_id in chat_ids:
+        record = _writable(deliveries, str(chat_id), {"attempts": 0})
+        record.update(status=DROPPED, updated_at=timestamp)
+        record.pop("not_before", None)
+    return deliveries
+
+
+def _record(tx, schedule_id, results, chat_ids, now=None, pending=(), deferred=None, dropped=()):
+    schedule = tx.get(schedule_id)
+    if schedule is None:
+        return None
+    deliveries = apply_results(dict(schedule.get("deliveries", {})), results, now)
+    if pending:
+        mark_pending(deliveries, pending, now)
+    if deferred:
+        mark_deferred(deliveries, deferred, now)
+    if dropped:
+        mark_dropped(deliveries, dropped, now)
+    sent = not unserved_recipients({"deliveries": deliveries}, chat_ids)
+    return tx.update(schedule_id, deliveries=deliveries, sent=sent)
+
+
+def record_deliveries(store, schedule_id, results, chat_ids, now=None, pending=(), deferred=None, dropped=()):
+    """전송 결과를 저장소에 기록하고 sent 플래그를 다시 계산
+
+    chat_ids (현재 대상 수신자 전체) 가 모두 성공했거나 보내지 않기로 했을 때만 sent=True 가 됩니다.
+    pending 은 중단되어 결과가 없는 수신자 (mark_pending 참고),
+    deferred/dropped 는 방해 금지 시간으로 미루거나 뺀 수신자입니다.
+
+    Returns:
+        dict: 갱신된 스케줄 (스케줄이 없으면 None)
+    """
+    with store.transaction() as tx:
+        return _record(tx, schedule_id, results, chat_ids, now, pending, deferred, dropped)
+
+
+def record_many(store, entries, now=None):
+    """여러 스케줄의 전송 결과를 한 트랜잭션으로 기록
+
+    Args:
+        entries (iterable): record_deliveries 인자 dict
+            {"schedule_id", "results", "chat_ids", "deferred", "dropped"} 목록
+
+    Returns:
+        list: 갱신된 스케줄 (없어진 스케줄은 제외)
+    """
+    with store.transaction() as tx:
+        updated = (_record(tx, now=now, **entry) for entry in entries)
+        return [schedule for schedule in updated if schedule is not None]
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XMLTV/EPG 편성표에서 방송 스케줄 일괄 생성
+
+XMLTV 파일(.xml, .xml.gz)을 처음부터 끝까지 한 번 스트리밍으로 읽으면서
+채널/키워드/기간 조건에 맞는 프로그램만 스케줄로 만듭니다.
+    <channel id="KBS1.kr"><display-name>KBS1</display-name></channel>
+    <programme start="20250115200000 +0900" channel="KBS1.kr"><title lang="ko">뉴스 9</title></programme>
+
+- 처리한 요소는 바로 비워서 파일 크기와 관계없이 메모리 사용량이 일정
+- 스케줄 ID 는 직접 추가할 때와 같은 "{날짜}_{시간}_{채널}_{방송명}" 형식이라
+  같은 편성표를 다시 가져와도 중복되지 않음 (이미 있는 스케줄은 전송 상태를 유지)
+- batch_size 건씩 한 트랜잭션으로 저장
+
+사용 예:
+    python epg_import.py guide.xml.gz --channel KBS1 --channel MBC --keyword 뉴스 --days 7
+"""
+
+import argparse
+import gzip
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+import pytz
+
+from json_store import JsonStore, StoreError
+from segments import SegmentError, parse_audience
+from subscriptions import normalize_keyword
+
+KST = pytz.timezone('Asia/Seoul')
+
+# 한 트랜잭션으로 저장할 스케줄 수 (저장할 때마다 파일 전체를 다시 쓰므로 너무 작지 않게)
+DEFAULT_BATCH_SIZE = 5000
+
+
+class EpgError(ValueError):
+    """편성표 파일 형식 오류"""
+
+
+def default_message(channel, program_name):
+    return f"📺 {channel}에서 '{program_name}' 방송이 시작됩니다!"
+
+
+def parse_xmltv_time(value):
+    """XMLTV 시각("20250115200000 +0900") → 한국 시간 datetime (시간대가 없으면 한국 시간으로 간주)"""
+    parts = value.strip().split()
+    digits = parts[0] if parts else ""
+    try:
+        local = datetime.strptime(digits[:14].ljust(14, "0"), "%Y%m%d%H%M%S")
+    except ValueError:
+        raise EpgError(f"잘못된 시각입니다: {value!r}")
+    if len(parts) < 2:
+        return KST.localize(local)
+    offset = parts[1]
+    try:
+        sign = -1 if offset[0] == "-" else 1
+        minutes = sign * (int(offset[1:3]) * 60 + int(offset[3:5]))
+    except (ValueError, IndexError):
+        raise EpgError(f"잘못된 시간대입니다: {value!r}")
+    return (local - timedelta(minutes=minutes)).replace(tzinfo=pytz.utc).astimezone(KST)
+
+
+def _open(source):
+    """파일 경로 또는 바이너리 파일 객체를 열고, gzip 이면 풀어서 읽는 객체 반환"""
+    handle = open(source, 'rb') if isinstance(source, str) else source
+    head = handle.read(2)
+    handle.seek(0)
+    if head == b"\x1f\x8b":
+        return gzip.GzipFile(fileobj=handle)
+    return handle
+
+
+def _title(programme):
+    """한국어 제목 우선, 없으면 첫 번째 제목"""
+    titles = programme.findall("title")
+    for title in titles:
+        if title.get("lang", "").startswith("ko") and title.text:
+            return title.text.strip()
+    for title in titles:
+        if title.text:
+            return title.text.strip()
+    return ""
+
+
+def iter_programmes(source, channels=None, keywords=None, start=None, end=None):
+    """조건에 맞는 프로그램을 (한국 시간 시작 시각, 채널명, 방송명) 으로 하나씩 반환
+
+    Args:
+        source: XMLTV 파일 경로 또는 바이너리 파일 객체 (gzip 가능)
+        channels (iterable): 가져올 채널 (채널 ID 또는 표시 이름, None 이면 전체)
+        keywords (iterable): 방송명에 들어 있어야 할 키워드 (하나라도, None 이면 전체)
+        start, end (datetime): 시작 시각이 이 구간 [start, end) 에 드는 프로그램만
+
+    Raises:
+        EpgError: XML 형식 오류
+    """
+    wanted = set(channels or ())
+    keywords = [normalize_keyword(k) for k in keywords or () if k.strip()]
+    names = {}  # 채널 ID -> 표시 이름
+    handle = _open(source)
+    root = None
+    try:
+        for event, elem in ET.iterparse(handle, events=("start", "end")):
+            if root is None:
+                root = elem
+                continue
+            if event != "end":
+                continue
+            if elem.tag == "channel":
+                display = elem.findtext("display-name")
+                names[elem.get("id")] = (display or elem.get("id") or "").strip()
+            elif elem.tag == "programme":
+                channel_id = elem.get("channel")
+                channel = names.get(channel_id) or channel_id
+                if (not wanted or channel in wanted or channel_id in wanted) and elem.get("start"):
+                    program_name = _title(elem)
+                    folded = program_name.casefold()
+                    if program_name and (not keywords or any(k in folded for k in keywords)):
+                        begins = parse_xmltv_time(elem.get("start"))
+                        if (start is None or begins >= start) and (end is None or begins < end):
+                            yield begins, channel, program_name
+            else:
+                continue
+            # 처리가 끝난 최상위 요소는 루트에서 떼어내 메모리를 돌려줌
+            root.clear()
+    except ET.ParseError as e:
+        raise EpgError(f"XMLTV 파싱 실패: {e}")
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def build_schedule(begins, channel, program_name, message="", created_at=None):
+    """직접 추가할 때와 같은 형식의 스케줄 항목
+
+    message 에는 {channel}, {program_name}, {time} 자리표시자를 쓸 수 있습니다.
+    """
+    date = begins.strftime("%Y-%m-%d")
+    time_str = begins.strftime("%H:%M")
+    if message:
+        try:
+            message = message.format(channel=channel, program_name=program_name, time=time_str)
+        except (KeyError, IndexError, ValueError):
+            pass  # 자리표시자가 아닌 중괄호가 있으면 입력 그대로 사용
+    else:
+        message = default_message(channel, program_name)
+    return {
+        "id": f"{date}_{time_str}_{channel}_{program_name}",
+        "date": date,
+        "hour": begins.hour,
+        "minute": begins.minute,
+        "time": time_str,
+        "channel": channel,
+        "program_name": program_name,
+        "message": message,
+        "active": True,
+        "sent": False,
+        "created_at": created_at or datetime.now(KST).isoformat(),
+    }
+
+
+def import_epg(store, source, channels=None, keywords=None, start=None, end=None,
+               message="", audience="", batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """편성표를 읽어 스케줄 저장소에 추가/갱신
+
+    이미 있는 스케줄은 메시지와 대상 그룹만 갱신하고 활성/전송 상태와 전송 기록은 그대로 둡니다.
+
+    Args:
+        store (JsonStore): 스케줄 저장소
+        progress (callable): 배치를 저장할 때마다 progress(stats) 호출
+
+    Returns:
+        dict: {"added", "updated", "unchanged"} 건수
+
+    Raises:
+        EpgError: XML 형식 오류 (이미 저장한 배치는 유지)
+        StoreError: 저장 실패
+    """
+    stats = {"added": 0, "updated": 0, "unchanged": 0}
+    created_at = datetime.now(KST).isoformat()
+    batch = {}
+
+    def flush():
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        with store.transaction() as tx:
+            for item in batch.values():
+                existing = tx.get(item["id"])
+                if existing is None:
+                    tx.insert(item)
+                    counts["added"] += 1
+                    continue
+                fields = {"message": item["message"]}
+                if audience:
+                    fields["audience"] = audience
+                if any(existing.get(k) != v for k, v in fields.items()):
+                    tx.update(item["id"], **fields)
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+        for name, count in counts.items():
+            stats[name] += count
+        batch.clear()
+        if progress:
+            progress(dict(stats))
+
+    for begins, channel, program_name in iter_programmes(source, channels, keywords, start, end):
+        item = build_schedule(begins, channel, program_name, message, created_at)
+        if audience:
+            item["audience"] = audience
+        batch[item["id"]] = item
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XMLTV/EPG 편성표에서 방송 스케줄 일괄 생성")
+    parser.add_argument("source", help="XMLTV 파일 경로 (.xml 또는 .xml.gz)")
+    parser.add_argument("--channel", action="append", default=[], help="가져올 채널 (여러 번 지정 가능)")
+    parser.add_argument("--keyword", action="append", default=[], help="방송명 키워드 (여러 번 지정 가능)")
+    parser.add_argument("--days", type=int, default=7, help="지금부터 며칠 치를 가져올지")
+    parser.add_argument("--message", default="", help="메시지 형식 ({channel}, {program_name}, {time} 사용 가능)")
+    parser.add_argument("--audience", default="", help="대상 그룹 식")
+    parser.add_argument("--data-file", default="tv_schedules.json", help="스케줄 파일")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="한 번에 저장할 스케줄 수")
+    args = parser.parse_args(argv)
+
+    if args.audience:
+        try:
+            parse_audience(args.audience)
+        except SegmentError as e:
+            print(f"[ERROR] 대상 그룹 식 오류: {e}")
+            return 1
+
+    now = datetime.now(KST)
+    store = JsonStore(args.data_file, "schedules")
+    try:
+        stats = import_epg(
+            store, args.source, args.channel, args.keyword, now, now + timedelta(days=args.days),
+            args.message, args.audience, args.batch_size,
+            progress=lambda s: print(f"[INFO] 저장 중... 추가 {s['added']} / 갱신 {s['updated']} / 유지 {s['unchanged']}"),
+        )
+    except (EpgError, StoreError, OSError) as e:
+        print(f"[ERROR] 편성표 가져오기 실패: {e}")
+        return 1
+    print(f"[INFO] 편성표 가져오기 완료: 추가 {stats['added']}건, 갱신 {stats['updated']}건, 유지 {stats['unchanged']}건")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streamlit 앱과 스케줄 서비스가 함께 쓰는 JSON 파일 저장소
+
+- 락 파일을 이용한 프로세스 간 배타 잠금
+- 파일 전체의 version 과 항목별 rev 를 이용한 낙관적 버전 관리
+- 파일이 바뀐 경우에만 다시 읽고, 바뀐 항목만 구독자에게 알림
+"""
+
+import json
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# 새로 만드는 파일의 권한 (mkstemp 의 0600 대신 일반 파일처럼 umask 적용)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+DEFAULT_FILE_MODE = 0o666 & ~_UMASK
+
+
+def copy_file_mode(path, tmp_path):
+    """교체할 임시 파일에 기존 파일 권한을 복사 (없으면 기본 권한)
+
+    mkstemp 로 만든 임시 파일은 0600 이라 그대로 교체하면 앱과 서비스가 다른 사용자로 실행될 때
+    상대편이 파일을 읽지 못하게 됩니다.
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = DEFAULT_FILE_MODE
+    os.chmod(tmp_path, mode)
+
+
+class StoreError(Exception):
+    """저장소 읽기/쓰기 오류"""
+
+
+class ConflictError(StoreError):
+    """다른 프로세스가 먼저 같은 항목을 수정한 경우"""
+
+
+class FileLock:
+    """락 파일 기반 프로세스 간 배타 잠금 (같은 프로세스 안에서는 재진입 가능)"""
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                handle = open(self.path, 'a+')
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+                else:
+                    handle.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            continue  # LK_LOCK 은 10초 후 포기하므로 다시 시도
+                self._handle = handle
+            except Exception:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            handle, self._handle = self._handle, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                handle.close()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class Transaction:
+    """JsonStore.transaction() 안에서 사용하는 변경 도우미
+
+    저장소의 항목을 제자리에서 고치지 않고, 바꾸는 항목만 복사한 트랜잭션 전용 색인에서 변경합니다.
+    저장에 성공한 뒤에만 저장소에 반영되므로 다른 세션 스레드는 되돌려질 수 있는 변경을 보지 않습니다.
+    get()/items() 가 돌려주는 항목은 읽기 전용으로 다루고 변경은 update()/upsert() 로 하세요.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.touched = set()
+        self.removed = set()
+        self._index = dict(store._index)  # 키 -> 항목 (저장 순서 유지)
+        self._owned = set()  # 이 트랜잭션에서 복사했거나 추가한 항목의 키
+
+    def get(self, key):
+        return self._index.get(key)
+
+    def items(self):
+        return list(self._index.values())
+
+    def _writable(self, key):
+        """변경할 항목 (처음 바꿀 때 복사해서 저장소의 항목은 그대로 둠)"""
+        item = self._index.get(key)
+        if item is not None and key not in self._owned:
+            item = dict(item)
+            self._index[key] = item
+            self._owned.add(key)
+        return item
+
+    def insert(self, item):
+        """새 항목 추가 (같은 키가 있으면 ConflictError)"""
+        key = item[self.store.key]
+        if key in self._index:
+            raise ConflictError(f"이미 존재하는 항목입니다: {key}")
+        self._index[key] = item
+        self._owned.add(key)
+        self.touched.add(key)
+        self.removed.discard(key)
+        return item
+
+    def upsert(self, item, clear=()):
+        """항목이 있으면 필드를 갱신하고 (clear 의 필드는 지움), 없으면 추가"""
+        key = item[self.store.key]
+        existing = self._writable(key)
+        if existing is None:
+            return self.insert(item)
+        existing.update(item)
+        for field in clear:
+            existing.pop(field, None)
+        self.touched.add(key)
+        return existing
+
+    def update(self, key, expected_rev=None, **fields):
+        """항목의 일부 필드 갱신
+
+        Args:
+            key: 항목 키
+            expected_rev (int): 호출자가 읽은 rev (다르면 ConflictError)
+            **fields: 갱신할 필드
+
+        Returns:
+            dict: 갱신된 항목 (없으면 None)
+        """
+        item = self._index.get(key)
+        if item is None:
+            return None
+        if expected_rev is not None and item.get("rev", 0) != expected_rev:
+            raise ConflictError(f"다른 곳에서 먼저 수정된 항목입니다: {key}")
+        item = self._writable(key)
+        item.update(fields)
+        self.touched.add(key)
+        return item
+
+    def remove(self, key):
+        """항목 삭제 (삭제된 항목 반환, 없으면 None)"""
+        item = self._index.pop(key, None)
+        if item is None:
+            return None
+        self._owned.discard(key)
+        self.touched.discard(key)
+        self.removed.add(key)
+        return item
+
+    def remove_where(self, predicate):
+        """조건에 맞는 항목을 모두 삭제하고 삭제 개수 반환"""
+        targets = [key for key, item in self._index.items() if predicate(item)]
+        for key in targets:
+            self.remove(key)
+        return len(targets)
+
+    def replace_all(self, items):
+        """전체 항목 교체 (복원/초기화용)"""
+        self.remove_where(lambda item: True)
+        for item in items:
+            self.upsert(item)
+
+
+class JsonStore:
+    """{"<collection>": [...], "version": N} 형태의 JSON 파일 저장소"""
+    def __init__(self, data_file, collection, key="id"):
+        self.data_file = data_file
+        self.collection = collection
+        self.key = key
+        self.lock = FileLock(f"{data_file}.lock")
+        self.data = {collection: [], "version": 0}
+        self.version = 0
+        # 내용이 바뀔 때마다 1씩 늘어나는 값 (이 값을 키로 파생 데이터를 캐시)
+        self.generation = 0
+        self.last_error = None
+        self._index = {}
+        self._stat = None
+        self._listeners = []
+        self.refresh()
+
+    def subscribe(self, callback):
+        """변경 알림 등록: callback(changed_keys, removed_keys) (저장소 잠금을 잡은 채로 호출됨)"""
+        self._listeners.append(callback)
+
+    def items(self):
+        return self.data[self.collection]
+
+    def get(self, key):
+        return self._index.get(key)
+
+    def keys(self):
+        return self._index.keys()
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.data_file)
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def has_changed(self):
+        """디스크의 파일이 마지막으로 읽은 뒤 바뀌었는지 (stat 한 번으로 확인)"""
+        return self._file_stat() != self._stat
+
+    def _read(self):
+        if not os.path.exists(self.data_file):
+            return {self.collection: [], "version": 0}
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            raise StoreError(f"{self.data_file} 읽기 실패: {e}")
+        # 데이터 구조 검증 (빈 목록으로 바꾸면 다음 트랜잭션이 실제 데이터를 덮어쓰므로 오류로 처리)
+        if not isinstance(data, dict) or not isinstance(data.get(self.collection), list):
+            raise StoreError(f"{self.data_file} 형식 오류: '{self.collection}' 목록이 없습니다")
+        data.setdefault("version", 0)
+        return data
+
+    def refresh(self, force=False):
+        """파일이 바뀐 경우에만 다시 읽고 변경된 키를 알립니다
+
+        Returns:
+            tuple: (변경/추가된 키 집합, 삭제된 키 집합)
+        """
+        if not force and not self.has_changed():
+            return set(), set()
+
+        # 여러 스레드(Streamlit 세션)가 같은 저장소를 함께 쓰므로 반영까지 잠금 안에서
+        with self.lock:
+            stat = self._file_stat()
+            try:
+                data = self._read()
+            except StoreError as e:
+                # 기존 데이터를 유지하고 오류만 기록
+                self.last_error = str(e)
+                return set(), set()
+            self.last_error = None
+            return self._apply(data, stat)
+
+    def _apply(self, data, stat):
+        old_index = self._index
+        old_version = self.version
+        new_index = {item[self.key]: item for item in data[self.collection]}
+
+        # rev 가 믿을 만하면 정수 비교만, 아니면 (이전 형식/버전 역행) 내용 비교
+        rev_reliable = data.get("version", 0) >= old_version
+        changed = set()
+        for key, item in new_index.items():
+            old_item = old_index.get(key)
+            if old_item is None:
+                changed.add(key)
+            elif rev_reliable and "rev" in item:
+                if item["rev"] > old_version:
+                    changed.add(key)
+            elif old_item != item:
+                changed.add(key)
+        removed = set(old_index) - set(new_index)
+
+        self.data = data
+        self.version = data.get("version", 0)
+        self._index = new_index
+        self._stat = stat
+
+        if changed or removed:
+            self._notify(changed, removed)
+        return changed, removed
+
+    def _notify(self, changed, removed):
+        self.generation += 1
+        for callback in self._listeners:
+            try:
+                callback(changed, removed)
+            except Exception as e:
+                print(f"[ERROR] 저장소 변경 알림 실패: {e}")
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.data_file))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            copy_file_mode(self.data_file, tmp_path)
+            os.replace(tmp_path, self.data_file)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._stat = self._file_stat()
+
+    @contextmanager
+    def transaction(self):
+        """잠금을 잡고 최신 데이터 위에서 변경한 뒤 원자적으로 저장합니다
+
+        변경은 트랜잭션 안의 복사본에만 하고 저장에 성공했을 때 한꺼번에 반영하므로,
+        블록 안에서 예외가 나거나 저장에 실패하면 저장소는 그대로입니다.
+        """
+        with self.lock:
+            self.refresh()
+            if self.last_error:
+                raise StoreError(self.last_error)
+
+            tx = Transaction(self)
+            yield tx
+
+            if not tx.touched and not tx.removed:
+                return
+
+            new_version = self.version + 1
+            for key in tx.touched:
+                item = tx._index.get(key)
+                if item is not None:
+                    item["rev"] = new_version
+            data = dict(self.data)
+            data[self.collection] = list(tx._index.values())
+            data["version"] = new_version
+            self._write(data)
+            self.data = data
+            self._index = tx._index
+            self.version = new_version
+            # refresh() 와 같이 잠금 안에서 알림 (여러 세션 스레드가 구독자 색인을 동시에 고치지 않도록)
+            self._notify(tx.touched, tx.removed)
+
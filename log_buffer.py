@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+고정 크기 로그 링 버퍼
+
+서비스 로그를 최근 capacity 줄까지만 보관합니다 (추가/밀어내기 모두 O(1)).
+줄마다 늘어나는 번호를 붙여 두므로, 화면은 마지막으로 읽은 번호(커서) 이후의 새 줄만 가져갑니다.
+    buffer = LogBuffer(2000)
+    buffer.append("[ERROR] 전송 실패")
+    lines, cursor = buffer.since(0, levels={ERROR})
+    lines, cursor = buffer.since(cursor)  # 다음 새로고침 때는 새 줄만
+"""
+
+import threading
+from collections import Counter, deque, namedtuple
+from datetime import datetime
+from itertools import islice
+
+import pytz
+
+KST = pytz.timezone('Asia/Seoul')
+
+ERROR = "ERROR"
+WARNING = "WARNING"
+INFO = "INFO"
+LEVELS = (ERROR, WARNING, INFO)
+
+# 보관할 최대 줄 수 기본값
+DEFAULT_CAPACITY = 2000
+
+# 로그 한 줄: 번호, 받은 시각("HH:MM:SS"), 수준, 내용
+LogLine = namedtuple("LogLine", ["seq", "time", "level", "text"])
+
+_ERROR_TAGS = ("[ERROR]", "❌")
+_WARNING_TAGS = ("[WARNING]", "[STOP]", "⚠️")
+
+
+def detect_level(text):
+    """로그 내용의 태그로 수준 판별 ([ERROR]/❌ → ERROR, [WARNING]/[STOP]/⚠️ → WARNING, 나머지 INFO)"""
+    if any(tag in text for tag in _ERROR_TAGS):
+        return ERROR
+    if any(tag in text for tag in _WARNING_TAGS):
+        return WARNING
+    return INFO
+
+
+def format_line(line):
+    return f"[{line.time}] {line.text}"
+
+
+def _matches(line, levels, text):
+    if levels is not None and line.level not in levels:
+        return False
+    return not text or text in line.text.casefold()
+
+
+class LogBuffer:
+    """최근 로그 줄을 보관하는 스레드 안전 링 버퍼"""
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._lines = deque()
+        self._next_seq = 1
+        self._level_counts = Counter()  # 보관 중인 줄의 수준별 개수
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lines)
+
+    @property
+    def cursor(self):
+        """지금까지 추가된 마지막 줄 번호 (since() 에 넘기면 이후 새 줄만 받음)"""
+        return self._next_seq - 1
+
+    def append(self, text, level=None, timestamp=None):
+        """한 줄 추가 (가득 차면 가장 오래된 줄을 밀어냄)"""
+        text = text.rstrip("\r\n")
+        level = level or detect_level(text)
+        timestamp = timestamp or datetime.now(KST).strftime('%H:%M:%S')
+        with self._lock:
+            line = LogLine(self._next_seq, timestamp, level, text)
+            self._next_seq += 1
+            if len(self._lines) >= self.capacity:
+                evicted = self._lines.popleft()
+                self._level_counts[evicted.level] -= 1
+            self._lines.append(line)
+            self._level_counts[level] += 1
+        return line
+
+    def clear(self):
+        """보관 중인 줄을 모두 지움 (줄 번호는 이어서 붙임)"""
+        with self._lock:
+            self._lines.clear()
+            self._level_counts.clear()
+
+    def level_counts(self):
+        with self._lock:
+            return {level: self._level_counts.get(level, 0) for level in LEVELS}
+
+    def since(self, cursor, levels=None, text="", limit=None):
+        """cursor 번호 이후의 줄 중 조건에 맞는 것 (오래된 순)
+
+        Args:
+            cursor (int): 마지막으로 읽은 줄 번호 (0 이면 보관 중인 전체)
+            levels (iterable): 가져올 수준 (None 이면 전체)
+            text (str): 내용에 들어 있어야 할 문자열 (대소문자 무시)
+            limit (int): 최근 몇 줄까지만 (None 이면 전부)
+
+        Returns:
+            tuple: (LogLine 리스트, 새 커서)
+        """
+        levels = set(levels) if levels is not None else None
+        text = text.casefold()
+        with self._lock:
+            new_cursor = self._next_seq - 1
+            if not self._lines or cursor >= new_cursor:
+                return [], new_cursor
+            # 줄 번호가 연속이므로 커서 위치를 바로 계산해 새 줄만 훑음
+            start = max(0, cursor - self._lines[0].seq + 1)
+            lines = [line for line in self._slice(start) if _matches(line, levels, text)]
+        if limit is not None:
+            lines = lines[-limit:]
+        return lines, new_cursor
+
+    def _slice(self, start):
+        # 새 줄만 뒤에서부터 꺼냄 (deque 중간 인덱싱 없이 새 줄 수에 비례)
+        count = len(self._lines) - start
+        return list(islice(reversed(self._lines), count))[::-1]
+
+    def tail(self, count, levels=None, text=""):
+        """조건에 맞는 최근 count 줄"""
+        return self.since(0, levels, text, limit=count)[0]
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+대규모 수신자용 다중 프로세스 메시지 전송
+
+수신자를 chat_id 해시로 나눠 여러 작업 프로세스에서 전송합니다.
+- 작업 프로세스마다 자체 연결 풀(requests.Session)과 PrioritySendQueue 작업자 스레드 사용
+- 전송 속도는 앱/서비스와 같은 공유 속도 제한(send_rate.state)에서 각 프로세스가 시각을 몇 건씩 예약해 나눠 씀
+  (모든 프로세스 합계가 봇 한도를 넘지 않고, 서비스의 ALERT 대기 중에는 BULK 레인이 잠시 멈춤)
+- key(스케줄 회차)를 주면 전송 저널(delivery_journal.jsonl)로 이미 보낸 수신자를 건너뛰고 중복 전송을 막음
+- 결과는 원래 수신자 순서대로 하나의 리스트로 합쳐서 반환
+"""
+
+import multiprocessing
+import queue
+import threading
+import zlib
+
+import requests
+
+from delivery_journal import DeliveryJournal
+from send_queue import BULK, DEFAULT_RATE, PrioritySendQueue, RateLimiter
+
+# 결과를 부모 프로세스로 보낼 때 한 번에 묶는 개수
+RESULT_CHUNK_SIZE = 1000
+# 프로세스마다 동시에 진행할 요청 수
+DEFAULT_THREADS = 4
+
+
+def partition_of(chat_id, partitions):
+    """chat_id 를 프로세스 번호로 매핑 (프로세스/실행마다 같은 결과)"""
+    return zlib.crc32(str(chat_id).encode('utf-8')) % partitions
+
+
+def _fanout_worker(worker_id, bot_token, message, parse_mode, chat_ids, lane, rate, state_file,
+                   journal_file, key, threads, result_queue):
+    """작업 프로세스: 자기 몫의 수신자에게 전송하고 결과를 묶어서 보냄"""
+    from telegram_sender import TelegramSender
+
+    session = requests.Session()
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=threads))
+    sender = TelegramSender(bot_token, session=session)
+    journal = DeliveryJournal(journal_file) if key is not None else None
+    send_queue = PrioritySendQueue(sender, RateLimiter(rate, state_file), workers=threads, journal=journal)
+
+    chunk = []
+    chunk_lock = threading.Lock()
+
+    def flush():
+        nonlocal chunk
+        if chunk:
+            result_queue.put((worker_id, chunk))
+            chunk = []
+
+    def collect(batch, result):
+        with chunk_lock:
+            chunk.append(result)
+            if len(chunk) >= RESULT_CHUNK_SIZE:
+                flush()
+
+    try:
+        send_queue.submit(message, chat_ids, lane, parse_mode, on_result=collect, key=key).wait()
+        with chunk_lock:
+            flush()
+    finally:
+        send_queue.stop()
+        result_queue.put((worker_id, None))  # 종료 표시
+        session.close()
+
+
+def fan_out(bot_token, message, chat_ids, parse_mode="HTML", workers=None, lane=BULK, rate=DEFAULT_RATE,
+            state_file="send_rate.state", journal_file="delivery_journal.jsonl", key=None,
+            threads=DEFAULT_THREADS):
+    """수신자를 chat_id 해시로 나눠 여러 프로세스에서 전송
+
+    Args:
+        bot_token (str): 텔레그램 봇 토큰
+        message (str): 전송할 메시지
+        chat_ids (list): 채팅 ID 리스트
+        parse_mode (str): 메시지 파싱 모드
+        workers (int): 작업 프로세스 수 (None이면 CPU 수)
+        lane (str): 공유 속도 제한에서 쓸 레인 (기본 BULK)
+        rate (float): 전체 초당 전송 수 (다른 프로세스와 함께 쓰는 공유 한도)
+        state_file (str): 공유 속도 제한 상태 파일
+        journal_file (str): 전송 저널 파일 (key 를 줄 때만 사용)
+        key (str): 멱등성 키 접두어 (스케줄 회차, delivery_journal.occurrence_key)
+        threads (int): 프로세스마다 동시에 진행할 요청 수
+
+    Returns:
+        list: 각 전송 결과 리스트 (chat_ids 순서)
+    """
+    chat_ids = list(chat_ids)
+    if not chat_ids:
+        return []
+    workers = max(1, min(workers or multiprocessing.cpu_count(), len(chat_ids)))
+
+    partitions = [[] for _ in range(workers)]
+    for chat_id in chat_ids:
+        partitions[partition_of(chat_id, workers)].append(chat_id)
+
+    context = multiprocessing.get_context()
+    result_queue = context.Queue()
+    processes = [
+        context.Process(
+            target=_fanout_worker,
+            args=(i, bot_token, message, parse_mode, partition, lane, rate, state_file,
+                  journal_file, key, threads, result_queue),
+            daemon=True,
+        )
+        for i, partition in enumerate(partitions) if partition
+    ]
+
+    print(f"📤 {len(chat_ids)}명에게 {len(processes)}개 프로세스로 전송 시작 (공유 한도 초당 {rate:g}건)...")
+    for process in processes:
+        process.start()
+
+    results_by_id = {}
+    remaining = len(processes)
+    while remaining:
+        try:
+            worker_id, chunk = result_queue.get(timeout=1)
+        except queue.Empty:
+            # 결과 없이 죽은 프로세스가 있으면 남은 수신자는 실패로 처리
+            if all(not p.is_alive() for p in processes) and result_queue.empty():
+                break
+            continue
+        if chunk is None:
+            remaining -= 1
+            continue
+        for result in chunk:
+            results_by_id[result["chat_id"]] = result
+
+    for process in processes:
+        process.join(timeout=5)
+
+    results = [
+        results_by_id.get(chat_id) or {"chat_id": chat_id, "success": False, "error": "작업 프로세스 비정상 종료"}
+        for chat_id in chat_ids
+    ]
+    success_count = sum(1 for r in results if r["success"])
+    print(f"\n📊 전송 결과: {success_count}/{len(chat_ids)}명 성공")
+    return results
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+사용자별 시간대와 방해 금지 시간
+
+사용자 항목에 시간대와 방해 금지 시간을 둡니다 (없으면 한국 시간, 방해 금지 없음).
+    {"id": 6532057457, "name": "정재명", "active": true,
+     "timezone": "Europe/Berlin",
+     "quiet_hours": {"start": "23:00", "end": "07:00", "policy": "defer"}}
+
+policy
+- defer: 방해 금지 시간이 끝나는 시각에 보냄
+- drop:  이번 알림은 보내지 않음
+
+설정이 같은 사용자는 하나의 버킷(시간대, 시작, 끝, 정책)으로 묶어 두고, 전송 시점에는
+버킷마다 한 번만 현지 시각을 계산한 뒤 수신자는 버킷 조회만으로 분류합니다.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pytz
+
+DEFAULT_TIMEZONE = "Asia/Seoul"
+DEFER = "defer"
+DROP = "drop"
+POLICIES = (DEFER, DROP)
+
+# 전송 계획: 지금 보낼 수신자, {보낼 시각 timestamp: 수신자 리스트}, 이번에 보내지 않을 수신자
+DeliveryPlan = namedtuple("DeliveryPlan", ["now", "deferred", "dropped"])
+
+
+def parse_hhmm(value):
+    """"HH:MM" → 자정부터의 분 (형식 오류 시 ValueError)"""
+    hour, minute = value.split(":")
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"잘못된 시각입니다: {value}")
+    return hour * 60 + minute
+
+
+def get_timezone(name):
+    """시간대 이름 → pytz 시간대 (알 수 없는 이름이면 한국 시간)"""
+    try:
+        return pytz.timezone(name or DEFAULT_TIMEZONE)
+    except pytz.UnknownTimeZoneError:
+        return pytz.timezone(DEFAULT_TIMEZONE)
+
+
+def bucket_key(user):
+    """사용자의 방해 금지 버킷 키 (방해 금지 설정이 없거나 잘못되었으면 None)"""
+    quiet = user.get("quiet_hours")
+    if not quiet:
+        return None
+    try:
+        start, end = parse_hhmm(quiet["start"]), parse_hhmm(quiet["end"])
+    except (KeyError, ValueError, AttributeError):
+        return None
+    if start == end:
+        return None
+    policy = quiet.get("policy", DEFER)
+    if policy not in POLICIES:
+        policy = DEFER
+    return (user.get("timezone") or DEFAULT_TIMEZONE, start, end, policy)
+
+
+def quiet_until(key, now):
+    """버킷이 지금 방해 금지 중이면 끝나는 시각 timestamp, 아니면 None
+
+    Args:
+        key (tuple): bucket_key() 결과
+        now (datetime): 시간대 정보가 있는 현재 시각
+    """
+    timezone_name, start, end, _ = key
+    tz = get_timezone(timezone_name)
+    local = now.astimezone(tz)
+    minutes = local.hour * 60 + local.minute
+    if start < end:
+        quiet = start <= minutes < end
+    else:  # 자정을 넘기는 구간 (예: 23:00 ~ 07:00)
+        quiet = minutes >= start or minutes < end
+    if not quiet:
+        return None
+    end_local = local.replace(tzinfo=None, hour=end // 60, minute=end % 60, second=0, microsecond=0)
+    if end_local <= local.replace(tzinfo=None):
+        end_local += timedelta(days=1)
+    return tz.localize(end_local).timestamp()
+
+
+def describe(user):
+    """사용자 목록에 보여줄 방해 금지 요약 (설정이 없으면 빈 문자열)"""
+    key = bucket_key(user)
+    if key is None:
+        return ""
+    timezone_name, start, end, policy = key
+    action = "끝나면 전송" if policy == DEFER else "전송 안 함"
+    return f"{start // 60:02d}:{start % 60:02d}~{end // 60:02d}:{end % 60:02d} ({timezone_name}, {action})"
+
+
+class QuietHoursIndex:
+    """방해 금지 버킷별 사용자 집합 (사용자 변경 시 해당 사용자만 갱신)"""
+    def __init__(self):
+        self.buckets = {}     # 버킷 키 -> 사용자 ID 집합
+        self._user_bucket = {}  # 사용자 ID -> 버킷 키
+
+    def update(self, user):
+        user_id = user["id"]
+        self.remove(user_id)
+        key = bucket_key(user) if user.get("active") else None
+        if key is None:
+            return
+        self._user_bucket[user_id] = key
+        self.buckets.setdefault(key, set()).add(user_id)
+
+    def remove(self, user_id):
+        key = self._user_bucket.pop(user_id, None)
+        if key is None:
+            return
+        users = self.buckets.get(key)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self.buckets[key]
+
+    def plan(self, chat_ids, now):
+        """수신자를 지금 전송 / 나중에 전송 / 보내지 않음으로 분류
+
+        버킷마다 현지 시각을 한 번만 계산하고, 수신자별로는 버킷 조회만 합니다.
+        """
+        states = {key: quiet_until(key, now) for key in self.buckets}
+        send_now, deferred, dropped = [], {}, []
+        for chat_id in chat_ids:
+            key = self._user_bucket.get(chat_id)
+            until = states.get(key) if key is not None else None
+            if until is None:
+                send_now.append(chat_id)
+            elif key[3] == DROP:
+                dropped.append(chat_id)
+            else:
+                deferred.setdefault(until, []).append(chat_id)
+        return DeliveryPlan(send_now, deferred, dropped)
+
+    @classmethod
+    def from_users(cls, users):
+        index = cls()
+        for user in users:
+            index.update(user)
+        return index
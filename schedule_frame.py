@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스케줄 목록 열 기반 프레임 (pandas)
+
+스케줄 dict 리스트를 형이 정해진 DataFrame 으로 한 번 바꿔 두고 (날짜·시각은 datetime64,
+채널은 category, 활성/전송완료는 bool), 스케줄 목록 화면의 필터/검색/다중 키 정렬과
+채널·날짜별 집계를 행마다 파이썬 함수를 부르지 않고 열 단위 연산으로 처리합니다.
+    frame = build_frame(store.items())
+    result = query_frame(frame, "미전송", "채널순", "뉴스")
+    summarize(result, "channel")
+"""
+
+import pandas as pd
+
+# 스케줄 목록 필터: 이름 -> (열, 값) (전체는 거르지 않음)
+FILTERS = {
+    "활성": ("active", True),
+    "비활성": ("active", False),
+    "전송완료": ("sent", True),
+    "미전송": ("sent", False),
+}
+# 스케줄 목록 정렬: 이름 -> 정렬 열 (앞 열이 같으면 다음 열로)
+SORTS = {
+    "날짜순": ["at", "channel", "program_name"],
+    "시간순": ["time", "date", "channel"],
+    "채널순": ["channel", "at"],
+    "방송명순": ["program_name", "at"],
+}
+DEFAULT_SORT = "날짜순"
+# 집계 기준: 이름 -> 열
+GROUPS = {"채널별": "channel", "날짜별": "date"}
+
+COLUMNS = ["id", "date", "time", "at", "channel", "program_name", "audience",
+           "active", "sent", "has_deliveries", "search_text"]
+
+
+def build_frame(schedules):
+    """스케줄 dict 목록 → 형이 정해진 DataFrame (저장 순서 유지, 잘못된 날짜/시각은 at 이 NaT)"""
+    records = [
+        (
+            schedule["id"],
+            schedule.get("date", ""),
+            schedule.get("time", ""),
+            schedule.get("channel", ""),
+            schedule.get("program_name", ""),
+            schedule.get("audience", ""),
+            bool(schedule.get("active")),
+            bool(schedule.get("sent")),
+            bool(schedule.get("deliveries")),
+        )
+        for schedule in schedules
+    ]
+    frame = pd.DataFrame.from_records(
+        records,
+        columns=["id", "date", "time", "channel", "program_name", "audience",
+                 "active", "sent", "has_deliveries"],
+    )
+    # 스케줄이 없어도 같은 열 형을 갖도록 먼저 맞춤
+    frame = frame.astype({
+        "id": str, "date": str, "time": str, "channel": str, "program_name": str, "audience": str,
+        "active": bool, "sent": bool, "has_deliveries": bool,
+    })
+    frame["at"] = pd.to_datetime(frame["date"] + " " + frame["time"], format="%Y-%m-%d %H:%M", errors="coerce")
+    # 검색은 방송명/채널을 대소문자 무시로 찾으므로 미리 합쳐 둠
+    frame["search_text"] = (frame["program_name"] + "\n" + frame["channel"]).str.casefold()
+    frame["channel"] = frame["channel"].astype("category")
+    return frame[COLUMNS]
+
+
+def query_frame(frame, status="전체", sort=DEFAULT_SORT, search=""):
+    """필터/검색/정렬한 프레임 (행 번호는 0부터 다시 매김)"""
+    mask = pd.Series(True, index=frame.index)
+    if status in FILTERS:
+        column, value = FILTERS[status]
+        mask &= frame[column] == value
+    search = search.strip().casefold()
+    if search:
+        mask &= frame["search_text"].str.contains(search, regex=False)
+    result = frame[mask]
+    # 안정 정렬이라 키가 모두 같으면 저장 순서 유지, 날짜가 잘못된 스케줄은 맨 뒤
+    result = result.sort_values(SORTS.get(sort, SORTS[DEFAULT_SORT]), kind="stable", na_position="last")
+    return result.reset_index(drop=True)
+
+
+def summarize(frame, by="channel"):
+    """기준 열(channel/date)별 스케줄 수와 활성/전송완료/대기 수"""
+    counts = frame.assign(waiting=frame["active"] & ~frame["sent"]).groupby(by, observed=True).agg(
+        total=("id", "size"),
+        active=("active", "sum"),
+        sent=("sent", "sum"),
+        waiting=("waiting", "sum"),
+    )
+    return counts.sort_values("total", ascending=False, kind="stable") if by == "channel" else counts.sort_index()
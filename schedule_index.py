@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스케줄 집계 카운터와 날짜별 색인
+
+스케줄 저장소의 변경 알림을 받아 바뀐 스케줄만 반영하므로, 대시보드/설정 화면이 다시 그려질 때
+전체 스케줄을 훑지 않고 카운터 조회(O(1))와 해당 날짜 조회(O(날짜 수 + 그날 스케줄 수))로 끝납니다.
+    index = ScheduleIndex.from_schedules(store.items())
+    store.subscribe(lambda changed, removed: ...)  # index.update / index.remove
+
+여러 세션 스레드가 함께 쓰므로 갱신과 조회는 색인 자체 잠금 안에서 합니다.
+"""
+
+import threading
+
+
+class ScheduleIndex:
+    """활성/전송완료 카운터와 날짜 -> 스케줄 ID 색인 (스케줄 변경 시 해당 스케줄만 갱신)"""
+    def __init__(self):
+        self.total = 0
+        self.active = 0
+        self.sent = 0
+        self.waiting = 0      # 활성이면서 아직 전송하지 않은 스케줄
+        self.by_date = {}     # "YYYY-MM-DD" -> 스케줄 ID 집합
+        self._entries = {}    # 스케줄 ID -> (날짜, 활성, 전송완료)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.total
+
+    def _count(self, entry, sign):
+        _, active, sent = entry
+        self.total += sign
+        self.active += sign if active else 0
+        self.sent += sign if sent else 0
+        self.waiting += sign if active and not sent else 0
+
+    def update(self, schedule):
+        """스케줄 추가/변경 반영"""
+        schedule_id = schedule["id"]
+        entry = (schedule.get("date", ""), bool(schedule.get("active")), bool(schedule.get("sent")))
+        with self._lock:
+            old = self._entries.get(schedule_id)
+            if old == entry:
+                return
+            if old is not None:
+                self.remove(schedule_id)
+            self._entries[schedule_id] = entry
+            self._count(entry, 1)
+            self.by_date.setdefault(entry[0], set()).add(schedule_id)
+
+    def remove(self, schedule_id):
+        with self._lock:
+            entry = self._entries.pop(schedule_id, None)
+            if entry is None:
+                return
+            self._count(entry, -1)
+            ids = self.by_date.get(entry[0])
+            if ids is not None:
+                ids.discard(schedule_id)
+                if not ids:
+                    del self.by_date[entry[0]]
+
+    def on_date(self, date):
+        """그날 스케줄 ID 튜플 (date 는 date 객체 또는 "YYYY-MM-DD")"""
+        key = date if isinstance(date, str) else date.strftime("%Y-%m-%d")
+        with self._lock:
+            return tuple(self.by_date.get(key, ()))
+
+    def counts(self):
+        with self._lock:
+            return {"total": self.total, "active": self.active, "sent": self.sent, "waiting": self.waiting}
+
+    @classmethod
+    def from_schedules(cls, schedules):
+        index = cls()
+        for schedule in schedules:
+            index.update(schedule)
+        return index
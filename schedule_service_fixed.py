@@ -10,6 +10,7 @@ import json
 import os
 from datetime import datetime
 from telegram_sender import TelegramSender
+from delivery_journal import occurrence_key
 
 
 class UserManager:
@@ -86,7 +87,8 @@ class ScheduleService:
                     if active_users:
                         results = self.telegram_sender.send_message_to_multiple(
                             schedule_item["message"], 
-                            active_users
+                            active_users,
+                            key=occurrence_key(schedule_item)
                         )
                         
                         success_count = sum(1 for r in results if r["success"])
@@ -4,72 +4,215 @@
 TV 방송 스케줄 백그라운드 서비스 (서버용 - schedule 라이브러리 없이)
 """
 
+import argparse
 import time
-import json
 import os
+import signal
 import threading
 from datetime import datetime
 from telegram_sender import TelegramSender
+from json_store import JsonStore, StoreError
+from delivery_state import (
+    record_deliveries, retryable_recipients, unserved_recipients, delivery_counts,
+    deferred_due, next_deferred_time, DONE_STATUSES, PENDING
+)
+from service_metrics import ServiceMetrics, MetricsServer
+from send_queue import PrioritySendQueue, RateLimiter, ALERT, REMINDER
+from delivery_journal import DeliveryJournal, occurrence_key
+from subscriptions import SubscriptionIndex
+from segments import SegmentIndex, SegmentError
+from quiet_hours import QuietHoursIndex
+from service_log import DEFAULT_LOG_FILE, DEFAULT_MAX_BYTES, DEFAULT_BACKUP_COUNT, install_log_file
 import pytz
 
 # 한국 시간대 설정
 KST = pytz.timezone('Asia/Seoul')
 
+# 일부 수신자 전송 실패 시 실패한 수신자에게만 다시 보내는 기간 (초)
+RETRY_WINDOW_SECONDS = 30 * 60
+
+# 전송 중 진행 상황을 저장하는 간격 (초)
+CHECKPOINT_INTERVAL = 5
+# 종료 요청 후 진행 중인 전송을 마저 보내는 최대 시간 (초, 남은 수신자는 다음 시작 때 이어서 전송)
+SHUTDOWN_TIMEOUT = float(os.environ.get("SHUTDOWN_TIMEOUT", "40"))
+# 종료 시한이 지나 취소한 뒤 이미 보내는 중인 요청을 기다리는 시간 (초)
+IN_FLIGHT_GRACE = 5
+# 채널/방송명별로 기억해 두는 구독 수신자 목록 수 (넘으면 비우고 다시 채움)
+RECIPIENT_CACHE_SIZE = 1024
+
 def get_korean_time():
     """한국 시간을 반환"""
     return datetime.now(KST)
 
 
+def parse_schedule_time(schedule_item):
+    """스케줄의 날짜/시간을 한국 시간 datetime 으로 변환 (형식 오류 시 ValueError)"""
+    schedule_datetime = datetime.strptime(
+        f"{schedule_item['date']} {schedule_item['time']}", 
+        "%Y-%m-%d %H:%M"
+    )
+    return KST.localize(schedule_datetime)
+
+
 class UserManager:
+    """서비스용 사용자 캐시 (users.json 이 바뀐 경우에만 다시 읽음)"""
     def __init__(self, data_file="users.json"):
         self.data_file = data_file
-        self.users = self.load_users()
+        self.store = JsonStore(data_file, "users")
+        # 전송에 바로 쓸 수 있는 활성 사용자 ID 배열 (변경 시에만 다시 만듦)
+        self._active = {}
+        self.active_ids = ()
+        # 활성 사용자의 채널/키워드 구독 역색인
+        self.subscriptions = SubscriptionIndex()
+        # 이름 붙은 그룹 비트맵 (스케줄의 audience 식 계산용)
+        self.segments = SegmentIndex()
+        # 시간대/방해 금지 설정이 같은 사용자 버킷
+        self.quiet_hours = QuietHoursIndex()
+        # 색인 버전 (사용자가 바뀔 때마다 증가) 과 (채널, 방송명) -> (버전, 정렬된 구독 수신자)
+        self.version = 0
+        self._recipients = {}
+        self.store.subscribe(self._on_users_changed)
+        self._on_users_changed(list(self.store.keys()), ())
+    
+    @property
+    def users(self):
+        return self.store.data
+    
+    def _on_users_changed(self, changed, removed):
+        for user_id in removed:
+            self._active.pop(user_id, None)
+            self.subscriptions.remove(user_id)
+            self.segments.remove(user_id)
+            self.quiet_hours.remove(user_id)
+        for user_id in changed:
+            user = self.store.get(user_id)
+            if user is not None and user.get("active"):
+                self._active[user_id] = None
+                self.subscriptions.update(user)
+            else:
+                self._active.pop(user_id, None)
+                self.subscriptions.remove(user_id)
+            if user is not None:
+                self.segments.update(user)
+                self.quiet_hours.update(user)
+            else:
+                self.segments.remove(user_id)
+                self.quiet_hours.remove(user_id)
+        self.active_ids = tuple(self._active)
+        self.version += 1
+        self._recipients = {}
     
     def load_users(self):
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return {"users": []}
-        return {"users": []}
+        """파일이 바뀌었으면 바뀐 사용자만 반영 (변경 여부 반환)"""
+        changed, removed = self.store.refresh()
+        if self.store.last_error:
+            print(f"[ERROR] 사용자 데이터 로드 실패: {self.store.last_error}")
+        elif changed or removed:
+            print(f"[INFO] 사용자 변경 감지: 변경 {len(changed)}명, 삭제 {len(removed)}명 (활성 {len(self.active_ids)}명)")
+        return bool(changed or removed)
     
     def get_active_user_ids(self):
-        return [user["id"] for user in self.users["users"] if user["active"]]
+        return self.active_ids
+    
+    def get_recipients(self, schedule_item):
+        """이 방송을 받을 활성 사용자 ID 리스트
+        
+        스케줄에 audience 식이 있으면 그룹 식 결과, 없으면 채널/키워드 구독자
+        (역색인 집합 연산, 순서는 ID 기준으로 고정). 식 문법 오류 시 SegmentError.
+        구독자 목록은 사용자가 바뀔 때까지 (채널, 방송명) 별로 재사용하므로 고치지 말 것.
+        """
+        if schedule_item.get("audience"):
+            return list(self.segments.resolve(schedule_item["audience"]))
+        key = (schedule_item.get("channel"), schedule_item.get("program_name", "").casefold())
+        version = self.version
+        cached = self._recipients.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        recipients = sorted(self.subscriptions.recipients(schedule_item), key=str)
+        if len(self._recipients) >= RECIPIENT_CACHE_SIZE:
+            self._recipients = {}
+        self._recipients[key] = (version, recipients)
+        return recipients
+    
+    def plan_delivery(self, chat_ids, now):
+        """방해 금지 설정에 따라 지금 전송 / 나중에 전송 / 전송 안 함으로 분류 (DeliveryPlan)"""
+        return self.quiet_hours.plan(chat_ids, now)
 
 
 class ScheduleService:
-    def __init__(self):
+    def __init__(self, clock=None, data_file="tv_schedules.json", users_file="users.json",
+                 journal_file="delivery_journal.jsonl"):
+        """
+        Args:
+            clock (callable): 현재 한국 시간을 돌려주는 함수 (기본 get_korean_time, 시뮬레이션은 가상 시계)
+            data_file, users_file, journal_file: 스케줄/사용자/전송 저널 파일 (시뮬레이션은 임시 폴더의 복사본)
+        """
+        self.clock = clock or get_korean_time
         self.telegram_sender = TelegramSender()
-        self.user_manager = UserManager()
-        self.data_file = "tv_schedules.json"
+        self.user_manager = UserManager(users_file)
+        self.data_file = data_file
+        self.store = JsonStore(self.data_file, "schedules")
+        # 수신자별 멱등성 키 저널 (전송 후 저장 전 비정상 종료, 중복 실행 시 재전송 방지)
+        self.journal = DeliveryJournal(journal_file)
         self.running = False
         self.check_thread = None
+        self.stop_deadline = None
+        self._wake = threading.Event()
+        
+        # 지표 (METRICS_PORT=0 이면 HTTP 엔드포인트 비활성화)
+        self.metrics = ServiceMetrics()
+        self.metrics_file = os.environ.get("METRICS_FILE", "service_metrics.json")
+        self.metrics_port = int(os.environ.get("METRICS_PORT", "9108"))
+        self.metrics_server = None
+        self._send_queue = None
+    
+    @property
+    def send_queue(self):
+        """우선순위 레인 전송 대기열 (처음 사용할 때 생성, 속도 제한은 다른 프로세스와 공유)"""
+        if self._send_queue is None:
+            self._send_queue = PrioritySendQueue(self.telegram_sender, RateLimiter(), journal=self.journal)
+        return self._send_queue
+    
+    @send_queue.setter
+    def send_queue(self, queue):
+        self._send_queue = queue
     
     def load_schedules(self):
-        """스케줄 데이터 로드"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return {"schedules": []}
-        return {"schedules": []}
-    
-    def save_schedules(self, schedules):
-        """스케줄 데이터 저장"""
+        """스케줄 데이터 로드 (파일이 바뀐 경우에만 다시 읽음)"""
+        changed, removed = self.store.refresh()
+        if self.store.last_error:
+            print(f"[ERROR] 스케줄 로드 실패: {self.store.last_error}")
+        elif changed or removed:
+            print(f"[INFO] 스케줄 변경 감지: 변경 {len(changed)}개, 삭제 {len(removed)}개 (버전 {self.store.version})")
+        return self.store.data
+    
+    def record_results(self, schedule_id, results, chat_ids, pending=(), deferred=None, dropped=()):
+        """다른 프로세스의 변경을 덮어쓰지 않도록 해당 스케줄의 전송 기록만 갱신"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(schedules, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
+            return record_deliveries(
+                self.store, schedule_id, results, chat_ids, self.clock(), pending, deferred, dropped
+            )
+        except (StoreError, OSError) as e:
             print(f"[ERROR] 스케줄 저장 실패: {e}")
-            return False
+            return None
     
     def check_and_send_messages(self):
-        """현재 시간에 맞는 메시지들을 확인하고 전송"""
+        """현재 시간에 맞는 메시지들을 확인하고 전송 (체크 소요 시간 등 지표 기록)"""
+        tick_start = time.perf_counter()
+        stats = {"scanned": 0, "pending": 0, "overdue": 0, "pending_recipients": 0}
+        ok = False
+        try:
+            self._check_and_send_messages(stats)
+            ok = self.store.last_error is None
+        finally:
+            self.metrics.record_tick(time.perf_counter() - tick_start, ok=ok, **stats)
+            if self.metrics_file:
+                self.metrics.write_file(self.metrics_file)
+    
+    def _check_and_send_messages(self, stats):
         schedules = self.load_schedules()
-        current_time = get_korean_time()
+        self.user_manager.load_users()
+        current_time = self.clock()
         
         print(f"[INFO] 스케줄 확인 중... 현재 시간: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"[INFO] 총 스케줄 수: {len(schedules['schedules'])}")
@@ -77,77 +220,174 @@ class ScheduleService:
         active_schedules = [s for s in schedules["schedules"] if s["active"] and not s["sent"]]
         print(f"[INFO] 활성 스케줄 수: {len(active_schedules)}")
         
-        for i, schedule_item in enumerate(schedules["schedules"]):
+        submitted = []
+        for i, schedule_item in enumerate(list(schedules["schedules"])):
             print(f"\n--- 스케줄 {i+1}: {schedule_item['program_name']} ---")
             print(f"📅 날짜: {schedule_item['date']}")
             print(f"[INFO] 시간: {schedule_item['time']}")
             print(f"[INFO] 활성화: {schedule_item['active']}")
             print(f"[INFO] 전송완료: {schedule_item['sent']}")
+            stats["scanned"] += 1
             
             if not schedule_item["active"] or schedule_item["sent"]:
                 print("[SKIP] 건너뜀 (비활성화 또는 전송완료)")
                 continue
             
             try:
-                # 스케줄 시간 파싱
-                schedule_datetime = datetime.strptime(
-                    f"{schedule_item['date']} {schedule_item['time']}", 
-                    "%Y-%m-%d %H:%M"
-                )
-                
-                # 한국 시간대로 변환
-                schedule_datetime = KST.localize(schedule_datetime)
+                # 스케줄 시간 파싱 (한국 시간대)
+                schedule_datetime = parse_schedule_time(schedule_item)
                 
                 print(f"📅 스케줄 시간: {schedule_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
                 
                 # 현재 시간과 비교 (1분 오차 허용)
-                time_diff = abs((current_time - schedule_datetime).total_seconds())
+                elapsed = (current_time - schedule_datetime).total_seconds()
+                time_diff = abs(elapsed)
                 print(f"[INFO] 시간 차이: {time_diff:.0f}초")
                 
-                if time_diff <= 60:  # 1분 이내
-                    print(f"[SEND] 전송 조건 만족! 방송 알림 전송 시작...")
-                    print(f"[INFO] 방송명: {schedule_item['program_name']}")
-                    print(f"[INFO] 채널: {schedule_item['channel']}")
+                if elapsed > 0:
+                    stats["overdue"] += 1
+                else:
+                    stats["pending"] += 1
+                if schedule_item.get("deliveries"):
+                    counts = delivery_counts(schedule_item)
+                    stats["pending_recipients"] += sum(n for status, n in counts.items() if status not in DONE_STATUSES)
+                
+                # 이미 한 번 전송했는데 실패한 수신자가 남아 있으면 그 수신자에게만 재전송 (retry_at 이 된 수신자만)
+                is_retry = bool(schedule_item.get("deliveries")) and 60 < elapsed <= RETRY_WINDOW_SECONDS
+                in_window = time_diff <= 60 or is_retry
+                # 방해 금지 시간으로 미뤄 둔 수신자는 재시도 기간과 관계없이 그 시각이 되면 전송
+                deferred_at = next_deferred_time(schedule_item) if schedule_item.get("deliveries") else None
+                deferred_ready = deferred_at is not None and deferred_at <= current_time.timestamp()
+                
+                if in_window or deferred_ready:  # 1분 이내, 재시도 기간 또는 미룬 전송 시각
+                    if not self.running and self.stop_deadline is not None:
+                        print("[STOP] 종료 중이라 새 전송을 시작하지 않습니다 (다음 시작 때 전송)")
+                        continue
                     
-                    # 메시지 전송
                     active_users = self.user_manager.get_active_user_ids()
-                    print(f"👥 활성 사용자: {active_users}")
+                    if not active_users:
+                        print("[WARNING] 활성 사용자가 없습니다.")
+                        continue
+                    
+                    # 이 방송의 채널/프로그램을 구독한 사용자만 대상
+                    targets = self.user_manager.get_recipients(schedule_item)
+                    if not targets:
+                        print("[SKIP] 이 방송을 구독한 사용자가 없습니다.")
+                        self.record_results(schedule_item["id"], [], targets)
+                        continue
+                    
+                    if not unserved_recipients(schedule_item, targets):
+                        # 남은 수신자가 없으면 (예: 실패한 사용자가 비활성화됨) 완료 처리
+                        self.record_results(schedule_item["id"], [], targets)
+                        continue
                     
-                    if active_users:
-                        results = self.telegram_sender.send_message_to_multiple(
-                            schedule_item["message"], 
-                            active_users
+                    recipients = (
+                        retryable_recipients(schedule_item, targets, now_ts=current_time.timestamp())
+                        if in_window else []
+                    )
+                    if deferred_ready:
+                        recipients += deferred_due(schedule_item, targets, current_time.timestamp())
+                    if not recipients:
+                        if not is_retry and not deferred_ready and deferred_at is None:
+                            print("[WARNING] 재시도 횟수를 모두 사용한 수신자만 남았습니다.")
+                        continue
+                    
+                    # 방해 금지 시간인 수신자는 정책에 따라 미루거나 이번 알림에서 뺌
+                    plan = self.user_manager.plan_delivery(recipients, current_time)
+                    if plan.deferred or plan.dropped:
+                        deferred_count = sum(len(ids) for ids in plan.deferred.values())
+                        print(f"[QUIET] 방해 금지 시간: {deferred_count}명 나중에 전송, {len(plan.dropped)}명 전송 안 함")
+                        self.record_results(
+                            schedule_item["id"], [], targets, deferred=plan.deferred, dropped=plan.dropped
                         )
-                        
-                        success_count = sum(1 for r in results if r["success"])
-                        print(f"[SUCCESS] 전송 완료: {success_count}/{len(active_users)}명")
-                        
-                        # 전송 완료 표시
-                        schedule_item["sent"] = True
-                        self.save_schedules(schedules)
-                        print("💾 스케줄 상태 업데이트 완료")
+                    recipients = plan.now
+                    if not recipients:
+                        continue
+                    
+                    # 종료로 중단된 전송은 재시도가 아니라 원래 알림으로 이어서 보냄
+                    resumed = is_retry and delivery_counts(schedule_item)[PENDING] > 0
+                    if resumed:
+                        print(f"[RESUME] 중단된 전송 이어서 {len(recipients)}명에게 전송...")
+                        is_retry = False
+                    elif is_retry:
+                        print(f"[RETRY] 실패한 수신자 {len(recipients)}명에게 재전송...")
                     else:
-                        print("[WARNING] 활성 사용자가 없습니다.")
+                        print(f"[SEND] 전송 조건 만족! 방송 알림 전송 시작...")
+                    print(f"[INFO] 방송명: {schedule_item['program_name']}")
+                    print(f"[INFO] 채널: {schedule_item['channel']}")
+                    print(f"👥 전송 대상: {len(recipients)}명")
+                    
+                    # 메시지 전송 (아직 받지 못한 수신자만, 같은 시각 스케줄은 함께 전송)
+                    lane = REMINDER if is_retry else ALERT
+                    batch = self.send_queue.submit(
+                        schedule_item["message"], recipients, lane, key=occurrence_key(schedule_item)
+                    )
+                    submitted.append((schedule_item, schedule_datetime, targets, is_retry, batch))
                 else:
                     print(f"[WAIT] 아직 시간이 안됨 (차이: {time_diff:.0f}초)")
                         
+            except SegmentError as e:
+                print(f"[ERROR] 대상 그룹 식 오류 ({schedule_item.get('audience')}): {e}")
+                continue
             except ValueError as e:
                 print(f"[ERROR] 스케줄 시간 파싱 오류: {e}")
                 continue
             except Exception as e:
                 print(f"[ERROR] 예상치 못한 오류: {e}")
                 continue
+        
+        for schedule_item, schedule_datetime, targets, is_retry, batch in submitted:
+            self._finish_broadcast(schedule_item, schedule_datetime, targets, is_retry, batch)
+    
+    def _finish_broadcast(self, schedule_item, schedule_datetime, targets, is_retry, batch):
+        """전송 완료를 기다렸다가 지표와 수신자별 전송 기록 저장
+        
+        기다리는 동안 CHECKPOINT_INTERVAL 마다 진행 상황을 저장하고, 종료 시한이 지나면
+        남은 수신자 전송을 취소한 뒤 대기 상태로 기록해 다음 시작 때 이어서 보냅니다.
+        """
+        schedule_id = schedule_item["id"]
+        give_up_at = None
+        while not batch.done():
+            if self.stop_deadline is not None and not batch.cancelled and time.time() >= self.stop_deadline:
+                print(f"[STOP] 종료 시한 초과: {schedule_item['program_name']} 남은 {batch.remaining}명 전송 취소")
+                batch.cancel()
+                give_up_at = time.time() + IN_FLIGHT_GRACE
+            if give_up_at is not None and time.time() >= give_up_at:
+                break
+            batch.wait(CHECKPOINT_INTERVAL if self.stop_deadline is None else 0.5)
+            if batch.done():
+                break
+            new_results, _ = batch.checkpoint()
+            if new_results:
+                self.record_results(schedule_id, new_results, targets)
+        
+        new_results, unfinished = batch.checkpoint()
+        fire_lag = batch.started_at - schedule_datetime.timestamp() if batch.started_at else 0.0
+        completion_lag = (batch.finished_at or time.time()) - schedule_datetime.timestamp()
+        
+        success_count = batch.sent
+        if unfinished:
+            print(f"[STOP] 전송 중단: {schedule_item['program_name']} {success_count}/{len(batch.chat_ids)}명 "
+                  f"(남은 {len(unfinished)}명은 다음 시작 때 전송)")
+        else:
+            print(f"[SUCCESS] 전송 완료: {schedule_item['program_name']} {success_count}/{len(batch.chat_ids)}명")
+        print(f"[INFO] 전송 지연: 시작 {fire_lag:.1f}초, 마지막 수신자 {completion_lag:.1f}초")
+        self.metrics.record_broadcast(fire_lag, completion_lag, success_count, batch.failed, retry=is_retry)
+        
+        # 수신자별 전송 기록 (모두 성공했을 때만 전송완료)
+        updated = self.record_results(schedule_id, new_results, targets, pending=unfinished)
+        if updated is not None:
+            print(f"💾 스케줄 상태 업데이트 완료 (전송완료: {updated['sent']})")
     
     def schedule_checker(self):
         """스케줄 체크를 위한 백그라운드 스레드"""
         while self.running:
             try:
                 self.check_and_send_messages()
-                # 60초 대기 (매분 체크)
-                time.sleep(60)
             except Exception as e:
-                print(f"[ERROR] 스케줄 체크 오류: {e}")
-                time.sleep(60)  # 오류 발생 시에도 계속 실행
+                print(f"[ERROR] 스케줄 체크 오류: {e}")  # 오류 발생 시에도 계속 실행
+            # 60초 대기 (매분 체크, 종료 요청 시 바로 깨어남)
+            self._wake.wait(60)
     
     def start_service(self):
         """서비스 시작"""
@@ -156,33 +396,106 @@ class ScheduleService:
         
         self.running = True
         
+        try:
+            kept = self.journal.compact()
+            print(f"[INFO] 전송 저널 정리 완료 (기록 {kept}건 유지)")
+        except OSError as e:
+            print(f"[WARNING] 전송 저널 정리 실패: {e}")
+        
+        if self.metrics_port:
+            try:
+                self.metrics_server = MetricsServer(self.metrics, self.metrics_port)
+                self.metrics_server.start()
+            except OSError as e:
+                print(f"[WARNING] 지표 엔드포인트 시작 실패 (포트 {self.metrics_port}): {e}")
+                self.metrics_server = None
+        
         # 백그라운드 스레드 시작
         self.check_thread = threading.Thread(target=self.schedule_checker, daemon=True)
         self.check_thread.start()
         
+        self._install_signal_handlers()
+        
         # 메인 스레드는 대기
         try:
             while self.running:
-                time.sleep(1)
+                self._wake.wait(1)
         except KeyboardInterrupt:
-            self.stop_service()
+            pass
+        self.stop_service()
     
-    def stop_service(self):
-        """서비스 중지"""
-        print("[STOP] TV 방송 스케줄 서비스 중지...")
+    def _install_signal_handlers(self):
+        """SIGTERM/SIGINT (Windows 는 Ctrl+Break 도) 를 받으면 정상 종료 절차 시작"""
+        def handle(signum, frame):
+            print(f"[STOP] 종료 신호 수신 ({signal.Signals(signum).name})")
+            self.request_stop()
+        
+        for name in ("SIGTERM", "SIGINT", "SIGBREAK"):
+            signum = getattr(signal, name, None)
+            if signum is None:
+                continue
+            try:
+                signal.signal(signum, handle)
+            except ValueError:
+                return  # 메인 스레드가 아니면 신호 처리기를 등록할 수 없음
+    
+    def request_stop(self, timeout=None):
+        """새 전송을 멈추고 진행 중인 전송은 timeout 초 안에 마무리하도록 요청"""
+        if self.stop_deadline is None:
+            self.stop_deadline = time.time() + (SHUTDOWN_TIMEOUT if timeout is None else timeout)
         self.running = False
+        self._wake.set()
+    
+    def stop_service(self, timeout=None):
+        """서비스 중지 (진행 중인 전송을 마저 보내거나 남은 수신자를 저장한 뒤 종료)"""
+        print("[STOP] TV 방송 스케줄 서비스 중지...")
+        self.request_stop(timeout)
         if self.check_thread:
-            self.check_thread.join(timeout=5)
+            remaining = self.stop_deadline - time.time() + IN_FLIGHT_GRACE + CHECKPOINT_INTERVAL
+            self.check_thread.join(timeout=max(remaining, 1))
+            if self.check_thread.is_alive():
+                print("[WARNING] 스케줄 체크 스레드가 제때 끝나지 않았습니다.")
+            self.check_thread = None
+        if self._send_queue is not None:
+            self._send_queue.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        print("[STOP] 서비스 중지 완료")
 
 
 def main():
     """메인 함수"""
+    parser = argparse.ArgumentParser(description="TV 방송 스케줄 백그라운드 서비스")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="asyncio 단일 이벤트 루프 모드로 실행")
+    parser.add_argument("--simulate", metavar="DATE", nargs="+",
+                        help="가상 시계로 DATE(YYYY-MM-DD[ HH:MM]) 부터 하루(또는 두 번째 값까지)의 스케줄을 "
+                             "모의 전송기로 빠르게 재생하고 보고서 출력 (실제 데이터는 바꾸지 않음)")
+    parser.add_argument("--log-file", default=DEFAULT_LOG_FILE,
+                        help="콘솔 출력과 함께 쓸 로그 파일 (크기가 넘으면 교체, 빈 값이면 쓰지 않음)")
+    parser.add_argument("--log-max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="로그 파일 하나의 최대 크기")
+    parser.add_argument("--log-backups", type=int, default=DEFAULT_BACKUP_COUNT, help="남겨 둘 이전 로그 파일 수")
+    args, extra = parser.parse_known_args()
+    
+    if args.simulate:
+        from service_simulation import main as simulate
+        raise SystemExit(simulate(args.simulate + extra))
+    if extra:
+        parser.error(f"알 수 없는 인자: {' '.join(extra)}")
+    
+    if args.log_file:
+        install_log_file(args.log_file, args.log_max_bytes, args.log_backups)
+    
+    if args.use_async:
+        from async_service import run_async_service
+        run_async_service()
+        return
+    
     service = ScheduleService()
     
     try:
         service.start_service()
-    except KeyboardInterrupt:
-        service.stop_service()
     except Exception as e:
         print(f"[ERROR] 서비스 오류: {e}")
         service.stop_service()
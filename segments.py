@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+이름 붙은 수신자 그룹(세그먼트)과 대상 식 계산
+
+사용자 항목에 속한 그룹 이름을 둡니다.
+    {"id": 6532057457, "name": "정재명", "active": true, "segments": ["family", "test"]}
+
+스케줄에 "audience" 를 지정하면 구독 설정 대신 그 식으로 대상을 정합니다.
+    "audience": "family ∪ office − muted"
+
+식 문법
+- 합집합: ∪ 또는 | 또는 +
+- 차집합: − 또는 -
+- 교집합: ∩ 또는 &   (합집합/차집합보다 먼저 계산)
+- 괄호, 그리고 모든 활성 사용자를 뜻하는 all
+- 없는 그룹 이름은 빈 집합
+
+각 그룹은 사용자마다 붙인 비트 번호로 만든 정수 비트맵이라 집합 연산이 정수 연산 한 번이고,
+계산 결과는 그룹 구성이 바뀔 때까지 식마다 캐시합니다.
+"""
+
+import re
+
+ALL = "all"
+
+_TOKEN = re.compile(r"\s*(?:(?P<op>[∪|+−\-∩&()])|(?P<name>[^\s∪|+−\-∩&()]+))")
+_OPS = {"∪": "|", "|": "|", "+": "|", "−": "-", "-": "-", "∩": "&", "&": "&", "(": "(", ")": ")"}
+
+
+class SegmentError(ValueError):
+    """대상 식 문법 오류"""
+
+
+def parse_segments(text):
+    """쉼표로 구분한 그룹 이름 입력을 리스트로 변환 (빈 값/중복 제거)"""
+    names = []
+    for name in text.split(","):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def valid_segment_name(name):
+    """식에서 그대로 쓸 수 있는 그룹 이름인지 (공백/연산자 기호/all 불가)"""
+    match = _TOKEN.fullmatch(name)
+    return bool(match and match.group("name")) and name != ALL
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None or match.end() == position:
+            raise SegmentError(f"해석할 수 없는 문자: {expression[position:]!r}")
+        if match.group("op"):
+            tokens.append(_OPS[match.group("op")])
+        else:
+            tokens.append(("name", match.group("name")))
+        position = match.end()
+    return tokens
+
+
+def parse_audience(expression):
+    """대상 식을 ("name", 이름) / (연산자, 왼쪽, 오른쪽) 트리로 변환
+
+    Raises:
+        SegmentError: 문법 오류
+    """
+    tokens = _tokenize(expression)
+    if not tokens:
+        raise SegmentError("대상 식이 비어 있습니다.")
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        token = peek()
+        position += 1
+        return token
+
+    def atom():
+        token = take()
+        if token == "(":
+            node = union()
+            if take() != ")":
+                raise SegmentError("괄호가 닫히지 않았습니다.")
+            return node
+        if isinstance(token, tuple):
+            return token
+        raise SegmentError(f"그룹 이름이 필요한 자리입니다: {expression!r}")
+
+    def intersection():
+        node = atom()
+        while peek() == "&":
+            take()
+            node = ("&", node, atom())
+        return node
+
+    def union():
+        node = intersection()
+        while peek() in ("|", "-"):
+            op = take()
+            node = (op, node, intersection())
+        return node
+
+    tree = union()
+    if position != len(tokens):
+        raise SegmentError(f"식 끝에 남은 내용이 있습니다: {expression!r}")
+    return tree
+
+
+def segment_names(tree):
+    """식에 쓰인 그룹 이름 집합 (all 제외)"""
+    if tree[0] == "name":
+        return set() if tree[1] == ALL else {tree[1]}
+    return segment_names(tree[1]) | segment_names(tree[2])
+
+
+class SegmentIndex:
+    """그룹별 비트맵과 대상 식 캐시 (사용자 변경 시 해당 사용자 비트만 갱신)"""
+    def __init__(self):
+        self.bitmaps = {}         # 그룹 이름 -> 정수 비트맵 (활성 사용자만)
+        self._active = 0          # 모든 활성 사용자 비트맵 (all)
+        self._position = {}       # 사용자 ID -> 비트 번호
+        self._ids = []            # 비트 번호 -> 사용자 ID (빈 번호는 None)
+        self._free = []           # 다시 쓸 수 있는 비트 번호
+        self._memberships = {}    # 사용자 ID -> 속한 그룹 튜플
+        self._trees = {}          # 식 -> 파싱 결과
+        self._results = {}        # 식 -> 계산 결과 (구성이 바뀌면 비움)
+
+    def _bit(self, user_id):
+        position = self._position.get(user_id)
+        if position is None:
+            position = self._free.pop() if self._free else len(self._ids)
+            if position == len(self._ids):
+                self._ids.append(user_id)
+            else:
+                self._ids[position] = user_id
+            self._position[user_id] = position
+        return 1 << position
+
+    def _clear(self, user_id):
+        position = self._position.get(user_id)
+        if position is None:
+            return
+        mask = ~(1 << position)
+        self._active &= mask
+        for name in self._memberships.pop(user_id, ()):
+            bitmap = self.bitmaps.get(name, 0) & mask
+            if bitmap:
+                self.bitmaps[name] = bitmap
+            else:
+                self.bitmaps.pop(name, None)
+
+    def update(self, user):
+        """사용자 추가/변경 반영 (비활성 사용자는 어느 그룹에도 넣지 않음)"""
+        user_id = user["id"]
+        self._clear(user_id)
+        self._results.clear()
+        if not user.get("active"):
+            return
+        bit = self._bit(user_id)
+        self._active |= bit
+        names = tuple(dict.fromkeys(user.get("segments", ())))
+        self._memberships[user_id] = names
+        for name in names:
+            self.bitmaps[name] = self.bitmaps.get(name, 0) | bit
+
+    def remove(self, user_id):
+        self._clear(user_id)
+        self._results.clear()
+        position = self._position.pop(user_id, None)
+        if position is not None:
+            self._ids[position] = None
+            self._free.append(position)
+
+    def _evaluate(self, tree):
+        if tree[0] == "name":
+            return self._active if tree[1] == ALL else self.bitmaps.get(tree[1], 0)
+        left, right = self._evaluate(tree[1]), self._evaluate(tree[2])
+        if tree[0] == "|":
+            return left | right
+        if tree[0] == "&":
+            return left & right
+        return left & ~right
+
+    def resolve(self, expression):
+        """대상 식을 활성 사용자 ID 튜플로 계산 (비트 번호 순, 결과는 캐시)
+
+        Raises:
+            SegmentError: 문법 오류
+        """
+        result = self._results.get(expression)
+        if result is not None:
+            return result
+        tree = self._trees.get(expression)
+        if tree is None:
+            tree = self._trees[expression] = parse_audience(expression)
+        bitmap = self._evaluate(tree) & self._active
+        # 비트 문자열을 한 번 만들어 켜진 비트 번호를 찾음 (사용자 수에 비례)
+        bits = bin(bitmap)[:1:-1]
+        result = self._results[expression] = tuple(
+            self._ids[position] for position, bit in enumerate(bits) if bit == "1"
+        )
+        return result
+
+    def names(self):
+        """현재 구성원이 있는 그룹 이름 목록"""
+        return sorted(self.bitmaps)
+
+    @classmethod
+    def from_users(cls, users):
+        index = cls()
+        for user in users:
+            index.update(user)
+        return index
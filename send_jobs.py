@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI 수동 전송 백그라운드 작업
+
+"지금 전송" 을 Streamlit 스크립트 안에서 끝날 때까지 기다리지 않고 작업으로 넘깁니다.
+작업은 프로세스 안의 스레드에서 실행되므로 화면을 새로고침하거나 다른 페이지로 가도 계속되고,
+화면은 작업 ID로 진행 상황(성공/실패/남은 수신자)만 조회합니다.
+    runner = JobRunner()
+    job = runner.submit("뉴스 9 전송", lambda job: scheduler.send_scheduled_messages(ids, job))
+    runner.get(job.id).progress()  # {"sent": 120, "failed": 2, "remaining": 878, "total": 1000}
+    job.cancel()                   # 아직 보내지 않은 수신자 전송 취소
+"""
+
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+FINISHED_STATUSES = (DONE, CANCELLED, FAILED)
+
+# 완료된 작업 결과를 몇 개까지 남겨 둘지 (오래된 것부터 버림)
+MAX_FINISHED_JOBS = 50
+
+
+class SendJob:
+    """백그라운드 전송 작업 하나 (진행 상황 조회, 취소, 결과 요약)"""
+    _numbers = itertools.count(1)
+
+    def __init__(self, label):
+        self.number = next(self._numbers)
+        self.id = uuid.uuid4().hex[:8]
+        self.label = label
+        self.status = QUEUED
+        self.success = None
+        self.summary = ""
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.batches = []  # 작업이 대기열에 넣은 SendBatch
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def add_batch(self, batch):
+        with self._lock:
+            self.batches.append(batch)
+        if self.cancelled:
+            batch.cancel()
+
+    def cancel(self):
+        """아직 보내지 않은 수신자 전송 취소 (이미 보낸 결과는 유지)"""
+        self._cancelled.set()
+        with self._lock:
+            batches = list(self.batches)
+        for batch in batches:
+            batch.cancel()
+
+    def done(self):
+        return self.status in FINISHED_STATUSES
+
+    def progress(self):
+        """{"sent", "failed", "remaining", "total"} 수신자 수"""
+        with self._lock:
+            batches = list(self.batches)
+        sent = sum(batch.sent for batch in batches)
+        failed = sum(batch.failed for batch in batches)
+        remaining = sum(batch.remaining for batch in batches)
+        total = sum(len(batch.chat_ids) for batch in batches)
+        return {"sent": sent, "failed": failed, "remaining": remaining, "total": total}
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobRunner:
+    """전송 작업을 스레드로 실행하고 ID로 조회 (여러 세션이 함께 씀)"""
+    def __init__(self, max_finished=MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()  # 작업 ID -> SendJob (제출 순)
+        self._lock = threading.Lock()
+
+    def submit(self, label, run):
+        """작업을 만들어 바로 실행하고 SendJob 반환
+
+        Args:
+            label (str): 화면에 보여줄 작업 이름
+            run (callable): run(job) -> (성공 여부, 결과 메시지), 작업 스레드에서 실행
+        """
+        job = SendJob(label)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        thread = threading.Thread(target=self._run, args=(job, run), name=f"send-job-{job.number}", daemon=True)
+        thread.start()
+        return job
+
+    def _run(self, job, run):
+        job.status = RUNNING
+        job.started_at = time.time()
+        print(f"[SEND] 작업 시작 #{job.number} ({job.id}): {job.label}")
+        try:
+            job.success, job.summary = run(job)
+            job.status = CANCELLED if job.cancelled else DONE
+        except Exception as e:
+            job.success, job.summary = False, f"작업 실패: {e}"
+            job.status = FAILED
+            print(f"[ERROR] 작업 실패 #{job.number} ({job.id}): {e}")
+        finally:
+            job.finished_at = time.time()
+        print(f"[SEND] 작업 종료 #{job.number} ({job.id}): {job.status} - {job.summary}")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done()]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.done():
+            return False
+        job.cancel()
+        return True
+
+    def jobs(self):
+        """최근 작업부터"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def running(self):
+        return [job for job in self.jobs() if not job.done()]
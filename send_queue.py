@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+우선순위 레인 전송 대기열
+
+전송을 세 가지 레인으로 나누고, 하나의 속도 제한 아래에서 가중 공정 큐(WFQ)로 내보냅니다.
+- ALERT:    방송 시작 알림 (가장 급함)
+- REMINDER: 실패한 수신자 재전송 등 뒤따르는 알림
+- BULK:     UI 수동 전송, 공지 등 대량 전송
+
+속도 제한은 락 파일 + 상태 파일로 프로세스 간에 공유되므로 Streamlit 앱과 스케줄 서비스가
+같은 봇의 전송 한도를 나눠 씁니다 (전송 시각은 몇 건씩 묶어 예약). ALERT 레인에 대기 중인 전송이 있으면
+다른 프로세스의 BULK 전송을 잠시 멈춰 알림이 먼저 나가도록 하고, 같은 프로세스 안에서는 레인 가중치를 따릅니다.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+from delivery_journal import DeliveryJournal, delivery_key, journaled_result
+from json_store import FileLock
+
+ALERT = "alert"
+REMINDER = "reminder"
+BULK = "bulk"
+
+# 레인별 가중치 (모든 레인이 바쁠 때 전송 기회의 비율)
+LANE_WEIGHTS = {ALERT: 16, REMINDER: 4, BULK: 1}
+
+# 전체 초당 전송 수 (텔레그램 봇 대량 전송 권장 한도)
+DEFAULT_RATE = 30
+# ALERT 대기 중일 때 다른 프로세스의 BULK 전송을 멈추는 시간 (초, 대기 중에는 계속 연장)
+BULK_HOLD_SECONDS = 1.0
+# 상태 파일에서 한 번에 예약하는 전송 시각 수, 예약해 두고 이 시간(초) 넘게 지난 시각은 버림
+SLOT_BLOCK = 10
+SLOT_STALE_SECONDS = 0.5
+
+
+class RateLimiter:
+    """프로세스 간 공유 전송 속도 제한 (다음 전송 시각을 상태 파일에 기록)
+
+    전송마다 상태 파일을 고치지 않고 block 개 분량의 시각을 한 번에 예약해 프로세스 안에서 나눠 씁니다
+    (10,000명 전송에 파일 잠금/쓰기 약 10,000 / block 번).
+    """
+    def __init__(self, rate=DEFAULT_RATE, state_file="send_rate.state", block=SLOT_BLOCK):
+        self.rate = float(rate)
+        self.state_file = state_file
+        self.block = max(1, int(block))
+        self.lock = FileLock(f"{state_file}.lock")
+        self._slots = deque()  # 이 프로세스가 예약해 둔 전송 시각
+        self._local_lock = threading.Lock()
+
+    def _read(self):
+        """(다음 전송 시각, BULK 멈춤 끝 시각, 멈춤을 건 프로세스 ID)"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                fields = f.read().split()
+            next_slot, hold_until = float(fields[0]), float(fields[1])
+            holder = int(fields[2]) if len(fields) > 2 else 0
+            return next_slot, hold_until, holder
+        except (OSError, ValueError, IndexError):
+            return 0.0, 0.0, 0
+
+    def _write(self, next_slot, hold_until, holder):
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            f.write(f"{next_slot:.6f} {hold_until:.6f} {holder}")
+
+    def _reserve(self, lane):
+        """상태 파일에서 block 개의 전송 시각을 예약 (다른 프로세스가 BULK 를 멈췄으면 기다릴 시간 반환)"""
+        with self.lock:
+            next_slot, hold_until, holder = self._read()
+            now = time.time()
+            if lane == BULK and hold_until > now and holder != os.getpid():
+                return min(hold_until - now, BULK_HOLD_SECONDS)
+            start = max(now, next_slot)
+            self._write(start + self.block / self.rate, hold_until, holder)
+        self._slots.extend(start + i / self.rate for i in range(self.block))
+        return 0
+
+    def take(self, lane=BULK):
+        """전송 한 건의 시각을 기다리지 않고 받음
+
+        Returns:
+            tuple: (전송 시각 timestamp, None) 또는 다른 프로세스가 BULK 를 멈췄으면 (None, 기다릴 시간)
+        """
+        with self._local_lock:
+            # 한동안 쓰지 않아 지나간 시각은 버림 (몰아서 보내지 않도록)
+            stale = time.time() - SLOT_STALE_SECONDS
+            while self._slots and self._slots[0] < stale:
+                self._slots.popleft()
+            wait = self._reserve(lane) if not self._slots else 0
+            if not self._slots:
+                return None, wait
+            return self._slots.popleft(), None
+
+    def acquire(self, lane=BULK):
+        """전송 한 건의 시각을 받아 그 시각까지 대기"""
+        while True:
+            slot, wait = self.take(lane)
+            if slot is None:
+                time.sleep(wait)
+                continue
+            delay = slot - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            return
+
+    def hold_bulk(self, seconds=BULK_HOLD_SECONDS):
+        """다른 프로세스의 BULK 전송을 잠시 멈춤 (이 프로세스 안에서는 레인 가중치로 순서를 정함)"""
+        with self.lock:
+            next_slot, hold_until, _ = self._read()
+            self._write(next_slot, max(hold_until, time.time() + seconds), os.getpid())
+
+
+class SendBatch:
+    """한 번의 다중 전송 요청 (진행 상황 조회, 취소, 완료 대기)"""
+    _ids = itertools.count(1)
+
+    def __init__(self, message, chat_ids, lane, parse_mode="HTML", on_result=None, key=None):
+        self.id = next(self._ids)
+        self.key = key  # 멱등성 키 접두어 (스케줄 회차, delivery_journal.occurrence_key)
+        self.message = message
+        self.chat_ids = list(chat_ids)
+        self.lane = lane
+        self.parse_mode = parse_mode
+        self.on_result = on_result
+        self.results = [None] * len(self.chat_ids)
+        self.sent = 0
+        self.failed = 0
+        self.cancelled = False
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._pending = len(self.chat_ids)
+        self._unsaved = []  # 마지막 checkpoint() 이후 새로 나온 결과
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if not self.chat_ids:
+            self._finish()
+
+    @property
+    def remaining(self):
+        return self._pending
+
+    def progress(self):
+        return {"sent": self.sent, "failed": self.failed, "remaining": self._pending}
+
+    def cancel(self):
+        """아직 보내지 않은 수신자 전송 취소 (이미 보낸 결과는 유지)"""
+        self.cancelled = True
+
+    def wait(self, timeout=None):
+        """완료될 때까지 기다렸다가 결과 리스트 반환 (취소된 수신자는 결과에서 제외)"""
+        self._done.wait(timeout)
+        return [r for r in self.results if r is not None]
+
+    def done(self):
+        return self._done.is_set()
+
+    def checkpoint(self):
+        """지난 호출 이후 새로 나온 결과와 아직 결과가 없는 수신자 반환
+
+        Returns:
+            tuple: (새 결과 리스트, 결과가 없는 채팅 ID 리스트)
+        """
+        with self._lock:
+            new_results, self._unsaved = self._unsaved, []
+            unfinished = [chat_id for chat_id, r in zip(self.chat_ids, self.results) if r is None]
+        return new_results, unfinished
+
+    def _record(self, position, result):
+        with self._lock:
+            self.results[position] = result
+            if result is not None:
+                self._unsaved.append(result)
+                if result["success"]:
+                    self.sent += 1
+                else:
+                    self.failed += 1
+            self._pending -= 1
+            finished = self._pending == 0
+        if result is not None and self.on_result:
+            try:
+                self.on_result(self, result)
+            except Exception as e:
+                print(f"[ERROR] 전송 결과 콜백 오류: {e}")
+        if finished:
+            self._finish()
+
+    def _finish(self):
+        self.finished_at = time.time()
+        self._done.set()
+
+
+class PrioritySendQueue:
+    """레인별 대기열을 가중 공정 큐로 내보내는 전송 작업자 풀"""
+    def __init__(self, sender, rate_limiter=None, weights=None, workers=8, journal=None):
+        """
+        Args:
+            sender: send_message_to_chat(chat_id, message, parse_mode) 를 가진 전송기
+            rate_limiter (RateLimiter): 공유 속도 제한 (None이면 기본값)
+            weights (dict): 레인별 가중치
+            workers (int): 동시에 진행할 전송 수 (응답 지연 × 초당 전송 수 이상 권장)
+            journal (DeliveryJournal): 멱등성 저널 (key 를 준 요청만 중복 전송 방지)
+        """
+        self.sender = sender
+        self.journal = journal
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.weights = dict(weights or LANE_WEIGHTS)
+        self.lanes = {lane: deque() for lane in self.weights}
+        # 스트라이드 스케줄링: 레인마다 누적 "통과 값"이 가장 작은 레인을 먼저 보냄
+        self._pass = {lane: 0.0 for lane in self.weights}
+        self._virtual_time = 0.0
+        self._condition = threading.Condition()
+        self._last_hold = 0.0
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"send-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, message, chat_ids, lane=BULK, parse_mode="HTML", on_result=None, key=None):
+        """전송 요청을 대기열에 넣고 바로 SendBatch 반환
+
+        key (스케줄 회차) 를 주면 저널에 이미 전송된 수신자는 대기열에 넣지 않고 바로 결과 처리합니다.
+        """
+        if lane not in self.lanes:
+            raise ValueError(f"알 수 없는 레인입니다: {lane}")
+        batch = self._new_batch(message, chat_ids, lane, parse_mode, on_result, key)
+        done = {}
+        if self.journal is not None and key is not None:
+            done = self.journal.completed(delivery_key(key, chat_id) for chat_id in batch.chat_ids)
+        queued = []
+        for position, chat_id in enumerate(batch.chat_ids):
+            record = done.get(delivery_key(key, chat_id)) if done else None
+            if record is not None:
+                batch._record(position, journaled_result(chat_id, record))
+            else:
+                queued.append((batch, position))
+        if done:
+            print(f"[INFO] 이미 전송된 수신자 {len(done)}명 건너뜀")
+        with self._condition:
+            queue = self.lanes[lane]
+            if not queue:
+                # 쉬던 레인이 밀린 몫을 한꺼번에 가져가지 않도록 현재 가상 시각부터 시작
+                self._pass[lane] = max(self._pass[lane], self._virtual_time)
+            queue.extend(queued)
+            self._condition.notify_all()
+        return batch
+
+    def _new_batch(self, message, chat_ids, lane, parse_mode, on_result, key):
+        return SendBatch(message, chat_ids, lane, parse_mode, on_result, key)
+
+    def send(self, message, chat_ids, lane=BULK, parse_mode="HTML", key=None):
+        """전송하고 완료될 때까지 기다렸다가 결과 리스트 반환"""
+        return self.submit(message, chat_ids, lane, parse_mode, key=key).wait()
+
+    def pending(self):
+        """레인별 대기 중인 수신자 수"""
+        with self._condition:
+            return {lane: len(queue) for lane, queue in self.lanes.items()}
+
+    def _next_lane(self):
+        ready = [lane for lane, queue in self.lanes.items() if queue]
+        if not ready:
+            return None
+        return min(ready, key=lambda lane: self._pass[lane])
+
+    def _pop(self):
+        """가장 앞선 레인에서 하나 꺼냄 (잠금 안에서 호출)"""
+        lane = self._next_lane()
+        if lane is None:
+            return None
+        self._virtual_time = self._pass[lane]
+        self._pass[lane] += 1.0 / self.weights[lane]
+        return self.lanes[lane].popleft()
+
+    def _worker(self):
+        while self._running:
+            with self._condition:
+                while self._running and self._next_lane() is None:
+                    self._condition.wait(timeout=1.0)
+                if not self._running:
+                    return
+                lane = self._next_lane()
+                alert_waiting = bool(self.lanes.get(ALERT))
+
+            if alert_waiting and time.time() - self._last_hold > BULK_HOLD_SECONDS / 2:
+                self._last_hold = time.time()
+                self.rate_limiter.hold_bulk()
+
+            # 예약한 시각까지 기다리는 동안 더 급한 전송이 들어오면 그것을 먼저 보냄
+            self.rate_limiter.acquire(lane)
+            skipped = []
+            with self._condition:
+                item = self._pop()
+                while item is not None and item[0].cancelled:
+                    skipped.append(item)
+                    item = self._pop()
+            for cancelled_batch, position in skipped:
+                cancelled_batch._record(position, None)
+            if item is None:
+                continue
+
+            batch, position = item
+            if batch.started_at is None:
+                batch.started_at = time.time()
+            batch._record(position, self._send(batch, batch.chat_ids[position]))
+
+    def _send(self, batch, chat_id):
+        """한 명에게 전송 (저널이 있으면 API 호출 앞뒤로 멱등성 키 기록)"""
+        key = None
+        if self.journal is not None and batch.key is not None:
+            key = delivery_key(batch.key, chat_id)
+            try:
+                record = self.journal.begin(key)
+            except OSError as e:
+                # 기록을 남길 수 없으면 중복 여부를 보장할 수 없으므로 보내지 않음
+                return {"chat_id": chat_id, "success": False, "error": f"전송 저널 기록 실패: {e}"}
+            if record is not None:
+                return journaled_result(chat_id, record)
+        try:
+            result = self.sender.send_message_to_chat(chat_id, batch.message, batch.parse_mode)
+        except Exception as e:
+            result = {"chat_id": chat_id, "success": False, "error": str(e)}
+        if key is not None:
+            try:
+                self.journal.finish(key, result)
+            except OSError as e:
+                print(f"[ERROR] 전송 저널 기록 실패 ({chat_id}): {e}")
+        return result
+
+    def stop(self):
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+
+
+_shared_queue = None
+_shared_queue_lock = threading.Lock()
+
+
+def get_send_queue(sender=None):
+    """프로세스 전체에서 하나만 쓰는 전송 대기열 (처음 호출할 때 생성)"""
+    global _shared_queue
+    with _shared_queue_lock:
+        if _shared_queue is None:
+            if sender is None:
+                from telegram_sender import TelegramSender
+                sender = TelegramSender()
+            _shared_queue = PrioritySendQueue(
+                sender,
+                RateLimiter(state_file=os.path.abspath("send_rate.state")),
+                journal=DeliveryJournal(os.path.abspath("delivery_journal.jsonl")),
+            )
+        return _shared_queue
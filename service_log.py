@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스케줄 서비스 로그 파일 (크기 기준 교체)과 바이트 오프셋 기반 이어 읽기
+
+서비스는 print 출력을 콘솔과 함께 로그 파일에도 씁니다. 파일이 max_bytes 를 넘으면
+schedule_service.log → .log.1 → .log.2 ... 로 밀어내고 새 파일에 이어 씁니다.
+    2025-01-15 20:00:00 [SEND] 방송 알림 전송 시작: 뉴스 9
+
+웹 화면은 서비스 프로세스의 출력 파이프 대신 이 파일을 마지막으로 읽은 위치부터 읽으므로,
+화면이 읽지 않아도 서비스가 출력에서 멈추지 않고 따로 실행 중인 서비스에도 붙을 수 있습니다.
+"""
+
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+
+import pytz
+
+KST = pytz.timezone('Asia/Seoul')
+
+DEFAULT_LOG_FILE = "schedule_service.log"
+# 로그 파일 하나의 최대 크기와 남겨 둘 이전 파일 수
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+# 처음 붙을 때 파일 끝에서 거슬러 읽을 크기 (최근 로그만 보여줌)
+DEFAULT_BACKLOG_BYTES = 64 * 1024
+# 한 번에 읽을 최대 크기 (밀린 로그가 많아도 화면 한 번 그리는 시간을 제한)
+READ_CHUNK_BYTES = 1024 * 1024
+
+_LINE = re.compile(r"^\d{4}-\d{2}-\d{2} (\d{2}:\d{2}:\d{2}) (.*)$")
+
+
+class RotatingLogFile:
+    """줄 단위로 시각을 붙여 쓰고 크기가 넘으면 교체하는 로그 파일 (스레드 안전 쓰기 객체)"""
+    def __init__(self, path=DEFAULT_LOG_FILE, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._partial = ""
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, text):
+        with self._lock:
+            *lines, self._partial = (self._partial + text).split("\n")
+            if not lines:
+                return len(text)
+            timestamp = datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
+            data = "".join(f"{timestamp} {line}\n" for line in lines)
+            if self.max_bytes and self._file.tell() + len(data.encode('utf-8')) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        try:
+            for number in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{number}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{number + 1}")
+            if self.backup_count:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+        except OSError as e:
+            # 다른 프로세스가 파일을 열고 있는 경우 (Windows) 등: 다음 쓰기 때 다시 시도
+            sys.__stderr__.write(f"[WARNING] 로그 파일 교체 실패: {e}\n")
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        with self._lock:
+            if self._partial:
+                self._file.write(f"{datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')} {self._partial}\n")
+                self._partial = ""
+            self._file.close()
+
+
+class TeeStream:
+    """여러 출력에 같은 내용을 쓰는 stdout/stderr 대체 객체 (한 출력의 오류가 다른 출력을 막지 않음)"""
+    def __init__(self, *streams):
+        self.streams = [stream for stream in streams if stream is not None]
+
+    def write(self, text):
+        for stream in self.streams:
+            try:
+                stream.write(text)
+            except (OSError, ValueError):
+                pass
+        return len(text)
+
+    def flush(self):
+        for stream in self.streams:
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+
+    def isatty(self):
+        return False
+
+
+def install_log_file(path=DEFAULT_LOG_FILE, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+    """print 출력(stdout/stderr)을 콘솔과 로그 파일에 함께 쓰도록 설정하고 로그 파일 객체 반환"""
+    log_file = RotatingLogFile(path, max_bytes, backup_count)
+    sys.stdout = TeeStream(sys.stdout, log_file)
+    sys.stderr = TeeStream(sys.stderr, log_file)
+    return log_file
+
+
+def split_line(line):
+    """로그 파일 한 줄 → ("HH:MM:SS", 내용) (시각이 없으면 시각은 None)"""
+    match = _LINE.match(line)
+    if match is None:
+        return None, line
+    return match.group(1), match.group(2)
+
+
+class LogTailer:
+    """로그 파일을 바이트 오프셋으로 이어 읽기 (교체/잘림 감지)
+
+    파일을 계속 열어 두지 않고 읽을 때마다 열었다 닫으므로, 서비스가 파일을 교체하는 것을 막지 않습니다.
+    """
+    def __init__(self, path=DEFAULT_LOG_FILE, backlog_bytes=DEFAULT_BACKLOG_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+        self.path = path
+        self.backlog_bytes = backlog_bytes
+        self.backup_count = backup_count
+        self._identity = None  # 읽던 파일의 (장치, inode)
+        self._offset = None    # 읽던 파일에서 다음에 읽을 위치 (None 이면 아직 붙지 않음)
+        self._partial = b""    # 줄바꿈 없이 끝난 마지막 조각
+        self._skip_first = False  # 파일 중간부터 붙었을 때 잘린 첫 줄 버리기
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    def _read_from(self, path, offset, limit):
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(limit)
+        return data, offset + len(data)
+
+    def _backups(self):
+        """교체된 이전 파일 [(경로, stat)] (최근 것부터 .1, .2 ...)"""
+        backups = []
+        for number in range(1, self.backup_count + 1):
+            path = f"{self.path}.{number}"
+            stat = self._stat(path)
+            if stat is not None:
+                backups.append((path, stat))
+        return backups
+
+    def _lines(self, chunks):
+        data = self._partial + b"".join(chunks)
+        *lines, self._partial = data.split(b"\n")
+        if self._skip_first and lines:
+            lines = lines[1:]
+            self._skip_first = False
+        return [line.decode('utf-8', errors='replace').rstrip("\r") for line in lines]
+
+    def read_lines(self, limit=READ_CHUNK_BYTES):
+        """마지막으로 읽은 뒤 새로 쓰인 완성된 줄 리스트 (파일이 없으면 빈 리스트)"""
+        with self._lock:
+            stat = self._stat(self.path)
+            if stat is None:
+                return []
+            identity = (stat.st_dev, stat.st_ino)
+            chunks = []
+            if self._offset is None:
+                # 처음 붙을 때는 최근 backlog_bytes 만 읽고, 잘린 첫 줄은 버림
+                self._offset = max(0, stat.st_size - self.backlog_bytes)
+                self._partial = b""
+                if self._offset:
+                    data, _ = self._read_from(self.path, self._offset - 1, 1)
+                    self._skip_first = data != b"\n"
+            elif identity != self._identity:
+                # 교체됨: 읽던 파일이 밀려난 이전 파일(.1, 그 사이 여러 번 교체됐으면 .2 ...)을 찾아
+                # 남은 부분부터 끝까지 읽은 뒤 더 최근 파일로 차례로 넘어감
+                sources = []
+                for path, backup in self._backups():
+                    sources.append((path, backup))
+                    if (backup.st_dev, backup.st_ino) == self._identity:
+                        break
+                else:
+                    sources = []  # 읽던 파일이 이미 지워짐: 새 파일 처음부터
+                    self._offset = 0
+                for path, backup in reversed(sources):
+                    if backup.st_size > self._offset:
+                        data, self._offset = self._read_from(path, self._offset, limit)
+                        chunks.append(data)
+                        limit -= len(data)
+                    if self._offset < backup.st_size:
+                        # limit 까지 읽고도 남았으면 이 파일에 머물렀다가 다음 호출에서 이어 읽음
+                        self._identity = (backup.st_dev, backup.st_ino)
+                        return self._lines(chunks)
+                    self._offset = 0
+            elif stat.st_size < self._offset:
+                # 잘림 (같은 파일이 비워짐): 처음부터
+                self._offset = 0
+                self._partial = b""
+            self._identity = identity
+
+            if stat.st_size > self._offset and limit > 0:
+                data, self._offset = self._read_from(self.path, self._offset, limit)
+                chunks.append(data)
+            return self._lines(chunks)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스케줄 서비스 지표 수집 및 노출
+
+- http://127.0.0.1:<포트>/metrics       Prometheus 텍스트 형식
+- http://127.0.0.1:<포트>/metrics.json  JSON 형식
+- 지표 파일 (기본: service_metrics.json) 에도 매 체크마다 기록
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from json_store import copy_file_mode
+
+# 초 단위 히스토그램 구간
+TICK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60)
+LAG_BUCKETS = (0, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+
+
+class Histogram:
+    """누적 구간(le) 히스토그램"""
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self):
+        return {
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+            "count": self.count,
+            "sum": round(self.sum, 6),
+        }
+
+
+class ServiceMetrics:
+    """스케줄 서비스 지표 (스레드 안전)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.tick_duration = Histogram(TICK_BUCKETS)
+        self.fire_lag = Histogram(LAG_BUCKETS)
+        self.broadcast_completion = Histogram(LAG_BUCKETS)
+        self.gauges = {
+            "last_tick_duration_seconds": 0.0,
+            "last_tick_timestamp": 0.0,
+            "last_successful_tick_timestamp": 0.0,
+            "schedules_scanned": 0,
+            "pending_schedules": 0,
+            "overdue_schedules": 0,
+            "pending_recipients": 0,
+        }
+        self.counters = {
+            "ticks_total": 0,
+            "tick_errors_total": 0,
+            "broadcasts_total": 0,
+            "retries_total": 0,
+            "messages_sent_total": 0,
+            "messages_failed_total": 0,
+        }
+
+    def record_tick(self, duration, scanned, pending, overdue, pending_recipients, ok=True):
+        """체크 한 번의 결과 기록"""
+        now = time.time()
+        with self._lock:
+            self.tick_duration.observe(duration)
+            self.counters["ticks_total"] += 1
+            self.gauges["last_tick_duration_seconds"] = round(duration, 6)
+            self.gauges["last_tick_timestamp"] = now
+            self.gauges["schedules_scanned"] = scanned
+            self.gauges["pending_schedules"] = pending
+            self.gauges["overdue_schedules"] = overdue
+            self.gauges["pending_recipients"] = pending_recipients
+            if ok:
+                self.gauges["last_successful_tick_timestamp"] = now
+            else:
+                self.counters["tick_errors_total"] += 1
+
+    def record_broadcast(self, fire_lag, completion_lag, success_count, failure_count, retry=False):
+        """브로드캐스트 한 번의 결과 기록
+
+        Args:
+            fire_lag (float): 예정 시각 대비 전송 시작 지연 (초)
+            completion_lag (float): 예정 시각 대비 마지막 수신자 전송 완료 지연 (초)
+            success_count (int): 성공한 수신자 수
+            failure_count (int): 실패한 수신자 수
+            retry (bool): 실패 수신자 재전송이면 지연 히스토그램에서 제외
+        """
+        with self._lock:
+            if not retry:
+                self.fire_lag.observe(fire_lag)
+                self.broadcast_completion.observe(completion_lag)
+                self.counters["broadcasts_total"] += 1
+            else:
+                self.counters["retries_total"] += 1
+            self.counters["messages_sent_total"] += success_count
+            self.counters["messages_failed_total"] += failure_count
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started_at, 3),
+                "gauges": dict(self.gauges),
+                "counters": dict(self.counters),
+                "histograms": {
+                    "tick_duration_seconds": self.tick_duration.to_dict(),
+                    "fire_lag_seconds": self.fire_lag.to_dict(),
+                    "broadcast_completion_seconds": self.broadcast_completion.to_dict(),
+                },
+            }
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 형식으로 변환"""
+        data = self.to_dict()
+        lines = [f"tv_scheduler_uptime_seconds {data['uptime_seconds']}"]
+        for name, value in data["gauges"].items():
+            lines.append(f"# TYPE tv_scheduler_{name} gauge")
+            lines.append(f"tv_scheduler_{name} {value}")
+        for name, value in data["counters"].items():
+            lines.append(f"# TYPE tv_scheduler_{name} counter")
+            lines.append(f"tv_scheduler_{name} {value}")
+        for name, hist in data["histograms"].items():
+            lines.append(f"# TYPE tv_scheduler_{name} histogram")
+            for bound, count in hist["buckets"].items():
+                lines.append(f'tv_scheduler_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'tv_scheduler_{name}_bucket{{le="+Inf"}} {hist["count"]}')
+            lines.append(f"tv_scheduler_{name}_sum {hist['sum']}")
+            lines.append(f"tv_scheduler_{name}_count {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """지표를 JSON 파일로 원자적으로 기록"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+            copy_file_mode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            print(f"[ERROR] 지표 파일 기록 실패: {e}")
+
+
+class MetricsServer:
+    """로컬 HTTP 지표 엔드포인트 (백그라운드 스레드)"""
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = metrics.to_prometheus().encode('utf-8')
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(metrics.to_dict(), ensure_ascii=False).encode('utf-8')
+                    content_type = "application/json; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 서비스 로그가 요청 로그로 덮이지 않도록
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"[INFO] 지표 엔드포인트: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
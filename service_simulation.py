@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+가상 시계로 스케줄 서비스 재생 (용량 계획용 시뮬레이션)
+
+실제 스케줄/사용자 파일의 복사본을 임시 폴더에 두고 ScheduleService 를 가상 시계로 돌립니다.
+- 체크 주기, 1분 전송 창, 재전송, 방해 금지, 우선순위 레인은 실제 서비스 코드 그대로 사용
+- 전송은 모의 전송기로 하고, 속도 제한(초당 전송 수)과 동시 전송 수, 응답 지연은 가상 시간으로 계산
+- 전송이 없는 구간은 다음 스케줄 직전 체크 시각으로 건너뛰어 하루치를 몇 초 안에 재생
+
+서비스는 예정 시각 1분 전부터 보낼 수 있으므로 예정 시각 기준 시작(fire_lag)은 대개 음수입니다.
+느린 스케줄은 전송할 수 있게 된 첫 체크부터 실제 전송 시작까지 걸린 시작 지연(start_delay)으로 찾습니다.
+
+기간 안의 활성 스케줄은 아직 보내지 않은 상태로 되돌리고, 기간 밖의 스케줄은 비활성화해서
+그 기간의 편성만 재생합니다. 실제 데이터 파일은 바꾸지 않습니다.
+
+사용 예:
+    python schedule_service_server.py --simulate 2025-01-15
+    python service_simulation.py 2025-01-15 2025-01-16 --rate 30 --latency 0.3 --failure-rate 0.01
+"""
+
+import argparse
+import bisect
+import contextlib
+import heapq
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from delivery_state import delivery_counts, next_deferred_time, DEFERRED, DROPPED, FAILED, SENT
+from send_queue import PrioritySendQueue, RateLimiter, SendBatch, DEFAULT_RATE
+
+# 체크가 끝난 뒤 다음 체크까지 쉬는 시간 (ScheduleService.schedule_checker 와 같음)
+CHECK_INTERVAL = 60
+# 예정 시각보다 이만큼 먼저 체크해도 전송함 (서비스의 1분 전송 창)
+SEND_WINDOW = 60
+
+
+class VirtualClock:
+    """ScheduleService 에 넘기는 가상 시계 (호출하면 한국 시간 datetime)"""
+    def __init__(self, start):
+        self.tz = start.tzinfo
+        self._now = start.timestamp()
+
+    def __call__(self):
+        return datetime.fromtimestamp(self._now, self.tz)
+
+    def time(self):
+        return self._now
+
+    def advance_to(self, timestamp):
+        """시간은 앞으로만 감"""
+        if timestamp > self._now:
+            self._now = timestamp
+
+
+class MockSender:
+    """네트워크 없이 응답하는 전송기 (응답 지연과 실패 비율을 흉내 냄)"""
+    def __init__(self, latency=0.2, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def next_latency(self):
+        """한 건의 응답 지연 (평균 latency, ±50%)"""
+        return self.latency * self.random.uniform(0.5, 1.5) if self.latency else 0.0
+
+    def send_message_to_chat(self, chat_id, message, parse_mode="HTML"):
+        self.calls += 1
+        if self.random.random() < self.failure_rate:
+            return {"chat_id": chat_id, "success": False, "error": "모의 전송 실패"}
+        return {"chat_id": chat_id, "success": True, "result": {"ok": True}, "message_id": self.calls}
+
+
+class SimulatedBatch(SendBatch):
+    """완료 여부를 물으면 대기열을 가상 시간으로 먼저 처리하는 SendBatch"""
+    def __init__(self, queue, *args):
+        self.queue = queue
+        self.submitted_virtual = queue.clock.time()
+        self.finished_virtual = None
+        super().__init__(*args)
+
+    def done(self):
+        self.queue.run()
+        return super().done()
+
+    def wait(self, timeout=None):
+        self.queue.run()
+        return super().wait(0)
+
+    def _finish(self):
+        super()._finish()
+        self.finished_at = self.finished_virtual or self.queue.clock.time()
+
+
+class SimulatedSendQueue(PrioritySendQueue):
+    """작업자 스레드 없이 가상 시간으로 전송하는 우선순위 대기열
+
+    레인 선택(가중 공정 큐)과 저널 처리는 PrioritySendQueue 그대로이고,
+    전송 시각은 max(속도 제한 슬롯, 비는 작업자) 로 정합니다.
+    """
+    def __init__(self, sender, clock, rate=DEFAULT_RATE, workers=8, journal=None):
+        super().__init__(sender, RateLimiter(rate), workers=0, journal=journal)
+        self.clock = clock
+        self.worker_count = workers
+        self.batches = []
+        self.sends_per_minute = {}
+        self.stats = {"sends": 0, "rate_limit_stalls": 0, "rate_limit_wait_seconds": 0.0,
+                      "worker_stalls": 0, "worker_wait_seconds": 0.0, "busy_seconds": 0.0,
+                      "max_queue_wait_seconds": 0.0}
+        self._next_slot = 0.0
+        self._workers = [0.0] * workers
+
+    def _new_batch(self, message, chat_ids, lane, parse_mode, on_result, key):
+        batch = SimulatedBatch(self, message, chat_ids, lane, parse_mode, on_result, key)
+        self.batches.append(batch)
+        return batch
+
+    def run(self):
+        """대기 중인 전송을 모두 가상 시간으로 처리하고 시계를 마지막 응답 시각으로 옮김"""
+        busy_from = None
+        last_done = self.clock.time()
+        while True:
+            item = self._pop()
+            if item is None:
+                break
+            batch, position = item
+            if batch.cancelled:
+                batch._record(position, None)
+                continue
+            ready = self.clock.time()
+            limiter_slot = max(ready, self._next_slot)
+            worker_free = heapq.heappop(self._workers)
+            slot = max(limiter_slot, worker_free)
+            if limiter_slot > ready:
+                self.stats["rate_limit_stalls"] += 1
+                self.stats["rate_limit_wait_seconds"] += limiter_slot - ready
+            if worker_free > limiter_slot:
+                self.stats["worker_stalls"] += 1
+                self.stats["worker_wait_seconds"] += worker_free - limiter_slot
+            self._next_slot = slot + 1.0 / self.rate_limiter.rate
+            self.clock.advance_to(slot)
+            if busy_from is None:
+                busy_from = slot
+            if batch.started_at is None:
+                batch.started_at = slot
+            self.stats["max_queue_wait_seconds"] = max(
+                self.stats["max_queue_wait_seconds"], slot - batch.submitted_virtual
+            )
+
+            result = self._send(batch, batch.chat_ids[position])
+            done_at = slot + self.sender.next_latency()
+            heapq.heappush(self._workers, done_at)
+            last_done = max(last_done, done_at)
+            batch.finished_virtual = max(batch.finished_virtual or 0.0, done_at)
+            minute = int(slot // 60)
+            self.sends_per_minute[minute] = self.sends_per_minute.get(minute, 0) + 1
+            self.stats["sends"] += 1
+            batch._record(position, result)
+        if busy_from is not None:
+            self.stats["busy_seconds"] += last_done - busy_from
+        # 서비스는 전송이 끝날 때까지 기다렸다가 다음 체크로 넘어감
+        self.clock.advance_to(last_done)
+
+
+class _Discard:
+    """서비스의 스케줄별 로그 출력을 버림"""
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(fraction * len(ordered))) - 1)]
+
+
+def _prepare_schedules(path, target, start, end, parse_time):
+    """기간 안의 활성 스케줄은 미전송 상태로, 기간 밖은 비활성으로 바꾼 복사본 생성
+
+    Returns:
+        dict: 기간 안의 스케줄 ID -> 스케줄 시각 timestamp
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {"schedules": []}
+    in_range = {}
+    for item in data.get("schedules", []):
+        item.pop("rev", None)
+        try:
+            at = parse_time(item).timestamp()
+        except (KeyError, ValueError):
+            item["active"] = False
+            continue
+        if item.get("active") and start.timestamp() <= at < end.timestamp():
+            item["sent"] = False
+            item.pop("deliveries", None)
+            in_range[item["id"]] = at
+        else:
+            item["active"] = False
+    with open(target, 'w', encoding='utf-8') as f:
+        json.dump({"schedules": data.get("schedules", []), "version": 0}, f, ensure_ascii=False)
+    return in_range
+
+
+def _next_event(store, now, parse_time, retry_window):
+    """지금 이후 체크가 필요한 가장 이른 시각 (없으면 None)"""
+    earliest = None
+    for item in store.items():
+        if not item.get("active") or item.get("sent"):
+            continue
+        try:
+            at = parse_time(item).timestamp()
+        except (KeyError, ValueError):
+            continue
+        if item.get("deliveries"):
+            candidate = next_deferred_time(item)
+            if now - at <= retry_window:
+                candidate = now  # 재전송 기간에는 매 체크가 의미 있음
+        elif at + CHECK_INTERVAL >= now:
+            candidate = at - SEND_WINDOW  # 1분 전송 창에 들어오는 첫 체크
+        else:
+            continue  # 전송 창을 이미 놓침
+        if candidate is not None and (earliest is None or candidate < earliest):
+            earliest = candidate
+    return earliest
+
+
+def simulate(start, end, schedules_path="tv_schedules.json", users_path="users.json",
+             rate=DEFAULT_RATE, workers=8, latency=0.2, failure_rate=0.0, seed=0, tick_offset=0):
+    """start ~ end 의 스케줄을 가상 시계로 재생하고 보고서 dict 반환
+
+    tick_offset: 첫 체크를 start 보다 몇 초 뒤에 할지 (서비스를 정각이 아닌 때 시작한 경우 재현)
+    """
+    import schedule_service_server as server
+
+    wall_start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="tvsim_") as directory:
+        data_file = os.path.join(directory, "tv_schedules.json")
+        users_file = os.path.join(directory, "users.json")
+        scheduled = _prepare_schedules(schedules_path, data_file, start, end, server.parse_schedule_time)
+        if os.path.exists(users_path):
+            with open(users_path, 'r', encoding='utf-8') as src, open(users_file, 'w', encoding='utf-8') as dst:
+                dst.write(src.read())
+        clock = VirtualClock(start)
+        sender = MockSender(latency, failure_rate, seed)
+        tick_times = []
+        with contextlib.redirect_stdout(_Discard()):
+            service = server.ScheduleService(
+                clock=clock, data_file=data_file, users_file=users_file,
+                journal_file=os.path.join(directory, "delivery_journal.jsonl"),
+            )
+            service.telegram_sender = sender
+            # 재생은 한 번만 하므로 중복 전송 방지 저널은 쓰지 않음 (전송마다 파일 기록이 없어 빠름)
+            queue = SimulatedSendQueue(sender, clock, rate, workers)
+            service.send_queue = queue
+            service.metrics_file = None
+            service.running = True
+
+            # 마지막 스케줄 뒤 재전송 기간까지 재생
+            stop_at = end.timestamp() + server.RETRY_WINDOW_SECONDS
+            tick_at = start.timestamp() + tick_offset
+            while tick_at < stop_at:
+                clock.advance_to(tick_at)
+                tick_times.append(clock.time())
+                service.check_and_send_messages()
+                tick_at = clock.time() + CHECK_INTERVAL
+                upcoming = _next_event(service.store, clock.time(), server.parse_schedule_time,
+                                       server.RETRY_WINDOW_SECONDS)
+                if upcoming is None:
+                    break
+                if upcoming > tick_at:
+                    # 아무 일도 없는 체크는 건너뛰되 체크 주기 위상은 유지
+                    tick_at += math.ceil((upcoming - tick_at) / CHECK_INTERVAL) * CHECK_INTERVAL
+            queue.stop()
+        report = _build_report(service.store, queue, scheduled, start, end, tick_times)
+    report["settings"] = {"rate": rate, "workers": workers, "latency": latency,
+                          "failure_rate": failure_rate, "seed": seed, "tick_offset": tick_offset}
+    report["wall_seconds"] = round(time.perf_counter() - wall_start, 3)
+    return report
+
+
+def _build_report(store, queue, scheduled, start, end, tick_times):
+    batches = {}
+    for batch in queue.batches:
+        schedule_id = batch.key.rsplit("@", 1)[0] if batch.key else None
+        batches.setdefault(schedule_id, []).append(batch)
+
+    rows = []
+    for schedule_id, at in sorted(scheduled.items(), key=lambda pair: pair[1]):
+        item = store.get(schedule_id) or {}
+        counts = delivery_counts(item) if item.get("deliveries") else {}
+        sent_batches = [b for b in batches.get(schedule_id, ()) if b.started_at is not None]
+        row = {
+            "id": schedule_id,
+            "time": datetime.fromtimestamp(at, start.tzinfo).strftime("%Y-%m-%d %H:%M"),
+            "program_name": item.get("program_name"),
+            "channel": item.get("channel"),
+            "recipients": len(item.get("deliveries", {})),
+            "sent": counts.get(SENT, 0),
+            "failed": counts.get(FAILED, 0),
+            "deferred": counts.get(DEFERRED, 0),
+            "dropped": counts.get(DROPPED, 0),
+            "fire_lag": None,
+            "start_delay": None,
+            "completion_lag": None,
+        }
+        if sent_batches:
+            started = min(b.started_at for b in sent_batches)
+            row["fire_lag"] = round(started - at, 3)
+            row["completion_lag"] = round(max(b.finished_at for b in sent_batches) - at, 3)
+            # 전송 창(예정 1분 전)에 들어온 첫 체크부터 첫 전송까지
+            position = bisect.bisect_left(tick_times, at - SEND_WINDOW)
+            if position < len(tick_times):
+                row["start_delay"] = round(max(0.0, started - tick_times[position]), 3)
+        if item.get("sent"):
+            row["status"] = "sent"
+        elif item.get("deliveries"):
+            row["status"] = "incomplete"
+        else:
+            row["status"] = "missed"
+        rows.append(row)
+
+    fire_lags = [r["fire_lag"] for r in rows if r["fire_lag"] is not None]
+    start_delays = [r["start_delay"] for r in rows if r["start_delay"] is not None]
+    completion_lags = [r["completion_lag"] for r in rows if r["completion_lag"] is not None]
+    stats = queue.stats
+    summary = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "ticks": len(tick_times),
+        "schedules": len(rows),
+        "sent": sum(1 for r in rows if r["status"] == "sent"),
+        "incomplete": sum(1 for r in rows if r["status"] == "incomplete"),
+        "missed": sum(1 for r in rows if r["status"] == "missed"),
+        "fire_lag": {"p50": _percentile(fire_lags, 0.5), "p95": _percentile(fire_lags, 0.95),
+                     "max": max(fire_lags) if fire_lags else None},
+        "start_delay": {"p50": _percentile(start_delays, 0.5), "p95": _percentile(start_delays, 0.95),
+                        "max": max(start_delays) if start_delays else None},
+        "completion_lag": {"p50": _percentile(completion_lags, 0.5), "p95": _percentile(completion_lags, 0.95),
+                           "max": max(completion_lags) if completion_lags else None},
+        "sends": stats["sends"],
+        "throughput_per_second": round(stats["sends"] / stats["busy_seconds"], 2) if stats["busy_seconds"] else None,
+        "peak_sends_per_minute": max(queue.sends_per_minute.values()) if queue.sends_per_minute else 0,
+        "rate_limit_stalls": stats["rate_limit_stalls"],
+        "rate_limit_wait_seconds": round(stats["rate_limit_wait_seconds"], 3),
+        "worker_stalls": stats["worker_stalls"],
+        "worker_wait_seconds": round(stats["worker_wait_seconds"], 3),
+        "max_queue_wait_seconds": round(stats["max_queue_wait_seconds"], 3),
+    }
+    return {"summary": summary, "schedules": rows}
+
+
+def _format_seconds(value):
+    return "-" if value is None else f"{value:.1f}초"
+
+
+def print_report(report, top=10):
+    summary = report["summary"]
+    print(f"[SIM] {summary['start']} ~ {summary['end']} 재생 완료 "
+          f"(체크 {summary['ticks']}회, 실제 {report['wall_seconds']:.1f}초)")
+    print(f"[SIM] 스케줄 {summary['schedules']}개: 전송 완료 {summary['sent']}, "
+          f"미완료 {summary['incomplete']}, 놓침 {summary['missed']}")
+    for name, label in (("start_delay", "시작 지연 (전송 가능한 첫 체크 기준)"),
+                        ("fire_lag", "시작 시각 (예정 시각 기준, 음수는 미리 전송)"),
+                        ("completion_lag", "완료 시각 (예정 시각 기준)")):
+        lag = summary[name]
+        print(f"[SIM] {label}: 중앙값 {_format_seconds(lag['p50'])} / p95 {_format_seconds(lag['p95'])} "
+              f"/ 최대 {_format_seconds(lag['max'])}")
+    throughput = summary["throughput_per_second"]
+    print(f"[SIM] 전송 {summary['sends']}건, 전송 중 처리량 "
+          f"{'-' if throughput is None else f'{throughput}건/초'}, 분당 최대 {summary['peak_sends_per_minute']}건")
+    print(f"[SIM] 속도 제한 대기 {summary['rate_limit_stalls']}건 (누적 {summary['rate_limit_wait_seconds']:.1f}초), "
+          f"작업자 부족 대기 {summary['worker_stalls']}건 (누적 {summary['worker_wait_seconds']:.1f}초), "
+          f"최대 대기열 대기 {summary['max_queue_wait_seconds']:.1f}초")
+
+    problems = [r for r in report["schedules"] if r["status"] != "sent"]
+    slowest = sorted((r for r in report["schedules"] if r["start_delay"] is not None),
+                     key=lambda r: r["start_delay"], reverse=True)[:top]
+    for title, rows in (("전송 완료되지 않은 스케줄", problems), (f"시작 지연 상위 {top}개", slowest)):
+        if not rows:
+            continue
+        print(f"\n[SIM] {title}")
+        for r in rows:
+            print(f"  {r['time']} {r['channel']} {r['program_name']} [{r['status']}] "
+                  f"지연 {_format_seconds(r['start_delay'])} · 시작 {_format_seconds(r['fire_lag'])} · "
+                  f"완료 {_format_seconds(r['completion_lag'])} · "
+                  f"성공 {r['sent']} 실패 {r['failed']} 대기 {r['deferred']} 제외 {r['dropped']}")
+
+
+def _parse_moment(value, tz, end_of_day=False):
+    """"YYYY-MM-DD" 또는 "YYYY-MM-DD HH:MM" → 한국 시간 datetime (날짜만 준 끝 시각은 그날 자정 다음)"""
+    value = value.strip().replace("T", " ")
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            moment = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt == "%Y-%m-%d" and end_of_day:
+            moment += timedelta(days=1)
+        return tz.localize(moment)
+    raise argparse.ArgumentTypeError(f"날짜 형식이 아닙니다 (YYYY-MM-DD[ HH:MM]): {value}")
+
+
+def main(argv=None):
+    from schedule_service_server import KST
+
+    parser = argparse.ArgumentParser(description="가상 시계로 스케줄 서비스 재생")
+    parser.add_argument("start", help="시작 (YYYY-MM-DD 또는 \"YYYY-MM-DD HH:MM\")")
+    parser.add_argument("end", nargs="?", help="끝 (날짜만 주면 그날까지, 기본: 시작부터 하루)")
+    parser.add_argument("--schedules", default="tv_schedules.json", help="재생할 스케줄 파일")
+    parser.add_argument("--users", default="users.json", help="사용자 파일")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="초당 전송 수 한도")
+    parser.add_argument("--workers", type=int, default=8, help="동시 전송 수")
+    parser.add_argument("--latency", type=float, default=0.2, help="평균 API 응답 지연 (초)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="모의 전송 실패 비율 (0~1)")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    parser.add_argument("--tick-offset", type=float, default=0, help="첫 체크를 시작 시각보다 몇 초 뒤에 할지 (0~59)")
+    parser.add_argument("--top", type=int, default=10, help="시작 지연이 큰 스케줄을 몇 개 보여줄지")
+    parser.add_argument("--output", help="보고서 JSON 파일 경로")
+    args = parser.parse_args(argv)
+
+    start = _parse_moment(args.start, KST)
+    end = _parse_moment(args.end, KST, end_of_day=True) if args.end else start + timedelta(days=1)
+    if end <= start:
+        parser.error("끝 시각은 시작 시각보다 뒤여야 합니다.")
+
+    report = simulate(start, end, args.schedules, args.users, args.rate, args.workers,
+                      args.latency, args.failure_rate, args.seed, args.tick_offset)
+    print_report(report, args.top)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n[INFO] 보고서 저장: {args.output}")
+    return 0 if report["summary"]["missed"] == 0 and report["summary"]["incomplete"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
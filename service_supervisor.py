@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스케줄 서비스 감시자 (독립 실행 데몬)
+
+스케줄 서비스를 자식 프로세스로 실행하고, 비정상 종료되면 점점 늘어나는 간격으로 다시 시작합니다.
+웹 화면 세션과 관계없이 계속 실행되며, 로컬 소켓으로 상태 조회와 제어 명령을 받습니다.
+(Unix 소켓 schedule_service.sock, Unix 소켓을 쓸 수 없으면 127.0.0.1:9109 TCP)
+TCP 는 같은 컴퓨터의 다른 사용자도 접속할 수 있으므로, 감시자가 시작할 때 소유자만 읽을 수 있는
+토큰 파일(schedule_service.token)을 만들고 그 토큰을 함께 보낸 요청만 처리합니다.
+
+요청/응답은 한 줄짜리 JSON 입니다.
+    → {"command": "status"}                     (TCP 는 {"command": "status", "token": "..."})
+    ← {"ok": true, "state": "running", "pid": 1234, "uptime": 3600.0, "restarts": 0, ...}
+
+명령
+- status:   감시자/서비스 상태
+- health:   서비스가 살아 있고 최근 스케줄 확인(지표 파일의 마지막 성공 시각)이 제때 되었는지
+- start:    서비스 시작 (중지 상태였다면)
+- stop:     서비스 정상 종료 (감시자는 계속 실행, 다시 시작하지 않음)
+- reload:   서비스 정상 종료 후 다시 시작 (코드/설정 반영)
+- shutdown: 서비스와 감시자 모두 종료
+
+사용 예:
+    python service_supervisor.py run                # 감시자 실행 (서비스 인자는 -- 뒤에)
+    python service_supervisor.py status
+    python service_supervisor.py reload
+"""
+
+import argparse
+import hmac
+import json
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pytz
+
+from service_log import DEFAULT_LOG_FILE
+
+KST = pytz.timezone('Asia/Seoul')
+
+DEFAULT_SOCKET = "schedule_service.sock"
+DEFAULT_TCP_PORT = 9109
+DEFAULT_TOKEN_FILE = "schedule_service.token"
+SERVICE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule_service_server.py")
+
+# 비정상 종료 후 다시 시작하기까지 기다리는 시간 (연속으로 죽을수록 길게, 초)
+RESTART_BACKOFF = (1, 2, 5, 10, 30, 60)
+# 이 시간 이상 실행되었다면 안정된 것으로 보고 대기 시간을 처음부터
+STABLE_SECONDS = 60
+# 서비스에 종료를 요청한 뒤 강제 종료하기까지 기다리는 시간 (서비스 SHUTDOWN_TIMEOUT 40초 + 여유)
+STOP_TIMEOUT = 50
+# 마지막으로 성공한 스케줄 확인이 이보다 오래되면 health 실패 (초, 확인 주기 60초의 3배)
+HEALTH_MAX_TICK_AGE = 180
+
+RUNNING = "running"
+STOPPING = "stopping"
+BACKOFF = "backoff"
+STOPPED = "stopped"
+
+
+class SupervisorError(Exception):
+    """감시자에 연결할 수 없거나 응답이 잘못됨"""
+
+
+def default_address():
+    """감시자 주소 (Unix 소켓 경로 또는 (호스트, 포트)), 환경 변수 SUPERVISOR_SOCKET/SUPERVISOR_PORT 로 변경"""
+    port = os.environ.get("SUPERVISOR_PORT")
+    if port or not hasattr(socket, "AF_UNIX"):
+        return ("127.0.0.1", int(port or DEFAULT_TCP_PORT))
+    return os.path.abspath(os.environ.get("SUPERVISOR_SOCKET", DEFAULT_SOCKET))
+
+
+def token_file():
+    """TCP 명령 인증 토큰 파일 경로 (환경 변수 SUPERVISOR_TOKEN_FILE 로 변경)"""
+    return os.path.abspath(os.environ.get("SUPERVISOR_TOKEN_FILE", DEFAULT_TOKEN_FILE))
+
+
+def _write_token(path):
+    """새 토큰을 만들어 소유자만 읽고 쓸 수 있는 파일에 저장 (이전 파일은 지우고 새로 만듦)"""
+    token = secrets.token_hex(32)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    return token
+
+
+def _read_token(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    except OSError as e:
+        raise SupervisorError(f"감시자 토큰 파일을 읽을 수 없습니다: {e}")
+
+
+def _connect(address, timeout):
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def send_command(command, address=None, timeout=2.0):
+    """감시자에 명령을 보내고 응답 dict 반환
+
+    Raises:
+        SupervisorError: 감시자가 실행 중이 아니거나 응답이 잘못됨
+    """
+    address = address or default_address()
+    request = {"command": command}
+    if not isinstance(address, str):
+        request["token"] = _read_token(token_file())
+    try:
+        with _connect(address, timeout) as sock:
+            sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as reply:
+                line = reply.readline()
+    except OSError as e:
+        raise SupervisorError(f"감시자에 연결할 수 없습니다: {e}")
+    try:
+        return json.loads(line)
+    except ValueError:
+        raise SupervisorError(f"감시자 응답이 잘못되었습니다: {line[:200]!r}")
+
+
+def _timestamp():
+    return datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class Supervisor:
+    """스케줄 서비스 자식 프로세스 관리 (비정상 종료 시 재시작, 명령 처리)"""
+    def __init__(self, service_args=(), log_file=DEFAULT_LOG_FILE, metrics_file=None):
+        self.service_args = list(service_args)
+        self.log_file = os.path.abspath(log_file) if log_file else ""
+        self.metrics_file = os.path.abspath(metrics_file or os.environ.get("METRICS_FILE", "service_metrics.json"))
+        self.process = None
+        self.state = STOPPED
+        self.wanted = True         # 서비스가 실행 중이어야 하는지 (stop 명령이면 False)
+        self.running = True        # 감시자 자체 실행 여부
+        self.started_at = None     # 현재 서비스 프로세스 시작 시각
+        self.supervisor_started_at = time.time()
+        self.restarts = 0          # 비정상 종료 후 다시 시작한 횟수
+        self.consecutive_failures = 0
+        self.next_start_at = 0.0
+        self.last_exit = None      # {"code", "at", "uptime"}
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+
+    def log(self, message):
+        """감시자 메시지를 콘솔과 서비스 로그 파일에 기록 (웹 화면 로그 모니터에서도 보임)"""
+        print(message, flush=True)
+        if not self.log_file:
+            return
+        try:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(f"{_timestamp()} {message}\n")
+        except OSError:
+            pass
+
+    def _spawn(self):
+        command = [sys.executable, SERVICE_SCRIPT, "--log-file", self.log_file, *self.service_args]
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            # Windows 에서는 Ctrl+Break 로 정상 종료를 요청할 수 있도록 별도 프로세스 그룹으로 실행
+            creationflags=getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0),
+        )
+        self.started_at = time.time()
+        self.state = RUNNING
+        self.log(f"[START] 감시자: 스케줄 서비스 시작 (PID {self.process.pid})")
+
+    def _terminate(self, process, timeout=STOP_TIMEOUT):
+        """정상 종료 요청 → 진행 중인 전송을 저장할 때까지 대기 → 시한 초과 시 강제 종료 (종료 코드 반환)"""
+        try:
+            if os.name == "nt":
+                process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                process.terminate()
+            return process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.log(f"[WARNING] 감시자: 서비스가 {timeout}초 안에 끝나지 않아 강제 종료합니다.")
+            process.kill()
+            return process.wait(timeout=5)
+        except OSError:
+            return process.poll()
+
+    def _stop_child(self, reason):
+        """서비스 정상 종료 (기다리는 동안에도 status 명령에 바로 응답하도록 잠금 밖에서 대기)"""
+        with self._lock:
+            process = self.process
+            if process is None:
+                return
+            self.state = STOPPING
+        self.log(f"[STOP] 감시자: 스케줄 서비스 {reason} 요청")
+        code = self._terminate(process)
+        self.log(f"[STOP] 감시자: 스케줄 서비스 종료됨 (코드 {code})")
+        with self._lock:
+            if self.process is process:
+                self.process = None
+                self.started_at = None
+            self.state = STOPPED
+
+    def _check_child(self):
+        """자식 프로세스가 끝났으면 기록하고 다시 시작 예약"""
+        if self.process is None or self.state == STOPPING or self.process.poll() is None:
+            return
+        code = self.process.returncode
+        uptime = time.time() - (self.started_at or time.time())
+        self.last_exit = {"code": code, "at": time.time(), "uptime": round(uptime, 1)}
+        self.process = None
+        self.started_at = None
+        if uptime >= STABLE_SECONDS:
+            self.consecutive_failures = 0
+        delay = RESTART_BACKOFF[min(self.consecutive_failures, len(RESTART_BACKOFF) - 1)]
+        self.consecutive_failures += 1
+        self.restarts += 1
+        self.next_start_at = time.time() + delay
+        self.state = BACKOFF
+        self.log(f"[ERROR] 감시자: 스케줄 서비스가 종료됨 (코드 {code}, {uptime:.0f}초 실행), {delay}초 후 다시 시작")
+
+    def tick(self):
+        """상태 확인 한 번 (자식 종료 감지, 예약된 시작)"""
+        with self._lock:
+            self._check_child()
+            if self.wanted and self.process is None and self.state != STOPPING and time.time() >= self.next_start_at:
+                try:
+                    self._spawn()
+                except OSError as e:
+                    self.next_start_at = time.time() + RESTART_BACKOFF[-1]
+                    self.state = BACKOFF
+                    self.log(f"[ERROR] 감시자: 스케줄 서비스 시작 실패: {e}")
+
+    def status(self):
+        with self._lock:
+            self._check_child()
+            now = time.time()
+            return {
+                "ok": True,
+                "state": self.state,
+                "wanted": self.wanted,
+                "pid": self.process.pid if self.process else None,
+                "uptime": round(now - self.started_at, 1) if self.started_at else 0.0,
+                "restarts": self.restarts,
+                "next_start_in": round(max(0.0, self.next_start_at - now), 1) if self.state == BACKOFF else None,
+                "last_exit": self.last_exit,
+                "supervisor_pid": os.getpid(),
+                "supervisor_uptime": round(now - self.supervisor_started_at, 1),
+                "log_file": self.log_file,
+            }
+
+    def health(self):
+        """서비스가 살아 있고 최근에 스케줄 확인을 마쳤는지"""
+        status = self.status()
+        last_tick = None
+        try:
+            with open(self.metrics_file, 'r', encoding='utf-8') as f:
+                last_tick = json.load(f)["gauges"]["last_successful_tick_timestamp"] or None
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        tick_age = round(time.time() - last_tick, 1) if last_tick else None
+        alive = status["state"] == RUNNING
+        # 막 시작해 아직 첫 확인 전이면 실행 시간으로 판단
+        fresh = (tick_age is not None and tick_age <= HEALTH_MAX_TICK_AGE) or status["uptime"] <= HEALTH_MAX_TICK_AGE
+        status.update(healthy=alive and fresh, last_tick_age=tick_age)
+        return status
+
+    def handle(self, command):
+        """명령 처리 → 응답 dict"""
+        if command == "status":
+            return self.status()
+        if command == "health":
+            return self.health()
+        if command == "start":
+            with self._lock:
+                self.wanted = True
+                self.next_start_at = 0.0
+                self.consecutive_failures = 0
+            self.tick()
+            return self.status()
+        if command in ("stop", "reload"):
+            with self._lock:
+                self.wanted = False
+            self._stop_child("다시 시작" if command == "reload" else "중지")
+            with self._lock:
+                self.state = STOPPED
+                self.wanted = command == "reload"
+                self.next_start_at = 0.0
+                self.consecutive_failures = 0
+            self.tick()
+            return self.status()
+        if command == "shutdown":
+            self.request_shutdown()
+            return {"ok": True, "state": "shutting_down"}
+        return {"ok": False, "error": f"알 수 없는 명령입니다: {command}"}
+
+    def request_shutdown(self):
+        self.running = False
+        self._wake.set()
+
+    def shutdown(self):
+        with self._lock:
+            self.wanted = False
+        self._stop_child("종료")
+
+    def run(self):
+        """서비스를 시작하고 종료 요청까지 1초마다 상태 확인"""
+        while self.running:
+            self.tick()
+            self._wake.wait(1)
+        self.shutdown()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(64 * 1024)
+        try:
+            request = json.loads(line)
+            command = request["command"]
+            token = self.server.token
+            if token is not None and not hmac.compare_digest(str(request.get("token", "")), token):
+                reply = {"ok": False, "error": "감시자 인증 토큰이 올바르지 않습니다."}
+            else:
+                reply = self.server.supervisor.handle(command)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            reply = {"ok": False, "error": "요청 형식이 잘못되었습니다."}
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b"\n")
+
+
+def _serve(supervisor, address):
+    """명령 수신 서버를 백그라운드 스레드로 시작"""
+    if isinstance(address, str):
+        # 남아 있는 소켓 파일: 다른 감시자가 응답하면 중복 실행, 아니면 지움
+        if os.path.exists(address):
+            try:
+                send_command("status", address, timeout=1.0)
+            except SupervisorError:
+                os.remove(address)
+            else:
+                raise SupervisorError(f"감시자가 이미 실행 중입니다: {address}")
+        # 소켓 파일을 처음부터 소유자 전용(0o600)으로 만듦 (bind 후 chmod 하면 그 사이에 접속 가능)
+        old_umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(address, _Handler)
+        finally:
+            os.umask(old_umask)
+        server.token = None
+    else:
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        try:
+            server = socketserver.ThreadingTCPServer(address, _Handler)
+        except OSError as e:
+            raise SupervisorError(f"감시자 포트를 열 수 없습니다 (이미 실행 중일 수 있음): {e}")
+        # TCP 는 누구나 접속할 수 있으므로 소유자만 읽을 수 있는 토큰 파일로 인증
+        try:
+            server.token = _write_token(token_file())
+        except OSError as e:
+            server.server_close()
+            raise SupervisorError(f"감시자 토큰 파일을 만들 수 없습니다: {e}")
+    server.daemon_threads = True
+    server.supervisor = supervisor
+    threading.Thread(target=server.serve_forever, name="supervisor-ipc", daemon=True).start()
+    return server
+
+
+def run_supervisor(service_args=(), log_file=DEFAULT_LOG_FILE, address=None):
+    address = address or default_address()
+    supervisor = Supervisor(service_args, log_file)
+    server = _serve(supervisor, address)
+
+    def handle(signum, frame):
+        supervisor.log(f"[STOP] 감시자: 종료 신호 수신 ({signal.Signals(signum).name})")
+        supervisor.request_shutdown()
+
+    for name in ("SIGTERM", "SIGINT", "SIGBREAK"):
+        signum = getattr(signal, name, None)
+        if signum is not None:
+            signal.signal(signum, handle)
+
+    supervisor.log(f"[START] 감시자 시작 (PID {os.getpid()}, 명령 주소 {address})")
+    try:
+        supervisor.run()
+    finally:
+        server.shutdown()
+        server.server_close()
+        if isinstance(address, str) and os.path.exists(address):
+            os.remove(address)
+        if server.token is not None and os.path.exists(token_file()):
+            os.remove(token_file())
+        supervisor.log("[STOP] 감시자 종료")
+    return 0
+
+
+def spawn_supervisor(log_file=DEFAULT_LOG_FILE, service_args=()):
+    """감시자를 현재 프로세스와 분리된 백그라운드 프로세스로 실행 (웹 화면에서 사용)"""
+    command = [sys.executable, os.path.abspath(__file__), "run", "--log-file", log_file, "--", *service_args]
+    if os.name == "nt":
+        flags = getattr(subprocess, "DETACHED_PROCESS", 0) | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+        return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                stdin=subprocess.DEVNULL, creationflags=flags)
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            stdin=subprocess.DEVNULL, start_new_session=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="스케줄 서비스 감시자")
+    parser.add_argument("command", choices=["run", "status", "health", "start", "stop", "reload", "shutdown"],
+                        help="run 은 감시자 실행, 나머지는 실행 중인 감시자에 보낼 명령")
+    parser.add_argument("--log-file", default=DEFAULT_LOG_FILE, help="서비스 로그 파일")
+    # -- 뒤의 인자는 그대로 서비스에 넘김
+    argv = list(sys.argv[1:] if argv is None else argv)
+    service_args = []
+    if "--" in argv:
+        position = argv.index("--")
+        argv, service_args = argv[:position], argv[position + 1:]
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        try:
+            return run_supervisor(service_args, args.log_file)
+        except SupervisorError as e:
+            print(f"[ERROR] {e}")
+            return 1
+
+    timeout = STOP_TIMEOUT + 10 if args.command in ("stop", "reload", "shutdown") else 2.0
+    try:
+        reply = send_command(args.command, timeout=timeout)
+    except SupervisorError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    print(json.dumps(reply, ensure_ascii=False, indent=2))
+    if args.command == "health":
+        return 0 if reply.get("healthy") else 2
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
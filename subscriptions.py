@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+사용자별 채널/프로그램 구독과 역색인
+
+사용자 항목에 구독 정보를 둡니다 (둘 다 비어 있으면 모든 방송을 받음).
+    {"id": 6532057457, "name": "정재명", "active": true,
+     "channels": ["KBS1", "MBC"], "keywords": ["뉴스", "드라마"]}
+
+방송 알림 대상은 채널이 구독 목록에 있거나 프로그램명에 구독 키워드가 들어 있는 활성 사용자입니다.
+SubscriptionIndex 는 채널 → 사용자, 키워드 → 사용자 역색인을 들고 있어서
+스케줄마다 전체 사용자를 훑지 않고 집합 연산으로 수신자를 구합니다.
+"""
+
+
+def normalize_keyword(keyword):
+    return keyword.strip().casefold()
+
+
+def parse_keywords(text):
+    """쉼표로 구분한 키워드 입력을 리스트로 변환 (빈 값/중복 제거)"""
+    keywords = []
+    for keyword in text.split(","):
+        keyword = keyword.strip()
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+
+def has_subscriptions(user):
+    return bool(user.get("channels") or user.get("keywords"))
+
+
+def matches(user, schedule_item):
+    """사용자가 이 스케줄 알림을 받아야 하는지 (구독이 없으면 모든 방송)"""
+    if not has_subscriptions(user):
+        return True
+    if schedule_item.get("channel") in user.get("channels", ()):
+        return True
+    program_name = schedule_item.get("program_name", "").casefold()
+    return any(normalize_keyword(k) in program_name for k in user.get("keywords", ()) if k.strip())
+
+
+def subscription_label(user):
+    """사용자 목록에 보여줄 구독 요약"""
+    if not has_subscriptions(user):
+        return "전체 방송"
+    parts = []
+    if user.get("channels"):
+        parts.append("채널: " + ", ".join(user["channels"]))
+    if user.get("keywords"):
+        parts.append("키워드: " + ", ".join(user["keywords"]))
+    return " · ".join(parts)
+
+
+class SubscriptionIndex:
+    """활성 사용자의 구독 역색인 (사용자 변경 시 해당 사용자만 갱신)"""
+    def __init__(self):
+        self.everyone = set()     # 구독 설정이 없어 모든 방송을 받는 사용자
+        self.by_channel = {}      # 채널 -> 사용자 ID 집합
+        self.by_keyword = {}      # 정규화한 키워드 -> 사용자 ID 집합
+        self._entries = {}        # 사용자 ID -> (채널 튜플, 키워드 튜플)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        channels, keywords = entry
+        if not channels and not keywords:
+            self.everyone.discard(user_id)
+        for index, values in ((self.by_channel, channels), (self.by_keyword, keywords)):
+            for value in values:
+                users = index.get(value)
+                if users is not None:
+                    users.discard(user_id)
+                    if not users:
+                        del index[value]
+
+    def update(self, user):
+        """사용자 추가/변경 반영 (비활성 사용자는 색인에서 뺌)"""
+        user_id = user["id"]
+        self._discard(user_id)
+        if not user.get("active"):
+            return
+        channels = tuple(dict.fromkeys(user.get("channels", ())))
+        keywords = tuple(dict.fromkeys(normalize_keyword(k) for k in user.get("keywords", ()) if k.strip()))
+        self._entries[user_id] = (channels, keywords)
+        if not channels and not keywords:
+            self.everyone.add(user_id)
+            return
+        for channel in channels:
+            self.by_channel.setdefault(channel, set()).add(user_id)
+        for keyword in keywords:
+            self.by_keyword.setdefault(keyword, set()).add(user_id)
+
+    def remove(self, user_id):
+        self._discard(user_id)
+
+    def recipients(self, schedule_item):
+        """알림 대상 사용자 ID 집합 = 전체 구독자 ∪ 채널 구독자 ∪ 키워드 구독자"""
+        result = set(self.everyone)
+        result |= self.by_channel.get(schedule_item.get("channel"), set())
+        program_name = schedule_item.get("program_name", "").casefold()
+        # 키워드 종류 수만큼만 확인 (사용자 수와 무관)
+        for keyword, users in self.by_keyword.items():
+            if keyword in program_name:
+                result |= users
+        return result
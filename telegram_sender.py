@@ -4,25 +4,34 @@
 텔레그램 메시지 전송 프로그램
 """
 
+import os
 import requests
 import json
 import ssl
 import urllib3
 from config import BOT_TOKEN, CHAT_ID, CHAT_IDS
+from parallel_fanout import fan_out
 
 # SSL 경고 비활성화 (개발 환경에서만 사용)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# 수신자가 이 인원 이상이면 여러 프로세스로 나눠 전송
+PARALLEL_FANOUT_THRESHOLD = 5000
+# 텔레그램 API 요청 제한 시간 (초, 응답이 없을 때 전송 작업자가 멈추지 않도록)
+REQUEST_TIMEOUT = 30
+
 
 class TelegramSender:
-    def __init__(self, bot_token=None, chat_id=None):
+    def __init__(self, bot_token=None, chat_id=None, session=None):
         """
         텔레그램 메시지 전송 클래스 초기화
         
         Args:
             bot_token (str): 텔레그램 봇 토큰
             chat_id (str): 메시지를 받을 채팅 ID
+            session (requests.Session): send_message_to_chat 에 쓸 연결 풀 (None이면 요청마다 연결)
         """
+        self.session = session
         self.bot_token = bot_token or BOT_TOKEN
         self.chat_id = chat_id or CHAT_ID
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
@@ -47,7 +56,7 @@ class TelegramSender:
         }
         
         try:
-            response = requests.post(url, data=data, verify=False)
+            response = requests.post(url, data=data, verify=False, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -80,7 +89,7 @@ class TelegramSender:
                     "chat_id": self.chat_id,
                     "caption": caption
                 }
-                response = requests.post(url, files=files, data=data, verify=False)
+                response = requests.post(url, files=files, data=data, verify=False, timeout=REQUEST_TIMEOUT)
                 response.raise_for_status()
                 return response.json()
         except FileNotFoundError:
@@ -110,7 +119,7 @@ class TelegramSender:
                     "chat_id": self.chat_id,
                     "caption": caption
                 }
-                response = requests.post(url, files=files, data=data, verify=False)
+                response = requests.post(url, files=files, data=data, verify=False, timeout=REQUEST_TIMEOUT)
                 response.raise_for_status()
                 return response.json()
         except FileNotFoundError:
@@ -130,14 +139,50 @@ class TelegramSender:
         url = f"{self.base_url}/getUpdates"
         
         try:
-            response = requests.get(url, verify=False)
+            response = requests.get(url, verify=False, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"업데이트 가져오기 실패: {e}")
             return None
     
-    def send_message_to_multiple(self, message, chat_ids=None, parse_mode="HTML"):
+    def send_message_to_chat(self, chat_id, message, parse_mode="HTML"):
+        """
+        지정한 채팅 한 곳에 메시지 전송
+        
+        Args:
+            chat_id: 채팅 ID
+            message (str): 전송할 메시지
+            parse_mode (str): 메시지 파싱 모드
+        
+        Returns:
+            dict: 전송 결과 ({"chat_id", "success", "result"/"error", "message_id"})
+        """
+        url = f"{self.base_url}/sendMessage"
+        data = {
+            "chat_id": chat_id,
+            "text": message,
+            "parse_mode": parse_mode
+        }
+        
+        try:
+            response = (self.session or requests).post(url, data=data, verify=False, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            result = response.json()
+            message_id = (result.get("result") or {}).get("message_id")
+            print(f"✅ 메시지 전송 성공 (채팅 ID: {chat_id})")
+            return {"chat_id": chat_id, "success": True, "result": result, "message_id": message_id}
+        except requests.exceptions.RequestException as e:
+            print(f"❌ 메시지 전송 실패 (채팅 ID: {chat_id}): {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                try:
+                    error_detail = e.response.json()
+                    print(f"   오류 상세: {error_detail}")
+                except:
+                    print(f"   응답 내용: {e.response.text}")
+            return {"chat_id": chat_id, "success": False, "error": str(e)}
+    
+    def send_message_to_multiple(self, message, chat_ids=None, parse_mode="HTML", workers=None, key=None):
         """
         여러 채팅에 메시지 전송
         
@@ -145,6 +190,8 @@ class TelegramSender:
             message (str): 전송할 메시지
             chat_ids (list): 채팅 ID 리스트 (None이면 config에서 가져옴)
             parse_mode (str): 메시지 파싱 모드
+            workers (int): 전송 프로세스 수 (None이면 수신자가 PARALLEL_FANOUT_THRESHOLD 명 이상일 때만 CPU 수)
+            key (str): 다중 프로세스 전송 시 전송 저널에 쓸 스케줄 회차 (delivery_journal.occurrence_key)
         
         Returns:
             list: 각 전송 결과 리스트
@@ -152,34 +199,18 @@ class TelegramSender:
         if chat_ids is None:
             chat_ids = CHAT_IDS
         
+        if workers is None:
+            workers = (os.cpu_count() or 1) if len(chat_ids) >= PARALLEL_FANOUT_THRESHOLD else 1
+        if workers > 1:
+            # chat_id 해시로 나눠 여러 프로세스에서 전송 (공유 속도 제한과 전송 저널 사용)
+            return fan_out(self.bot_token, message, chat_ids, parse_mode, workers=workers, key=key)
+        
         results = []
         print(f"📤 {len(chat_ids)}명에게 메시지 전송 시작...")
         
         for i, chat_id in enumerate(chat_ids, 1):
             print(f"[{i}/{len(chat_ids)}] 채팅 ID {chat_id}로 전송 중...")
-            
-            url = f"{self.base_url}/sendMessage"
-            data = {
-                "chat_id": chat_id,
-                "text": message,
-                "parse_mode": parse_mode
-            }
-            
-            try:
-                response = requests.post(url, data=data, verify=False)
-                response.raise_for_status()
-                result = response.json()
-                results.append({"chat_id": chat_id, "success": True, "result": result})
-                print(f"✅ 메시지 전송 성공 (채팅 ID: {chat_id})")
-            except requests.exceptions.RequestException as e:
-                results.append({"chat_id": chat_id, "success": False, "error": str(e)})
-                print(f"❌ 메시지 전송 실패 (채팅 ID: {chat_id}): {e}")
-                if hasattr(e, 'response') and e.response is not None:
-                    try:
-                        error_detail = e.response.json()
-                        print(f"   오류 상세: {error_detail}")
-                    except:
-                        print(f"   응답 내용: {e.response.text}")
+            results.append(self.send_message_to_chat(chat_id, message, parse_mode))
         
         # 결과 요약
         success_count = sum(1 for r in results if r["success"])
@@ -217,7 +248,7 @@ class TelegramSender:
                         "chat_id": chat_id,
                         "caption": caption
                     }
-                    response = requests.post(url, files=files, data=data, verify=False)
+                    response = requests.post(url, files=files, data=data, verify=False, timeout=REQUEST_TIMEOUT)
                     response.raise_for_status()
                     result = response.json()
                     results.append({"chat_id": chat_id, "success": True, "result": result})
@@ -9,133 +9,156 @@ import json
 import os
 import pandas as pd
 from datetime import datetime, timedelta
+from collections import deque
 import time
 import threading
+import tempfile
 from telegram_sender import TelegramSender
+from json_store import JsonStore, StoreError, ConflictError
+from delivery_state import record_many, unserved_recipients, delivery_counts
+from send_queue import get_send_queue, BULK
+from service_log import DEFAULT_LOG_FILE, LogTailer, split_line
+from service_supervisor import STOP_TIMEOUT, SupervisorError, send_command, spawn_supervisor
+from log_buffer import LogBuffer, LEVELS, ERROR, WARNING, format_line
+from send_jobs import JobRunner, RUNNING, DONE, CANCELLED, FAILED
+from delivery_journal import occurrence_key
+from subscriptions import matches, parse_keywords, subscription_label
+from quiet_hours import QuietHoursIndex, DEFER, POLICIES, DEFAULT_TIMEZONE, describe as describe_quiet_hours
+from epg_import import EpgError, import_epg
+from data_transfer import SCHEDULES, USERS, FORMATS, describe_import, detect_format, export_store, import_records
+from schedule_index import ScheduleIndex
+from schedule_frame import FILTERS as SCHEDULE_FILTERS, SORTS as SCHEDULE_SORTS, GROUPS as SCHEDULE_GROUPS, build_frame, query_frame, summarize
+from segments import SegmentIndex, SegmentError, parse_audience, parse_segments, segment_names, valid_segment_name
 import pytz
-import subprocess
-import queue
-import sys
 
 # 한국 시간대 설정
 KST = pytz.timezone('Asia/Seoul')
 
+# 자주 쓰는 채널 (빠른 채널 선택, 구독 채널 선택지)
+POPULAR_CHANNELS = ["KBS1", "KBS2", "MBC", "SBS", "tvN", "JTBC", "채널A", "MBN", "EBS", "KBS WORLD"]
+# 백그라운드 전송 작업이 중간 결과를 저장하는 간격 (초)
+JOB_CHECKPOINT_INTERVAL = 2.0
+# 스케줄 목록 한 페이지에 보여줄 행 수 선택지
+PAGE_SIZES = [50, 100, 200, 500]
+# 시간대 선택지 맨 앞에 보여줄 시간대
+COMMON_TIMEZONES = ["Asia/Seoul", "Asia/Tokyo", "America/Los_Angeles", "America/New_York", "Europe/London", "Europe/Berlin"]
+
 def get_korean_time():
     """한국 시간을 반환"""
     return datetime.now(KST)
 
 
+# 로그 모니터가 보관할 최근 로그 줄 수와 화면에 보여줄 줄 수
+LOG_BUFFER_LINES = 2000
+LOG_DISPLAY_LINES = 50
+# 서비스에 종료를 요청한 뒤 강제 종료하기까지 기다리는 시간 (초, 감시자가 같은 값으로 기다림)
+# 서비스는 SHUTDOWN_TIMEOUT(기본 40초) 안에 진행 중인 전송을 마치거나 남은 수신자를 저장함
+SERVICE_STOP_TIMEOUT = STOP_TIMEOUT
+# 감시자를 띄운 뒤 명령을 받을 준비가 될 때까지 기다리는 시간 (초)
+SUPERVISOR_START_TIMEOUT = 5
+# 화면 일부만 다시 그리는 주기 (초): 시계, 로그/전송 진행 상황, 오늘의 방송 목록·카운터
+CLOCK_REFRESH_SECONDS = 1
+LIVE_REFRESH_SECONDS = 5
+SCHEDULE_REFRESH_SECONDS = 30
+
+
 class LogMonitor:
-    """스케줄 서비스 로그 모니터링 클래스"""
-    def __init__(self):
-        self.log_queue = queue.Queue()
-        self.process = None
+    """스케줄 서비스 로그 모니터링 클래스
+    
+    서비스는 감시자(service_supervisor.py)가 웹 화면과 따로 실행/재시작하고, 이 클래스는 감시자에
+    로컬 소켓으로 명령/상태 조회만 보냅니다. 로그는 서비스가 쓰는 로그 파일(service_log.DEFAULT_LOG_FILE)을
+    마지막으로 읽은 위치부터 이어 읽으므로, 화면이 로그를 읽지 않아도 서비스 출력이 막히지 않습니다.
+    """
+    def __init__(self, log_file=DEFAULT_LOG_FILE):
+        self.log_file = os.path.abspath(log_file)
+        self.tailer = LogTailer(self.log_file)
         self.monitoring = False
-        self.logs = []
-        self.max_logs = 100  # 최대 로그 개수
+        # 최근 로그만 보관하는 링 버퍼 (화면은 커서 이후의 새 줄만 읽음)
+        self.logs = LogBuffer(LOG_BUFFER_LINES)
     
-    def start_monitoring(self):
-        """로그 모니터링 시작"""
+    def attach(self):
+        """이미 실행 중인 서비스의 로그 파일 이어 읽기 시작"""
         if self.monitoring:
             return True, "이미 모니터링 중입니다."
-        
+        self.monitoring = True
+        self.logs.append(f"[SYSTEM] 로그 파일 모니터링 시작됨: {self.log_file}")
+        self.poll()
+        return True, "로그 파일 모니터링을 시작했습니다."
+    
+    def service_status(self):
+        """감시자가 알려 주는 서비스 상태/헬스 (감시자가 실행 중이 아니면 None)"""
         try:
-            # 스케줄 서비스 프로세스 시작
-            self.process = subprocess.Popen(
-                [sys.executable, "schedule_service_server.py"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=0,  # 버퍼링 비활성화
-                encoding='utf-8',  # 명시적 인코딩
-                errors='replace'  # 인코딩 오류 처리
-            )
-            
-            self.monitoring = True
-            
-            # 로그 읽기 스레드 시작
-            log_thread = threading.Thread(target=self._read_logs, daemon=True)
-            log_thread.start()
-            
-            # 초기 로그 추가
-            timestamp = get_korean_time().strftime('%H:%M:%S')
-            self.logs.append(f"[{timestamp}] [SYSTEM] 로그 모니터링 시작됨")
-            
-            return True, "로그 모니터링이 시작되었습니다."
-        except Exception as e:
-            self.monitoring = False
-            self.process = None
-            return False, f"로그 모니터링 시작 실패: {e}"
+            return send_command("health", timeout=1.0)
+        except SupervisorError:
+            return None
     
-    def stop_monitoring(self):
-        """로그 모니터링 중지"""
-        if not self.monitoring:
-            return True, "모니터링이 이미 중지되어 있습니다."
-        
-        self.monitoring = False
-        
-        if self.process:
+    def start_monitoring(self):
+        """스케줄 서비스를 시작하고 로그 모니터링 시작 (감시자가 없으면 백그라운드로 실행)"""
+        try:
+            send_command("start")
+            message = "스케줄 서비스 시작을 요청했습니다."
+        except SupervisorError:
             try:
-                self.process.terminate()
-                self.process.wait(timeout=5)
-            except:
-                try:
-                    self.process.kill()
-                except:
-                    pass
-            finally:
-                self.process = None
-        
-        return True, "로그 모니터링이 중지되었습니다."
+                spawn_supervisor(self.log_file)
+            except OSError as e:
+                return False, f"감시자 시작 실패: {e}"
+            # 감시자가 명령을 받을 준비가 될 때까지 잠시 대기
+            deadline = time.time() + SUPERVISOR_START_TIMEOUT
+            while self.service_status() is None:
+                if time.time() >= deadline:
+                    return False, "감시자가 응답하지 않습니다. 로그 파일을 확인하세요."
+                time.sleep(0.2)
+            message = "감시자와 스케줄 서비스를 시작했습니다."
+        self.attach()
+        return True, message
+    
+    def reload_service(self):
+        """서비스 정상 종료 후 다시 시작 (코드/설정 반영)"""
+        try:
+            status = send_command("reload", timeout=SERVICE_STOP_TIMEOUT + 10)
+        except SupervisorError as e:
+            return False, str(e)
+        return True, f"스케줄 서비스를 다시 시작했습니다 (PID {status.get('pid')})."
     
-    def _read_logs(self):
-        """로그를 읽어서 큐에 저장"""
-        while self.monitoring and self.process:
-            try:
-                line = self.process.stdout.readline()
-                if line:
-                    timestamp = get_korean_time().strftime('%H:%M:%S')
-                    log_entry = f"[{timestamp}] {line.strip()}"
-                    self.log_queue.put(log_entry)
-                    
-                    # 로그 개수 제한
-                    if len(self.logs) >= self.max_logs:
-                        self.logs.pop(0)
-                    self.logs.append(log_entry)
-                elif self.process.poll() is not None:
-                    # 프로세스가 종료됨
-                    timestamp = get_korean_time().strftime('%H:%M:%S')
-                    self.logs.append(f"[{timestamp}] [SYSTEM] 프로세스가 종료됨")
-                    self.monitoring = False
-                    break
-                else:
-                    time.sleep(0.1)
-            except Exception as e:
-                timestamp = get_korean_time().strftime('%H:%M:%S')
-                self.logs.append(f"[{timestamp}] [ERROR] 로그 읽기 오류: {e}")
-                break
+    def stop_monitoring(self):
+        """서비스 중지 요청 후 로그 모니터링 중지 (감시자는 계속 실행되어 다시 시작 명령을 받음)"""
+        message = "로그 모니터링이 중지되었습니다."
+        try:
+            # 감시자가 정상 종료를 요청하고, 진행 중인 전송을 저장할 때까지 기다렸다가 응답
+            status = send_command("stop", timeout=SERVICE_STOP_TIMEOUT + 10)
+            if status.get("state") == "stopped":
+                message = "스케줄 서비스를 중지했습니다."
+        except SupervisorError:
+            if not self.monitoring:
+                return True, "모니터링이 이미 중지되어 있습니다."
+        
+        # 종료 중에 나온 로그까지 읽은 뒤 모니터링 중지
+        self.poll()
+        self.monitoring = False
+        return True, message
     
-    def get_logs(self):
-        """현재까지의 로그 반환"""
-        return self.logs
+    def poll(self):
+        """로그 파일에 새로 쓰인 줄을 링 버퍼에 추가 (추가한 줄 수 반환)"""
+        if not self.monitoring:
+            return 0
+        try:
+            lines = self.tailer.read_lines()
+        except OSError as e:
+            self.logs.append(f"[ERROR] 로그 읽기 오류: {e}")
+            return 0
+        for line in lines:
+            timestamp, text = split_line(line)
+            self.logs.append(text, timestamp=timestamp)
+        return len(lines)
+    
+    def get_logs(self, cursor=0, levels=None, text="", limit=None):
+        """로그 파일의 새 줄을 반영한 뒤 cursor 이후의 로그 반환 (LogLine 리스트, 새 커서)"""
+        self.poll()
+        return self.logs.since(cursor, levels, text, limit)
     
     def is_monitoring(self):
         """모니터링 상태 확인"""
-        if not self.monitoring or self.process is None:
-            return False
-        
-        # 프로세스가 실제로 실행 중인지 확인
-        try:
-            if self.process.poll() is not None:  # 프로세스가 종료됨
-                self.monitoring = False
-                self.process = None
-                return False
-        except:
-            self.monitoring = False
-            self.process = None
-            return False
-        
-        return True
+        return self.monitoring
 
 
 # 페이지 설정
@@ -196,36 +219,43 @@ st.markdown("""
 class UserManager:
     def __init__(self, data_file="users.json"):
         self.data_file = data_file
-        self.users = self.load_users()
+        self.store = JsonStore(data_file, "users")
+        self._segments = None  # (사용자 데이터 버전, SegmentIndex): 세션 스레드가 함께 쓰므로 한 번에 교체
+        if self.store.last_error:
+            st.warning(f"사용자 데이터 로드 오류: {self.store.last_error}")
+    
+    @property
+    def users(self):
+        return self.store.data
     
     def load_users(self):
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # 데이터 구조 검증
-                    if "users" not in data:
-                        data = {"users": []}
-                    return data
-            except (json.JSONDecodeError, FileNotFoundError) as e:
-                st.warning(f"사용자 데이터 로드 오류: {e}")
-                return {"users": []}
-        return {"users": []}
-    
-    def save_users(self):
+        self.store.refresh()
+        return self.store.data
+    
+    def _commit(self, mutate, success_message, failure_message):
+        """잠금을 잡은 상태에서 최신 데이터에 변경을 적용하고 저장"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.users, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
+            with self.store.transaction() as tx:
+                result = mutate(tx)
+        except ConflictError as e:
+            return False, str(e)
+        except (StoreError, OSError) as e:
             st.error(f"❌ 사용자 데이터 저장 실패: {e}")
-            return False
+            return False, failure_message
+        if result is False:
+            return False, failure_message
+        return True, success_message.replace("{result}", str(result))
     
     def add_user(self, user_id, name=""):
-        # 중복 확인
-        for user in self.users["users"]:
-            if user["id"] == user_id:
-                return False, f"사용자 ID {user_id}는 이미 등록되어 있습니다."
+        # 채팅 ID 는 가져오기(data_transfer)와 같은 숫자 형식으로 저장
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return False, "사용자 ID는 숫자여야 합니다."
+
+        # 중복 확인 (예전에 문자열로 저장된 ID 포함)
+        if self.store.get(user_id) is not None or self.store.get(str(user_id)) is not None:
+            return False, f"사용자 ID {user_id}는 이미 등록되어 있습니다."
         
         new_user = {
             "id": user_id,
@@ -233,73 +263,199 @@ class UserManager:
             "active": True
         }
         
-        self.users["users"].append(new_user)
-        
-        if self.save_users():
-            return True, f"사용자 {name} ({user_id})가 성공적으로 추가되었습니다!"
-        else:
-            return False, f"사용자 추가에 실패했습니다."
+        return self._commit(
+            lambda tx: tx.insert(new_user),
+            f"사용자 {name} ({user_id})가 성공적으로 추가되었습니다!",
+            "사용자 추가에 실패했습니다."
+        )
     
     def remove_user(self, user_id):
-        for i, user in enumerate(self.users["users"]):
-            if user["id"] == user_id:
-                removed_user = self.users["users"].pop(i)
-                if self.save_users():
-                    return True, f"사용자 {removed_user['name']} ({user_id})가 제거되었습니다."
-                else:
-                    return False, f"사용자 제거에 실패했습니다."
-        
-        return False, f"사용자 ID {user_id}를 찾을 수 없습니다."
+        user = self.store.get(user_id)
+        if user is None:
+            return False, f"사용자 ID {user_id}를 찾을 수 없습니다."
+        
+        return self._commit(
+            lambda tx: tx.remove(user_id) is not None,
+            f"사용자 {user['name']} ({user_id})가 제거되었습니다.",
+            "사용자 제거에 실패했습니다."
+        )
     
     def get_active_user_ids(self):
         return [user["id"] for user in self.users["users"] if user["active"]]
     
+    def get_recipients(self, schedule):
+        """이 방송을 받을 활성 사용자 ID 리스트 (audience 식이 있으면 그룹 식, 없으면 구독 설정)"""
+        if schedule.get("audience"):
+            return list(self.get_segments().resolve(schedule["audience"]))
+        return [user["id"] for user in self.users["users"] if user["active"] and matches(user, schedule)]
+    
+    def get_segments(self):
+        """그룹 비트맵 색인 (사용자 데이터 버전이 바뀔 때만 다시 만듦)"""
+        cached = self._segments
+        version = self.store.version
+        if cached is None or cached[0] != version:
+            cached = (version, SegmentIndex.from_users(self.users["users"]))
+            self._segments = cached
+        return cached[1]
+    
     def toggle_user_status(self, user_id):
-        for user in self.users["users"]:
-            if user["id"] == user_id:
-                user["active"] = not user["active"]
-                status = "활성화" if user["active"] else "비활성화"
-                if self.save_users():
-                    return True, f"사용자 {user['name']} ({user_id}) 상태 변경: {status}"
-                else:
-                    return False, f"사용자 상태 변경에 실패했습니다."
+        user = self.store.get(user_id)
+        if user is None:
+            return False, f"사용자 ID {user_id}를 찾을 수 없습니다."
+        
+        def mutate(tx):
+            current = tx.get(user_id)
+            if current is None:
+                return False
+            tx.update(user_id, active=not current["active"])
+            return "활성화" if current["active"] else "비활성화"
         
-        return False, f"사용자 ID {user_id}를 찾을 수 없습니다."
+        return self._commit(
+            mutate,
+            f"사용자 {user['name']} ({user_id}) 상태 변경: {{result}}",
+            "사용자 상태 변경에 실패했습니다."
+        )
+    
+    def rename_user(self, user_id, name):
+        return self._commit(
+            lambda tx: tx.update(user_id, name=name) is not None,
+            f"사용자 '{name}' 정보가 업데이트되었습니다.",
+            "사용자 정보 업데이트에 실패했습니다."
+        )
+    
+    def set_delivery_preferences(self, user_id, timezone, quiet_hours):
+        """사용자의 시간대와 방해 금지 시간 변경 (quiet_hours 가 None 이면 방해 금지 해제)"""
+        return self._commit(
+            lambda tx: tx.update(user_id, timezone=timezone, quiet_hours=quiet_hours) is not None,
+            "알림 시간 설정이 저장되었습니다.",
+            "알림 시간 설정 저장에 실패했습니다."
+        )
+    
+    def set_segments(self, user_id, segments):
+        """사용자가 속한 그룹 이름 변경"""
+        invalid = [name for name in segments if not valid_segment_name(name)]
+        if invalid:
+            return False, f"그룹 이름에 공백이나 연산자 기호를 쓸 수 없습니다: {', '.join(invalid)}"
+        return self._commit(
+            lambda tx: tx.update(user_id, segments=list(segments)) is not None,
+            "그룹 설정이 저장되었습니다.",
+            "그룹 설정 저장에 실패했습니다."
+        )
+    
+    def set_subscriptions(self, user_id, channels, keywords):
+        """사용자의 구독 채널/키워드 변경 (둘 다 비우면 모든 방송 수신)"""
+        return self._commit(
+            lambda tx: tx.update(user_id, channels=list(channels), keywords=list(keywords)) is not None,
+            "구독 설정이 저장되었습니다.",
+            "구독 설정 저장에 실패했습니다."
+        )
+    
+    def update_user(self, user_id, name, channels, keywords, segments, timezone, quiet_hours):
+        """편집 화면의 모든 필드를 검증한 뒤 한 트랜잭션으로 저장 (일부만 바뀐 채 남지 않도록)"""
+        if not name:
+            return False, "사용자 이름을 입력하세요."
+        invalid = [segment for segment in segments if not valid_segment_name(segment)]
+        if invalid:
+            return False, f"그룹 이름에 공백이나 연산자 기호를 쓸 수 없습니다: {', '.join(invalid)}"
+        return self._commit(
+            lambda tx: tx.update(
+                user_id, name=name, channels=list(channels), keywords=list(keywords),
+                segments=list(segments), timezone=timezone, quiet_hours=quiet_hours
+            ) is not None,
+            f"사용자 '{name}' 정보가 업데이트되었습니다.",
+            "사용자 정보 업데이트에 실패했습니다."
+        )
+    
+    def set_all_active(self, active):
+        def mutate(tx):
+            for user in tx.items():
+                if user["active"] != active:
+                    tx.update(user["id"], active=active)
+        
+        status = "활성화" if active else "비활성화"
+        return self._commit(
+            mutate,
+            f"모든 사용자가 {status}되었습니다.",
+            f"사용자 {status}에 실패했습니다."
+        )
+    
+    def remove_inactive_users(self):
+        return self._commit(
+            lambda tx: tx.remove_where(lambda u: not u["active"]),
+            "{result}명의 비활성 사용자가 삭제되었습니다.",
+            "사용자 삭제에 실패했습니다."
+        )
+    
+    def restore_users(self, users):
+        return self._commit(
+            lambda tx: tx.replace_all(users),
+            "사용자 데이터가 복원되었습니다.",
+            "데이터 복원에 실패했습니다."
+        )
 
 
 class TVScheduler:
-    def __init__(self, data_file="tv_schedules.json"):
+    def __init__(self, data_file="tv_schedules.json", users_file="users.json"):
         self.data_file = data_file
-        self.schedules = self.load_schedules()
+        self.store = JsonStore(data_file, "schedules")
         self.telegram_sender = TelegramSender()
-        self.user_manager = UserManager()
+        self.user_manager = UserManager(users_file)
+        # 집계 카운터와 날짜별 색인 (바뀐 스케줄만 반영)
+        self.index = ScheduleIndex.from_schedules(self.store.items())
+        self.store.subscribe(self._on_schedules_changed)
+        # (저장소 generation, 오늘 날짜, 일수) -> 다가오는 스케줄 (데이터가 바뀔 때까지 재사용)
+        self._upcoming = {}
+        # UI 수동 전송 백그라운드 작업 (세션이 바뀌어도 계속 실행)
+        self.jobs = JobRunner()
+        # 스케줄 목록용 열 기반 프레임 (저장소 generation, DataFrame)
+        self._frame = (None, None)
+        # (저장소 generation, 필터, 정렬, 검색어) -> 스케줄 목록 페이지에 보여줄 결과
+        self._queries = {}
+        # 여러 세션 스레드가 위 캐시를 함께 다시 만들므로 캐시 갱신은 이 잠금 안에서
+        self._cache_lock = threading.RLock()
+    
+    @property
+    def schedules(self):
+        return self.store.data
+    
+    def _on_schedules_changed(self, changed, removed):
+        for schedule_id in removed:
+            self.index.remove(schedule_id)
+        for schedule_id in changed:
+            schedule = self.store.get(schedule_id)
+            if schedule is not None:
+                self.index.update(schedule)
+            else:
+                self.index.remove(schedule_id)
     
-    def load_schedules(self):
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return {"schedules": []}
-        return {"schedules": []}
+    def refresh(self):
+        """다른 세션/서비스가 바꾼 데이터가 있으면 그 부분만 반영 (stat 확인만으로 끝나는 경우가 대부분)"""
+        self.store.refresh()
+        self.user_manager.store.refresh()
     
-    def save_schedules(self):
+    def _commit(self, mutate):
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.schedules, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
+            with self.store.transaction() as tx:
+                return True, mutate(tx)
+        except ConflictError as e:
+            return False, str(e)
+        except (StoreError, OSError) as e:
             st.error(f"❌ 스케줄 저장 실패: {e}")
-            return False
+            return False, None
     
-    def add_schedule(self, date, hour, minute, channel, program_name, message=""):
+    def add_schedule(self, date, hour, minute, channel, program_name, message="", audience=""):
         # 중복 확인
         time_str = f"{hour:02d}:{minute:02d}"
         schedule_id = f"{date}_{time_str}_{channel}_{program_name}"
         
-        for schedule in self.schedules["schedules"]:
-            if schedule["id"] == schedule_id:
-                return False, "동일한 스케줄이 이미 존재합니다."
+        if self.store.get(schedule_id) is not None:
+            return False, "동일한 스케줄이 이미 존재합니다."
+        
+        if audience:
+            try:
+                parse_audience(audience)
+            except SegmentError as e:
+                return False, f"대상 그룹 식 오류: {e}"
         
         if not message:
             message = f"📺 {channel}에서 '{program_name}' 방송이 시작됩니다!"
@@ -317,91 +473,322 @@ class TVScheduler:
             "sent": False,
             "created_at": get_korean_time().isoformat()
         }
+        if audience:
+            new_schedule["audience"] = audience
         
-        self.schedules["schedules"].append(new_schedule)
-        
-        if self.save_schedules():
+        success, _ = self._commit(lambda tx: tx.insert(new_schedule))
+        if success:
             return True, f"스케줄이 성공적으로 추가되었습니다: {program_name}"
         else:
             return False, "스케줄 추가에 실패했습니다."
     
+    def import_epg(self, source, channels, keywords, days, message="", audience="", progress=None):
+        """XMLTV 편성표에서 지금부터 days 일 치 스케줄을 일괄 추가"""
+        if audience:
+            try:
+                parse_audience(audience)
+            except SegmentError as e:
+                return False, f"대상 그룹 식 오류: {e}"
+        now = get_korean_time()
+        try:
+            stats = import_epg(
+                self.store, source, channels, keywords, now, now + timedelta(days=days),
+                message, audience, progress=progress
+            )
+        except EpgError as e:
+            return False, str(e)
+        except (StoreError, OSError) as e:
+            return False, f"스케줄 저장 실패: {e}"
+        if not any(stats.values()):
+            return False, "조건에 맞는 프로그램이 없습니다."
+        return True, f"편성표 가져오기 완료: 추가 {stats['added']}건, 갱신 {stats['updated']}건, 유지 {stats['unchanged']}건"
+    
+    def _data_store(self, kind):
+        return self.store if kind == SCHEDULES else self.user_manager.store
+    
+    def export_data(self, kind, fmt):
+        """스케줄/사용자 데이터를 임시 폴더의 CSV·JSONL 파일로 내보냄 (내려받은 뒤 remove_export 로 지움)
+
+        Returns:
+            tuple: (성공 여부, 메시지, 파일 경로)
+        """
+        filename = f"{kind}_export_{get_korean_time().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+        try:
+            path = os.path.join(tempfile.mkdtemp(prefix="tv_export_"), filename)
+            count = export_store(self._data_store(kind), kind, path, fmt)
+        except (StoreError, OSError) as e:
+            return False, f"내보내기 실패: {e}", None
+        return True, f"{count}건을 {filename} 로 내보냈습니다.", path
+    
+    @staticmethod
+    def remove_export(path):
+        """export_data 가 만든 임시 파일과 폴더 삭제"""
+        try:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+    
+    def import_data(self, kind, source, fmt, progress=None):
+        """CSV·JSONL 파일을 읽어 스케줄/사용자 데이터에 추가/갱신
+
+        Returns:
+            tuple: (성공 여부, 요약 메시지, 잘못된 행 [(줄 번호, 이유)])
+        """
+        try:
+            stats = import_records(self._data_store(kind), kind, source, fmt, progress=progress)
+        except (StoreError, OSError) as e:
+            return False, f"가져오기 실패: {e}", []
+        success = stats["added"] + stats["updated"] + stats["unchanged"] > 0
+        return success, describe_import(stats), stats["errors"]
+    
     def remove_schedule(self, schedule_id):
-        for i, schedule in enumerate(self.schedules["schedules"]):
-            if schedule["id"] == schedule_id:
-                removed_schedule = self.schedules["schedules"].pop(i)
-                if self.save_schedules():
-                    return True, f"스케줄이 제거되었습니다: {removed_schedule['program_name']}"
-                else:
-                    return False, f"스케줄 제거에 실패했습니다."
-        
-        return False, "스케줄을 찾을 수 없습니다."
+        success, removed_schedule = self._commit(lambda tx: tx.remove(schedule_id))
+        if not success:
+            return False, f"스케줄 제거에 실패했습니다."
+        if removed_schedule is None:
+            return False, "스케줄을 찾을 수 없습니다."
+        return True, f"스케줄이 제거되었습니다: {removed_schedule['program_name']}"
     
     def toggle_schedule_status(self, schedule_id):
-        for schedule in self.schedules["schedules"]:
-            if schedule["id"] == schedule_id:
-                schedule["active"] = not schedule["active"]
-                status = "활성화" if schedule["active"] else "비활성화"
-                if self.save_schedules():
-                    return True, f"스케줄 상태 변경: {status}"
-                else:
-                    return False, f"스케줄 상태 변경에 실패했습니다."
-        
-        return False, "스케줄을 찾을 수 없습니다."
+        def mutate(tx):
+            schedule = tx.get(schedule_id)
+            if schedule is None:
+                return None
+            return tx.update(schedule_id, active=not schedule["active"])
+        
+        success, schedule = self._commit(mutate)
+        if not success:
+            return False, f"스케줄 상태 변경에 실패했습니다."
+        if schedule is None:
+            return False, "스케줄을 찾을 수 없습니다."
+        status = "활성화" if schedule["active"] else "비활성화"
+        return True, f"스케줄 상태 변경: {status}"
+    
+    def set_schedules_active(self, schedule_ids, active=None):
+        """여러 스케줄의 활성 상태를 한 트랜잭션으로 변경 (active=None 이면 각각 반전)"""
+        def mutate(tx):
+            changed = 0
+            for schedule_id in schedule_ids:
+                schedule = tx.get(schedule_id)
+                if schedule is None:
+                    continue
+                value = not schedule["active"] if active is None else active
+                if schedule["active"] != value:
+                    tx.update(schedule_id, active=value)
+                    changed += 1
+            return changed
+        
+        success, changed = self._commit(mutate)
+        if not success:
+            return False, "스케줄 상태 변경에 실패했습니다."
+        action = {None: "상태 반전", True: "활성화", False: "비활성화"}[active]
+        return True, f"스케줄 {changed}개 {action}"
+    
+    def remove_schedules(self, schedule_ids):
+        """여러 스케줄을 한 트랜잭션으로 제거"""
+        targets = set(schedule_ids)
+        success, removed_count = self._commit(lambda tx: tx.remove_where(lambda s: s["id"] in targets))
+        if not success:
+            return False, "스케줄 제거에 실패했습니다."
+        return True, f"스케줄 {removed_count}개가 제거되었습니다."
+    
+    def schedule_frame(self):
+        """스케줄 전체의 열 기반 프레임 (데이터가 바뀐 뒤 처음 조회할 때만 다시 만듦, 수정하지 마세요)"""
+        with self._cache_lock:
+            generation, frame = self._frame
+            if generation != self.store.generation or frame is None:
+                generation = self.store.generation
+                frame = build_frame(self.store.items())
+                self._frame = (generation, frame)
+            return frame
+    
+    def query_schedules(self, status="전체", sort="날짜순", search=""):
+        """필터/검색/정렬한 스케줄 프레임 (데이터가 바뀔 때까지 재사용, 반환된 프레임은 수정하지 마세요)
+        
+        status: 전체/활성/비활성/전송완료/미전송, sort: 날짜순/시간순/채널순/방송명순
+        """
+        search = search.strip().casefold()
+        with self._cache_lock:
+            cache_key = (self.store.generation, status, sort, search)
+            cached = self._queries.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            result = query_frame(self.schedule_frame(), status, sort, search)
+            
+            # 이전 데이터로 만든 결과는 버림 (필터 조합 수만큼만 유지)
+            self._queries = {k: v for k, v in self._queries.items() if k[0] == cache_key[0]}
+            self._queries[cache_key] = result
+            return result
+    
+    def clear_sent_schedules(self):
+        """전송완료 스케줄 정리 (삭제 개수 반환, 실패 시 None)"""
+        success, removed_count = self._commit(lambda tx: tx.remove_where(lambda s: s["sent"]))
+        return removed_count if success else None
+    
+    def clear_all_schedules(self):
+        success, _ = self._commit(lambda tx: tx.replace_all([]))
+        return success
     
     def get_upcoming_schedules(self, days=7):
-        """다가오는 스케줄들을 가져옵니다"""
-        upcoming = []
-        today = get_korean_time().date()
-        
-        for schedule in self.schedules["schedules"]:
-            if not schedule["active"] or schedule["sent"]:
-                continue
+        """다가오는 스케줄들을 가져옵니다 (여러 세션이 함께 쓰므로 반환된 리스트는 수정하지 마세요)"""
+        with self._cache_lock:
+            today = get_korean_time().date()
+            cache_key = (self.store.generation, today, days)
+            cached = self._upcoming.get(cache_key)
+            if cached is not None:
+                return cached
             
-            try:
-                schedule_date = datetime.strptime(schedule["date"], "%Y-%m-%d").date()
-                schedule_datetime = datetime.strptime(f"{schedule['date']} {schedule['time']}", "%Y-%m-%d %H:%M")
-                
-                # 오늘부터 지정된 일수 내의 스케줄만
-                if today <= schedule_date <= today + timedelta(days=days):
+            upcoming = []
+            
+            # 날짜별 색인에서 오늘부터 지정된 일수 내의 날짜만 조회
+            for offset in range(days + 1):
+                schedule_date = today + timedelta(days=offset)
+                for schedule_id in self.index.on_date(schedule_date):
+                    schedule = self.store.get(schedule_id)
+                    if schedule is None or not schedule["active"] or schedule["sent"]:
+                        continue
+                    try:
+                        schedule_datetime = datetime.strptime(f"{schedule['date']} {schedule['time']}", "%Y-%m-%d %H:%M")
+                    except ValueError:
+                        continue
                     upcoming.append({
                         **schedule,
                         "datetime": schedule_datetime,
-                        "is_today": schedule_date == today,
-                        "is_tomorrow": schedule_date == today + timedelta(days=1)
+                        "is_today": offset == 0,
+                        "is_tomorrow": offset == 1
                     })
-            except ValueError:
-                continue
+            
+            # 시간순으로 정렬
+            upcoming.sort(key=lambda x: x["datetime"])
+            # 이전 데이터로 만든 결과는 버리고 지금 것만 유지
+            self._upcoming = {k: v for k, v in self._upcoming.items() if k[0] == cache_key[0] and k[1] == today}
+            self._upcoming[cache_key] = upcoming
+            return upcoming
+    
+    def _prepare_send(self, schedule, quiet_index, now):
+        """전송 대상을 정리 (오류 메시지, 대상 수신자 전체, 방해 금지 전송 계획)"""
+        try:
+            active_users = self.user_manager.get_recipients(schedule)
+        except SegmentError as e:
+            return f"대상 그룹 식 오류: {e}", None, None
+        if not active_users:
+            return "이 방송을 구독한 활성 사용자가 없습니다.", None, None
+        
+        recipients = unserved_recipients(schedule, active_users)
+        if not recipients:
+            return f"구독한 활성 사용자({len(active_users)}명) 모두에게 이미 전송되었습니다.", None, None
         
-        # 시간순으로 정렬
-        upcoming.sort(key=lambda x: x["datetime"])
-        return upcoming
+        # 방해 금지 시간인 수신자는 정책에 따라 미루거나(서비스가 나중에 전송) 이번 전송에서 뺌
+        return None, active_users, quiet_index.plan(recipients, now)
     
-    def send_scheduled_message(self, schedule):
-        """스케줄된 메시지를 전송합니다"""
-        active_users = self.user_manager.get_active_user_ids()
+    def send_scheduled_messages(self, schedule_ids, job=None):
+        """여러 스케줄을 한꺼번에 전송하고 결과는 한 트랜잭션으로 기록합니다
         
-        if not active_users:
+        스케줄마다 전송 요청을 먼저 모두 대기열에 넣어 작업자들이 함께 보내게 한 뒤,
+        모두 끝나면 전송 기록을 한 번에 저장합니다.
+        job (send_jobs.SendJob) 안에서 실행하면 진행 상황을 작업에 보이고, 기다리는 동안
+        JOB_CHECKPOINT_INTERVAL 마다 중간 결과를 저장하며, 취소되면 남은 수신자를 대기 상태로 기록합니다.
+        """
+        if not self.user_manager.get_active_user_ids():
             return False, "활성 사용자가 없습니다."
         
-        # 메시지 전송
-        results = self.telegram_sender.send_message_to_multiple(schedule["message"], active_users)
-        
-        success_count = sum(1 for r in results if r["success"])
-        
-        # 전송 완료 표시
-        for s in self.schedules["schedules"]:
-            if s["id"] == schedule["id"]:
-                s["sent"] = True
+        now = get_korean_time()
+        quiet_index = QuietHoursIndex.from_users(self.user_manager.users["users"])
+        send_queue = get_send_queue(self.telegram_sender)
+        pending, skipped, last_error = [], 0, None
+        for schedule_id in schedule_ids:
+            if job is not None and job.cancelled:
                 break
+            schedule = self.store.get(schedule_id)
+            if schedule is None:
+                skipped += 1
+                last_error = "스케줄을 찾을 수 없습니다."
+                continue
+            error, active_users, plan = self._prepare_send(schedule, quiet_index, now)
+            if error:
+                skipped += 1
+                last_error = error
+                continue
+            batch = None
+            if plan.now:
+                batch = send_queue.submit(schedule["message"], plan.now, lane=BULK, key=occurrence_key(schedule))
+                if job is not None:
+                    job.add_batch(batch)
+            pending.append((schedule_id, active_users, plan, batch))
+        if not pending:
+            if len(schedule_ids) == 1 and last_error:
+                return False, last_error
+            return False, f"선택한 스케줄 {skipped}개 모두 보낼 대상이 없습니다."
         
-        self.save_schedules()
-        
-        return success_count > 0, f"{success_count}/{len(active_users)}명에게 전송 완료"
+        try:
+            if job is not None:
+                # 끝날 때까지 중간 결과를 주기적으로 저장 (프로세스가 멈춰도 보낸 수신자는 기록에 남음)
+                for _, _, _, batch in pending:
+                    while batch is not None and not batch.done():
+                        batch.wait(JOB_CHECKPOINT_INTERVAL)
+                        entries = []
+                        for schedule_id, active_users, _, other in pending:
+                            new_results = other.checkpoint()[0] if other else []
+                            if new_results:
+                                entries.append({"schedule_id": schedule_id, "results": new_results, "chat_ids": active_users})
+                        if entries:
+                            record_many(self.store, entries, now)
+            
+            entries = []
+            success_count = total = quiet_count = unfinished_count = 0
+            for schedule_id, active_users, plan, batch in pending:
+                if batch is not None:
+                    batch.wait()
+                    results, unfinished = batch.checkpoint()
+                    success_count += batch.sent
+                else:
+                    results, unfinished = [], []
+                total += len(plan.now)
+                quiet_count += sum(len(ids) for ids in plan.deferred.values()) + len(plan.dropped)
+                unfinished_count += len(unfinished)
+                entries.append({
+                    "schedule_id": schedule_id, "results": results, "chat_ids": active_users,
+                    "pending": unfinished, "deferred": plan.deferred, "dropped": plan.dropped,
+                })
+            record_many(self.store, entries, now)
+        except (StoreError, OSError) as e:
+            print(f"[ERROR] 스케줄 저장 실패: {e}")
+            return False, f"스케줄 저장 실패: {e}"
+        
+        message = f"스케줄 {len(entries)}개, {success_count}/{total}명 전송 완료"
+        if unfinished_count:
+            message += f" (취소로 {unfinished_count}명 남음)"
+        if quiet_count:
+            message += f" (방해 금지 시간 {quiet_count}명 제외)"
+        if skipped:
+            message += f" (보낼 대상이 없는 스케줄 {skipped}개 제외)"
+        return success_count > 0, message
+    
+    def start_send_job(self, schedule_ids, label):
+        """전송을 백그라운드 작업으로 시작하고 바로 반환 (성공 여부, 메시지, 작업 ID)"""
+        schedule_ids = list(schedule_ids)
+        if not schedule_ids:
+            return False, "전송할 스케줄이 없습니다.", None
+        if not self.user_manager.get_active_user_ids():
+            return False, "활성 사용자가 없습니다.", None
+        job = self.jobs.submit(label, lambda job: self.send_scheduled_messages(schedule_ids, job))
+        return True, f"전송 작업을 시작했습니다: {label}", job.id
+
 
+@st.cache_resource(show_spinner=False)
+def get_shared_scheduler(data_file="tv_schedules.json", users_file="users.json"):
+    """모든 브라우저 세션이 함께 쓰는 스케줄러 (프로세스당 하나)
 
-# 세션 상태 초기화
-if 'tv_scheduler' not in st.session_state:
-    st.session_state.tv_scheduler = TVScheduler()
+    파싱한 스케줄/사용자 데이터와 색인을 세션마다 따로 만들지 않고, 파일이 바뀐 경우에만
+    바뀐 항목을 다시 반영합니다. 저장은 파일 잠금 트랜잭션이라 세션이 동시에 바꿔도 안전합니다.
+    """
+    return TVScheduler(os.path.abspath(data_file), os.path.abspath(users_file))
+
+
+# 세션 상태 초기화 (스케줄러는 프로세스 전체에서 공유)
+st.session_state.tv_scheduler = get_shared_scheduler()
 
 if 'page' not in st.session_state:
     st.session_state.page = "dashboard"
@@ -410,27 +797,57 @@ if 'log_monitor' not in st.session_state:
     st.session_state.log_monitor = LogMonitor()
 
 
+@st.fragment(run_every=CLOCK_REFRESH_SECONDS)
+def show_clock(template):
+    """실시간 시계 (이 부분만 1초마다 다시 그림, template 의 {now} 자리에 현재 시각)"""
+    current_time = get_korean_time()
+    st.markdown(template.replace("{now}", current_time.strftime('%Y-%m-%d %H:%M:%S')), unsafe_allow_html=True)
+
+
 def show_dashboard():
     """대시보드 페이지"""
     st.markdown('<h1 class="main-header">📺 TV 방송 스케줄러</h1>', unsafe_allow_html=True)
     
     # 실시간 시계 표시
-    current_time = get_korean_time()
+    show_clock("""
+    <div style="text-align: center; margin-bottom: 2rem; padding: 1rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 1rem; box-shadow: 0 4px 15px rgba(0,0,0,0.1);">
+        <h2 style="color: white; font-family: 'Courier New', monospace; margin: 0; text-shadow: 2px 2px 4px rgba(0,0,0,0.3);">
+            🕐 {now}
+        </h2>
+    </div>
+    """)
     
-    # 시계를 위한 placeholder
-    dashboard_clock = st.empty()
-    with dashboard_clock.container():
-        st.markdown(f"""
-        <div style="text-align: center; margin-bottom: 2rem; padding: 1rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 1rem; box-shadow: 0 4px 15px rgba(0,0,0,0.1);">
-            <h2 style="color: white; font-family: 'Courier New', monospace; margin: 0; text-shadow: 2px 2px 4px rgba(0,0,0,0.3);">
-                🕐 {current_time.strftime('%Y-%m-%d %H:%M:%S')}
-            </h2>
-        </div>
-        """, unsafe_allow_html=True)
+    show_today_schedules()
+    
+    show_send_jobs()
+    
+    # 빠른 작업
+    st.subheader("⚡ 빠른 작업")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if st.button("➕ 새 스케줄 추가", use_container_width=True):
+            st.session_state.page = "add_schedule"
+            st.rerun()
+    
+    with col2:
+        if st.button("📋 전체 스케줄 보기", use_container_width=True):
+            st.session_state.page = "schedule_list"
+            st.rerun()
     
+    with col3:
+        if st.button("⚙️ 설정", use_container_width=True):
+            st.session_state.page = "settings"
+            st.rerun()
+
+
+@st.fragment(run_every=SCHEDULE_REFRESH_SECONDS)
+def show_today_schedules():
+    """대시보드 카운터와 오늘의 방송 목록 (주기적으로 이 부분만 다시 그림)"""
     scheduler = st.session_state.tv_scheduler
-    schedules = scheduler.schedules["schedules"]
-    active_schedules = [s for s in schedules if s["active"] and not s["sent"]]
+    # 부분 새로고침 때도 다른 세션/서비스가 바꾼 내용 반영 (변경이 없으면 stat 확인만 함)
+    scheduler.refresh()
+    counts = scheduler.index.counts()
     
     # 메트릭 카드
     col1, col2, col3 = st.columns(3)
@@ -438,14 +855,14 @@ def show_dashboard():
     with col1:
         st.metric(
             label="📅 총 스케줄",
-            value=f"{len(schedules)}개",
+            value=f"{counts['total']}개",
             delta=None
         )
     
     with col2:
         st.metric(
             label="⏰ 활성 스케줄",
-            value=f"{len(active_schedules)}개",
+            value=f"{counts['waiting']}개",
             delta=None
         )
     
@@ -477,10 +894,10 @@ def show_dashboard():
             
             with col2:
                 if st.button("📤 지금 전송", key=f"send_{schedule['id']}"):
-                    success, message = scheduler.send_scheduled_message(schedule)
+                    # 백그라운드 작업으로 넘기고 바로 돌아옴 (진행 상황은 아래 전송 작업에서 확인)
+                    success, message, _ = scheduler.start_send_job([schedule['id']], f"{schedule['program_name']} 전송")
                     if success:
                         st.success(message)
-                        st.balloons()
                     else:
                         st.error(message)
                     st.rerun()
@@ -495,25 +912,6 @@ def show_dashboard():
                     st.rerun()
     else:
         st.info("오늘 예정된 방송이 없습니다.")
-    
-    # 빠른 작업
-    st.subheader("⚡ 빠른 작업")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("➕ 새 스케줄 추가", use_container_width=True):
-            st.session_state.page = "add_schedule"
-            st.rerun()
-    
-    with col2:
-        if st.button("📋 전체 스케줄 보기", use_container_width=True):
-            st.session_state.page = "schedule_list"
-            st.rerun()
-    
-    with col3:
-        if st.button("⚙️ 설정", use_container_width=True):
-            st.session_state.page = "settings"
-            st.rerun()
 
 
 def show_add_schedule():
@@ -590,6 +988,21 @@ def show_add_schedule():
                 help="빈칸으로 두면 기본 메시지가 사용됩니다."
             )
             
+            audience = st.text_input(
+                "대상 그룹 (선택)",
+                placeholder="예: family ∪ office − muted",
+                help="비워 두면 채널/키워드 구독자에게 전송합니다. ∪(|) 합집합, −(-) 차집합, ∩(&) 교집합, all 은 모든 활성 사용자"
+            )
+            if audience:
+                try:
+                    unknown = segment_names(parse_audience(audience)) - set(
+                        st.session_state.tv_scheduler.user_manager.get_segments().names()
+                    )
+                    if unknown:
+                        st.warning(f"구성원이 없는 그룹: {', '.join(sorted(unknown))}")
+                except SegmentError as e:
+                    st.error(f"대상 그룹 식 오류: {e}")
+            
             # 미리보기
             if channel and program_name:
                 preview_message = message if message else f"📺 {channel}에서 '{program_name}' 방송이 시작됩니다!"
@@ -607,7 +1020,8 @@ def show_add_schedule():
                         minute,
                         channel,
                         program_name,
-                        message
+                        message,
+                        audience.strip()
                     )
                     
                     if success:
@@ -623,10 +1037,51 @@ def show_add_schedule():
                 st.session_state.page = "dashboard"
                 st.rerun()
     
+    # 편성표 일괄 가져오기
+    with st.expander("📥 편성표(XMLTV/EPG) 가져오기"):
+        uploaded = st.file_uploader("XMLTV 파일", type=["xml", "xmltv", "gz"], key="epg_file")
+        epg_col1, epg_col2 = st.columns(2)
+        with epg_col1:
+            epg_channels = st.text_input(
+                "채널 (선택)",
+                placeholder="예: KBS1, MBC (비우면 전체)",
+                key="epg_channels",
+                help="편성표의 채널 표시 이름 또는 채널 ID"
+            )
+            epg_days = st.number_input("가져올 기간 (일)", min_value=1, max_value=31, value=7, key="epg_days")
+        with epg_col2:
+            epg_keywords = st.text_input("방송명 키워드 (선택)", placeholder="예: 뉴스, 드라마", key="epg_keywords")
+            epg_audience = st.text_input("대상 그룹 (선택)", placeholder="예: family ∪ office", key="epg_audience")
+        epg_message = st.text_input(
+            "메시지 형식 (선택)",
+            placeholder="{channel}, {program_name}, {time} 사용 가능",
+            key="epg_message"
+        )
+        if st.button("📥 가져오기", disabled=uploaded is None, key="epg_import"):
+            progress_text = st.empty()
+            
+            def show_progress(stats):
+                progress_text.info(f"저장 중... 추가 {stats['added']} / 갱신 {stats['updated']} / 유지 {stats['unchanged']}")
+            
+            success, message = st.session_state.tv_scheduler.import_epg(
+                uploaded,
+                parse_keywords(epg_channels),
+                parse_keywords(epg_keywords),
+                int(epg_days),
+                epg_message.strip(),
+                epg_audience.strip(),
+                progress=show_progress
+            )
+            progress_text.empty()
+            if success:
+                st.success(message)
+            else:
+                st.error(message)
+    
     # 인기 채널 버튼
     st.subheader("📺 인기 채널 빠른 선택")
     
-    popular_channels = ["KBS1", "KBS2", "MBC", "SBS", "tvN", "JTBC", "채널A", "MBN", "EBS", "KBS WORLD"]
+    popular_channels = POPULAR_CHANNELS
     
     cols = st.columns(5)
     for i, channel in enumerate(popular_channels):
@@ -677,97 +1132,136 @@ def show_schedule_list():
     """, unsafe_allow_html=True)
     
     scheduler = st.session_state.tv_scheduler
-    schedules = scheduler.schedules["schedules"]
     
-    if not schedules:
+    if not scheduler.index.total:
         st.info("등록된 스케줄이 없습니다.")
         if st.button("➕ 첫 번째 스케줄 추가"):
             st.session_state.page = "add_schedule"
             st.rerun()
         return
     
-    # 필터 옵션
-    col1, col2, col3 = st.columns(3)
+    # 필터/정렬/검색은 공유 스케줄러에서 계산하고 (데이터가 바뀔 때까지 캐시) 한 페이지만 표로 그림
+    col1, col2, col3, col4 = st.columns([1, 1, 2, 1])
     
     with col1:
         filter_option = st.selectbox(
             "필터",
-            ["전체", "활성", "비활성", "전송완료", "미전송"]
+            ["전체", *SCHEDULE_FILTERS]
         )
     
     with col2:
         sort_option = st.selectbox(
             "정렬",
-            ["날짜순", "시간순", "채널순", "방송명순"]
+            list(SCHEDULE_SORTS)
         )
     
     with col3:
+        search = st.text_input("검색", placeholder="방송명 또는 채널")
+    
+    with col4:
         if st.button("🔄 새로고침"):
             st.rerun()
     
-    # 필터링
-    filtered_schedules = schedules.copy()
-    
-    if filter_option == "활성":
-        filtered_schedules = [s for s in filtered_schedules if s["active"]]
-    elif filter_option == "비활성":
-        filtered_schedules = [s for s in filtered_schedules if not s["active"]]
-    elif filter_option == "전송완료":
-        filtered_schedules = [s for s in filtered_schedules if s["sent"]]
-    elif filter_option == "미전송":
-        filtered_schedules = [s for s in filtered_schedules if not s["sent"]]
-    
-    # 정렬
-    if sort_option == "날짜순":
-        filtered_schedules.sort(key=lambda x: (x["date"], x["time"]))
-    elif sort_option == "시간순":
-        filtered_schedules.sort(key=lambda x: x["time"])
-    elif sort_option == "채널순":
-        filtered_schedules.sort(key=lambda x: x["channel"])
-    elif sort_option == "방송명순":
-        filtered_schedules.sort(key=lambda x: x["program_name"])
-    
-    # 스케줄 표시
-    for schedule in filtered_schedules:
-        col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
-        
-        with col1:
-            status_icon = "🟢" if schedule["active"] else "🔴"
-            sent_icon = "✅" if schedule["sent"] else "⏳"
-            
-            st.markdown(f"""
-            **{status_icon} {schedule['program_name']}** {sent_icon}<br>
-            📺 {schedule['channel']} | 📅 {schedule['date']} {schedule['time']}
-            """)
-        
-        with col2:
-            if st.button("토글", key=f"toggle_{schedule['id']}"):
-                success, message = scheduler.toggle_schedule_status(schedule['id'])
-                if success:
-                    st.success(message)
-                else:
-                    st.error(message)
-                st.rerun()
-        
-        with col3:
-            if st.button("전송", key=f"send_{schedule['id']}"):
-                success, message = scheduler.send_scheduled_message(schedule)
-                if success:
-                    st.success(message)
-                else:
-                    st.error(message)
-                st.rerun()
-        
-        with col4:
-            if st.button("삭제", key=f"delete_{schedule['id']}"):
-                success, message = scheduler.remove_schedule(schedule['id'])
-                if success:
-                    st.success(message)
-                else:
-                    st.error(message)
-                st.rerun()
-        
-        st.markdown("---")
+    filtered_schedules = scheduler.query_schedules(filter_option, sort_option, search)
+    if filtered_schedules.empty:
+        st.info("조건에 맞는 스케줄이 없습니다.")
+        return
+    
+    with st.expander("📊 채널/날짜별 통계"):
+        group = st.radio("기준", list(SCHEDULE_GROUPS), horizontal=True)
+        stats = summarize(filtered_schedules, SCHEDULE_GROUPS[group])
+        labels = {"channel": "채널", "date": "날짜", "total": "전체", "active": "활성", "sent": "전송완료", "waiting": "대기"}
+        st.dataframe(
+            stats.rename(columns=labels).rename_axis(labels[SCHEDULE_GROUPS[group]]),
+            use_container_width=True,
+        )
+    
+    # 페이지 나누기
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        page_size = st.selectbox("페이지당 행 수", PAGE_SIZES)
+    page_count = (len(filtered_schedules) + page_size - 1) // page_size
+    with col2:
+        page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1)
+    with col3:
+        st.caption(f"총 {len(filtered_schedules)}개 중 {(page - 1) * page_size + 1}~"
+                   f"{min(page * page_size, len(filtered_schedules))}번째 ({page_count}페이지)")
+    page_schedules = filtered_schedules.iloc[(page - 1) * page_size:page * page_size]
+    
+    # 전송 결과는 전송 기록이 있는 이 페이지의 스케줄만 저장소에서 읽어 계산
+    results = []
+    for schedule_id, has_deliveries in zip(page_schedules["id"], page_schedules["has_deliveries"]):
+        schedule = scheduler.store.get(schedule_id) if has_deliveries else None
+        result = ""
+        if schedule is not None:
+            counts = delivery_counts(schedule)
+            result = f"성공 {counts['sent']} · 실패 {counts['failed']}"
+            if counts.get("deferred") or counts.get("dropped"):
+                result += f" · 🌙 대기 {counts.get('deferred', 0)} · 제외 {counts.get('dropped', 0)}"
+            if counts["unknown"]:
+                result += f" · ❔ 확인 불가 {counts['unknown']}"
+        results.append(result)
+    table = pd.DataFrame({
+        "상태": page_schedules["active"].map({True: "🟢", False: "🔴"}),
+        "전송": page_schedules["sent"].map({True: "✅", False: "⏳"}),
+        "날짜": page_schedules["date"],
+        "시간": page_schedules["time"],
+        "채널": page_schedules["channel"],
+        "방송명": page_schedules["program_name"],
+        "대상": page_schedules["audience"],
+        "전송 결과": results,
+    })
+    
+    # 필터나 페이지, 데이터가 바뀌거나 일괄 작업을 실행하면 선택/확인을 새로 시작
+    # (행 번호 기준 선택이 다른 스케줄을 가리키거나, 확인이 남아 다음 클릭에 실행되지 않도록)
+    selection_round = f"{scheduler.store.generation}_{st.session_state.get('selection_round', 0)}"
+    table_key = f"schedule_table_{filter_option}_{sort_option}_{search}_{page_size}_{page}_{selection_round}"
+    event = st.dataframe(
+        table,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=table_key,
+    )
+    selected_ids = [page_schedules["id"].iloc[i] for i in event.selection.rows if i < len(page_schedules)]
+    
+    # 일괄 작업 (선택한 스케줄 전체를 한 트랜잭션으로 처리)
+    select_all = st.checkbox(f"필터 결과 전체 선택 ({len(filtered_schedules)}개)", key=f"select_all_{selection_round}")
+    if select_all:
+        selected_ids = filtered_schedules["id"].tolist()
+    st.caption(f"선택한 스케줄: {len(selected_ids)}개")
+    
+    col1, col2, col3, col4, col5 = st.columns(5)
+    action = None
+    with col1:
+        if st.button("🔁 토글", disabled=not selected_ids, use_container_width=True):
+            action = lambda: scheduler.set_schedules_active(selected_ids)
+    with col2:
+        if st.button("🟢 활성화", disabled=not selected_ids, use_container_width=True):
+            action = lambda: scheduler.set_schedules_active(selected_ids, True)
+    with col3:
+        if st.button("🔴 비활성화", disabled=not selected_ids, use_container_width=True):
+            action = lambda: scheduler.set_schedules_active(selected_ids, False)
+    with col4:
+        if st.button("📤 전송", disabled=not selected_ids, use_container_width=True):
+            action = lambda: scheduler.start_send_job(selected_ids, f"선택한 스케줄 {len(selected_ids)}개 전송")[:2]
+    with col5:
+        confirm_delete = st.checkbox("삭제 확인", disabled=not selected_ids, key=f"confirm_delete_{selection_round}")
+        if st.button("🗑️ 삭제", disabled=not (selected_ids and confirm_delete), use_container_width=True):
+            action = lambda: scheduler.remove_schedules(selected_ids)
+    
+    if action:
+        with st.spinner("처리 중..."):
+            success, message = action()
+        st.session_state.selection_round = st.session_state.get('selection_round', 0) + 1
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+        st.rerun()
+    
+    show_send_jobs()
 
 
 def show_settings():
@@ -791,18 +1285,15 @@ def show_settings():
     with col1:
         st.subheader("📊 통계")
         
-        schedules = scheduler.schedules["schedules"]
-        active_count = len([s for s in schedules if s["active"]])
-        sent_count = len([s for s in schedules if s["sent"]])
-        
-        st.metric("총 스케줄", len(schedules))
-        st.metric("활성 스케줄", active_count)
-        st.metric("전송 완료", sent_count)
+        counts = scheduler.index.counts()
+        st.metric("총 스케줄", counts["total"])
+        st.metric("활성 스케줄", counts["active"])
+        st.metric("전송 완료", counts["sent"])
         
         # 데이터 백업
         if st.button("💾 데이터 백업"):
             backup_data = {
-                "schedules": schedules,
+                "schedules": scheduler.schedules["schedules"],
                 "users": scheduler.user_manager.users,
                 "backup_time": get_korean_time().isoformat()
             }
@@ -816,22 +1307,116 @@ def show_settings():
         st.subheader("🔧 관리")
         
         if st.button("🗑️ 전송완료 스케줄 정리"):
-            original_count = len(schedules)
-            scheduler.schedules["schedules"] = [s for s in schedules if not s["sent"]]
-            removed_count = original_count - len(scheduler.schedules["schedules"])
+            removed_count = scheduler.clear_sent_schedules()
             
-            if scheduler.save_schedules():
+            if removed_count is not None:
                 st.success(f"{removed_count}개의 전송완료 스케줄이 정리되었습니다.")
             else:
                 st.error("정리에 실패했습니다.")
         
         if st.button("🔄 모든 스케줄 초기화"):
             if st.checkbox("정말로 모든 스케줄을 삭제하시겠습니까?"):
-                scheduler.schedules["schedules"] = []
-                if scheduler.save_schedules():
+                if scheduler.clear_all_schedules():
                     st.success("모든 스케줄이 삭제되었습니다.")
                 else:
                     st.error("삭제에 실패했습니다.")
+    
+    st.subheader("📦 스케줄 내보내기/가져오기")
+    show_data_transfer(SCHEDULES)
+
+
+def show_send_jobs(limit=5):
+    """백그라운드 전송 작업 진행 상황 (진행 중인 작업이 있으면 이 부분만 주기적으로 다시 그림)"""
+    live = bool(st.session_state.tv_scheduler.jobs.running())
+    st.fragment(_show_send_jobs, run_every=LIVE_REFRESH_SECONDS if live else None)(limit, live)
+
+
+def _show_send_jobs(limit, live):
+    # 작업 객체의 카운터만 읽으므로 전송을 기다리지 않음
+    scheduler = st.session_state.tv_scheduler
+    if live and not scheduler.jobs.running():
+        # 작업이 모두 끝남: 전송 결과가 반영된 카운터/목록으로 전체를 다시 그리고 주기 새로고침 중단
+        st.rerun()
+    jobs = scheduler.jobs.jobs()[:limit]
+    if not jobs:
+        return
+    
+    st.subheader("📤 전송 작업")
+    status_labels = {RUNNING: "⏳ 전송 중", DONE: "✅ 완료", CANCELLED: "⏹️ 취소됨", FAILED: "❌ 실패"}
+    for job in jobs:
+        progress = job.progress()
+        status = status_labels.get(job.status, "🕐 대기")
+        if job.status == DONE and not job.success:
+            status = "⚠️ 전송 없음"
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            finished = progress["sent"] + progress["failed"]
+            st.progress(
+                finished / progress["total"] if progress["total"] else (1.0 if job.done() else 0.0),
+                text=f"{status} · {job.label} · "
+                     f"성공 {progress['sent']} / 실패 {progress['failed']} / 남음 {progress['remaining']}명",
+            )
+            if job.done():
+                st.caption(f"{job.summary} ({job.elapsed():.1f}초)")
+        with col2:
+            if not job.done() and st.button("⏹️ 취소", key=f"cancel_job_{job.id}", use_container_width=True):
+                scheduler.jobs.cancel(job.id)
+                st.rerun()
+
+
+def show_data_transfer(kind):
+    """CSV·JSONL 내보내기/가져오기 (스케줄 또는 사용자)"""
+    scheduler = st.session_state.tv_scheduler
+    label = "스케줄" if kind == SCHEDULES else "사용자"
+    
+    export_col, import_col = st.columns(2)
+    
+    with export_col:
+        fmt = st.selectbox("내보낼 형식", options=list(FORMATS), key=f"export_format_{kind}",
+                           help="csv 는 표 계산 프로그램용, jsonl 은 전송 기록까지 포함")
+        if st.button(f"📤 {label} 내보내기", key=f"export_{kind}", use_container_width=True):
+            success, message, path = scheduler.export_data(kind, fmt)
+            if success:
+                # 내려받지 않은 이전 파일은 지우고 새 파일로 바꿈
+                previous = st.session_state.get(f"export_file_{kind}")
+                if previous:
+                    scheduler.remove_export(previous)
+                st.session_state[f"export_file_{kind}"] = path
+                st.success(message)
+            else:
+                st.error(message)
+        exported = st.session_state.get(f"export_file_{kind}")
+        if exported and os.path.exists(exported):
+            
+            def finish_download():
+                # 내려받기 버튼이 파일 내용을 이미 메모리에 올렸으므로 임시 파일은 바로 지움
+                scheduler.remove_export(st.session_state.pop(f"export_file_{kind}", exported))
+            
+            with open(exported, 'rb') as f:
+                st.download_button("⬇️ 내려받기", f, file_name=os.path.basename(exported), key=f"download_{kind}",
+                                   on_click=finish_download, use_container_width=True)
+    
+    with import_col:
+        uploaded = st.file_uploader(f"{label} 가져오기 (CSV/JSONL)", type=["csv", "jsonl"], key=f"import_file_{kind}")
+        if st.button(f"📥 {label} 가져오기", key=f"import_{kind}", disabled=uploaded is None,
+                     use_container_width=True):
+            progress_bar = st.progress(0.0)
+            
+            def show_progress(stats):
+                if stats["size"]:
+                    progress_bar.progress(min(stats["position"] / stats["size"], 1.0),
+                                          text=f"{stats['rows']}행 처리")
+            
+            success, message, errors = scheduler.import_data(
+                kind, uploaded, detect_format(uploaded.name), progress=show_progress
+            )
+            progress_bar.empty()
+            if success:
+                st.success(message)
+            else:
+                st.error(message)
+            for line_number, reason in errors:
+                st.caption(f"⚠️ {line_number}행: {reason}")
 
 
 def show_log_monitor():
@@ -839,22 +1424,22 @@ def show_log_monitor():
     st.markdown('<h1 class="main-header">📊 스케줄 서비스 로그 모니터</h1>', unsafe_allow_html=True)
     
     # 실시간 시계 표시
-    current_time = get_korean_time()
-    st.markdown(f"""
+    show_clock("""
     <div style="text-align: center; margin-bottom: 1rem; padding: 0.5rem; background-color: #e8f5e8; border-radius: 0.5rem;">
         <span style="color: #2e7d32; font-family: 'Courier New', monospace; font-weight: bold;">
-            🕐 현재 시간: {current_time.strftime('%Y-%m-%d %H:%M:%S')}
+            🕐 현재 시간: {now}
         </span>
     </div>
-    """, unsafe_allow_html=True)
+    """)
     
     log_monitor = st.session_state.log_monitor
     
-    # 제어 버튼
-    col1, col2, col3, col4 = st.columns(4)
+    # 제어 버튼 (서비스는 감시자가 실행하므로 이 세션이 닫혀도 계속 실행)
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
     
     with col1:
-        if st.button("🚀 모니터링 시작", use_container_width=True):
+        if st.button("🚀 모니터링 시작", use_container_width=True,
+                     help="스케줄 서비스를 시작하고 로그를 봅니다"):
             success, message = log_monitor.start_monitoring()
             if success:
                 st.success(message)
@@ -872,15 +1457,52 @@ def show_log_monitor():
             st.rerun()
     
     with col3:
-        if st.button("🔄 새로고침", use_container_width=True):
+        if st.button("♻️ 서비스 재시작", use_container_width=True,
+                     help="진행 중인 전송을 저장하고 서비스를 다시 시작합니다"):
+            success, message = log_monitor.reload_service()
+            if success:
+                st.success(message)
+            else:
+                st.error(message)
             st.rerun()
     
     with col4:
+        if st.button("📎 로그만 보기", use_container_width=True,
+                     help="따로 실행 중인 서비스의 로그 파일을 이어 읽습니다"):
+            success, message = log_monitor.attach()
+            st.rerun()
+    
+    with col5:
+        if st.button("🔄 새로고침", use_container_width=True):
+            st.rerun()
+    
+    with col6:
         if st.button("🗑️ 로그 지우기", use_container_width=True):
-            log_monitor.logs = []
+            log_monitor.logs.clear()
+            if "log_view" in st.session_state:
+                st.session_state.log_view.clear()
             st.success("로그가 지워졌습니다.")
             st.rerun()
     
+    # 로그 표시 영역
+    st.subheader("📋 실시간 로그")
+    
+    filter_col1, filter_col2, filter_col3 = st.columns([2, 3, 1])
+    with filter_col1:
+        levels = st.multiselect("수준", list(LEVELS), default=list(LEVELS))
+    with filter_col2:
+        search = st.text_input("로그 검색", placeholder="포함할 문자열")
+    with filter_col3:
+        auto_refresh = st.checkbox(f"자동 새로고침 ({LIVE_REFRESH_SECONDS}초마다)", value=True)
+    
+    # 상태와 로그 부분만 주기적으로 다시 그림 (버튼/필터는 그대로 두고 새 줄만 읽음)
+    live = auto_refresh and log_monitor.is_monitoring()
+    st.fragment(_show_log_tail, run_every=LIVE_REFRESH_SECONDS if live else None)(levels, search)
+
+
+def _show_log_tail(levels, search):
+    log_monitor = st.session_state.log_monitor
+    
     # 모니터링 상태 표시
     status_col1, status_col2, status_col3 = st.columns(3)
     
@@ -891,35 +1513,43 @@ def show_log_monitor():
             st.error("🔴 모니터링 비활성")
     
     with status_col2:
-        st.info(f"📊 로그 개수: {len(log_monitor.logs)}개")
+        counts = log_monitor.logs.level_counts()
+        st.info(f"📊 로그 개수: {len(log_monitor.logs)}개 (오류 {counts[ERROR]} · 경고 {counts[WARNING]})")
     
     with status_col3:
-        # 디버깅 정보 표시
-        st.text(f"프로세스: {'있음' if log_monitor.process else '없음'}")
-        st.text(f"상태 플래그: {log_monitor.monitoring}")
-        if log_monitor.process:
-            try:
-                poll_result = log_monitor.process.poll()
-                st.text(f"프로세스 상태: {'실행중' if poll_result is None else f'종료됨({poll_result})'}")
-            except:
-                st.text("프로세스 상태: 확인불가")
-    
-    # 로그 표시 영역
-    st.subheader("📋 실시간 로그")
-    
-    if log_monitor.logs:
-        # 로그를 역순으로 표시 (최신 로그가 위에)
-        logs_display = log_monitor.logs[-50:]  # 최근 50개만 표시
-        logs_display.reverse()
-        
-        # 로그 컨테이너
+        # 감시자에 상태만 물어봄 (서비스 프로세스는 이 세션이 갖고 있지 않음)
+        status = log_monitor.service_status()
+        st.text(f"로그 파일: {os.path.basename(log_monitor.log_file)}")
+        if status is None:
+            st.text("감시자: 실행 중 아님")
+        else:
+            health = "정상" if status.get("healthy") else "확인 필요"
+            st.text(f"서비스: {status['state']} (PID {status['pid'] or '-'}, {health})")
+            st.text(f"실행 시간: {status['uptime']:.0f}초 · 재시작 {status['restarts']}회")
+    
+    # 세션마다 마지막으로 읽은 줄 번호를 두고 새로고침 때는 그 뒤의 새 줄만 가져옴
+    log_filter = (tuple(levels), search)
+    if st.session_state.get("log_filter") != log_filter or "log_view" not in st.session_state:
+        st.session_state.log_filter = log_filter
+        st.session_state.log_view = deque(maxlen=LOG_DISPLAY_LINES)
+        st.session_state.log_cursor = 0
+    new_lines, st.session_state.log_cursor = log_monitor.get_logs(
+        st.session_state.log_cursor, levels, search, LOG_DISPLAY_LINES
+    )
+    st.session_state.log_view.extend(new_lines)
+    
+    if st.session_state.log_view:
+        # 로그 컨테이너 (최신 로그가 위에)
         log_container = st.container()
         
         with log_container:
-            for log in logs_display:
-                # 로그 타입에 따른 색상 구분
-                if "❌" in log or "오류" in log or "실패" in log:
+            for line in reversed(st.session_state.log_view):
+                log = format_line(line)
+                # 로그 수준/내용에 따른 색상 구분
+                if line.level == ERROR or "실패" in log:
                     st.error(log)
+                elif line.level == WARNING:
+                    st.warning(log)
                 elif "✅" in log or "성공" in log or "완료" in log:
                     st.success(log)
                 elif "🚀" in log or "시작" in log:
@@ -928,16 +1558,10 @@ def show_log_monitor():
                     st.warning(log)
                 else:
                     st.text(log)
+    elif len(log_monitor.logs):
+        st.info("조건에 맞는 로그가 없습니다.")
     else:
         st.info("로그가 없습니다. 모니터링을 시작하세요.")
-    
-    # 자동 새로고침 설정
-    st.subheader("⚙️ 자동 새로고침 설정")
-    auto_refresh = st.checkbox("자동 새로고침 (5초마다)", value=True)
-    
-    if auto_refresh and log_monitor.is_monitoring():
-        time.sleep(5)
-        st.rerun()
 
 
 def show_user_management():
@@ -1003,7 +1627,11 @@ def show_user_management():
                     with col1:
                         status_icon = "🟢" if user["active"] else "🔴"
                         st.write(f"**{status_icon} {user['name']}**")
-                        st.caption(f"ID: {user['id']}")
+                        st.caption(f"ID: {user['id']} · 📺 {subscription_label(user)}")
+                        if user.get("segments"):
+                            st.caption(f"👥 그룹: {', '.join(user['segments'])}")
+                        if user.get("quiet_hours"):
+                            st.caption(f"🌙 방해 금지: {describe_quiet_hours(user)}")
                     
                     with col2:
                         if user["active"]:
@@ -1114,24 +1742,78 @@ def show_user_management():
                         help="새로운 이름을 입력하세요"
                     )
                 
+                # 구독 설정 (채널과 키워드를 모두 비우면 모든 방송 알림을 받음)
+                editing_user = user_manager.store.get(st.session_state.editing_user_id) or {}
+                current_channels = editing_user.get("channels", [])
+                channel_options = list(dict.fromkeys(
+                    POPULAR_CHANNELS + [item["channel"] for item in scheduler.schedules["schedules"]] + current_channels
+                ))
+                edit_channels = st.multiselect(
+                    "구독 채널",
+                    options=channel_options,
+                    default=current_channels,
+                    help="선택한 채널의 방송 알림만 받습니다"
+                )
+                edit_keywords = st.text_input(
+                    "구독 키워드",
+                    value=", ".join(editing_user.get("keywords", [])),
+                    placeholder="예: 뉴스, 드라마",
+                    help="프로그램명에 키워드가 들어간 방송 알림도 받습니다 (쉼표로 구분)"
+                )
+                edit_segments = st.text_input(
+                    "그룹",
+                    value=", ".join(editing_user.get("segments", [])),
+                    placeholder="예: family, office",
+                    help="스케줄의 대상 그룹 식에 쓰이는 그룹 이름 (쉼표로 구분)"
+                )
+                
+                # 시간대와 방해 금지 시간
+                current_timezone = editing_user.get("timezone") or DEFAULT_TIMEZONE
+                timezone_options = list(dict.fromkeys([current_timezone] + COMMON_TIMEZONES + pytz.common_timezones))
+                edit_timezone = st.selectbox("시간대", options=timezone_options, index=0)
+                quiet = editing_user.get("quiet_hours") or {}
+                quiet_enabled = st.checkbox("방해 금지 시간 사용", value=bool(quiet))
+                col_quiet1, col_quiet2, col_quiet3 = st.columns(3)
+                with col_quiet1:
+                    quiet_start = st.time_input(
+                        "시작", value=datetime.strptime(quiet.get("start", "23:00"), "%H:%M").time()
+                    )
+                with col_quiet2:
+                    quiet_end = st.time_input(
+                        "끝", value=datetime.strptime(quiet.get("end", "07:00"), "%H:%M").time()
+                    )
+                with col_quiet3:
+                    quiet_policy = st.selectbox(
+                        "방해 금지 중 알림",
+                        options=list(POLICIES),
+                        index=list(POLICIES).index(quiet.get("policy", DEFER)) if quiet.get("policy") in POLICIES else 0,
+                        format_func=lambda p: "끝나면 전송" if p == DEFER else "전송 안 함"
+                    )
+                
                 col_submit1, col_submit2 = st.columns(2)
                 
                 with col_submit1:
                     if st.form_submit_button("💾 저장", use_container_width=True):
                         if edit_name:
-                            # 사용자 이름 업데이트
-                            for user in user_manager.users["users"]:
-                                if user["id"] == st.session_state.editing_user_id:
-                                    user["name"] = edit_name
-                                    break
+                            # 이름/구독/그룹/알림 시간을 한 번에 저장
+                            quiet_hours = {
+                                "start": quiet_start.strftime("%H:%M"),
+                                "end": quiet_end.strftime("%H:%M"),
+                                "policy": quiet_policy,
+                            } if quiet_enabled else None
+                            success, message = user_manager.update_user(
+                                st.session_state.editing_user_id, edit_name,
+                                edit_channels, parse_keywords(edit_keywords), parse_segments(edit_segments),
+                                edit_timezone, quiet_hours
+                            )
                             
-                            if user_manager.save_users():
-                                st.success(f"사용자 '{edit_name}' 정보가 업데이트되었습니다.")
+                            if success:
+                                st.success(message)
                                 del st.session_state.editing_user_id
                                 del st.session_state.editing_user_name
                                 st.rerun()
                             else:
-                                st.error("사용자 정보 업데이트에 실패했습니다.")
+                                st.error(message)
                         else:
                             st.error("사용자 이름을 입력하세요.")
                 
@@ -1148,34 +1830,29 @@ def show_user_management():
         
         with col1:
             if st.button("🟢 모든 사용자 활성화", use_container_width=True):
-                for user in user_manager.users["users"]:
-                    user["active"] = True
-                if user_manager.save_users():
-                    st.success("모든 사용자가 활성화되었습니다.")
+                success, message = user_manager.set_all_active(True)
+                if success:
+                    st.success(message)
                 else:
-                    st.error("사용자 활성화에 실패했습니다.")
+                    st.error(message)
                 st.rerun()
         
         with col2:
             if st.button("🔴 모든 사용자 비활성화", use_container_width=True):
-                for user in user_manager.users["users"]:
-                    user["active"] = False
-                if user_manager.save_users():
-                    st.success("모든 사용자가 비활성화되었습니다.")
+                success, message = user_manager.set_all_active(False)
+                if success:
+                    st.success(message)
                 else:
-                    st.error("사용자 비활성화에 실패했습니다.")
+                    st.error(message)
                 st.rerun()
         
         with col3:
             if st.button("🗑️ 비활성 사용자 삭제", use_container_width=True):
-                original_count = len(user_manager.users["users"])
-                user_manager.users["users"] = [u for u in user_manager.users["users"] if u["active"]]
-                removed_count = original_count - len(user_manager.users["users"])
-                
-                if user_manager.save_users():
-                    st.success(f"{removed_count}명의 비활성 사용자가 삭제되었습니다.")
+                success, message = user_manager.remove_inactive_users()
+                if success:
+                    st.success(message)
                 else:
-                    st.error("사용자 삭제에 실패했습니다.")
+                    st.error(message)
                 st.rerun()
         
         # 데이터 백업/복원
@@ -1207,20 +1884,48 @@ def show_user_management():
                 try:
                     data = json.load(uploaded_file)
                     if "users" in data:
-                        user_manager.users = data["users"]
-                        if user_manager.save_users():
-                            st.success("사용자 데이터가 복원되었습니다.")
+                        restored = data["users"]
+                        # 백업 파일은 {"users": {"users": [...]}} 형태
+                        if isinstance(restored, dict):
+                            restored = restored.get("users", [])
+                        success, message = user_manager.restore_users(restored)
+                        if success:
+                            st.success(message)
                             st.rerun()
                         else:
-                            st.error("데이터 복원에 실패했습니다.")
+                            st.error(message)
                     else:
                         st.error("올바른 백업 파일이 아닙니다.")
                 except Exception as e:
                     st.error(f"파일 읽기 오류: {e}")
+        
+        st.markdown("### 📦 사용자 내보내기/가져오기")
+        show_data_transfer(USERS)
+
+
+@st.fragment(run_every=SCHEDULE_REFRESH_SECONDS)
+def show_sidebar_status():
+    """사이드바 스케줄 카운터와 오늘의 방송 (주기적으로 이 부분만 다시 그림)"""
+    scheduler = st.session_state.tv_scheduler
+    scheduler.refresh()
+    counts = scheduler.index.counts()
+    
+    st.metric("총 스케줄", f"{counts['total']}개")
+    st.metric("활성 스케줄", f"{counts['waiting']}개")
+    
+    # 오늘의 방송
+    today_schedules = scheduler.get_upcoming_schedules(1)
+    if today_schedules:
+        st.markdown("**📺 오늘의 방송:**")
+        for schedule in today_schedules[:3]:  # 최대 3개만 표시
+            st.write(f"• {schedule['time']} {schedule['program_name']}")
 
 
 def main():
     """메인 함수"""
+    # 다른 세션이나 스케줄 서비스가 바꾼 데이터 반영 (변경이 없으면 stat 확인만 함)
+    st.session_state.tv_scheduler.refresh()
+    
     # 사이드바 네비게이션
     with st.sidebar:
         st.title("📺 TV 스케줄러")
@@ -1251,44 +1956,17 @@ def main():
         
         st.markdown("---")
         
-        # 실시간 시계
+        # 실시간 시계 (1초마다 시계 부분만 다시 그림)
         st.markdown("### 🕐 현재 시간")
-        current_time = get_korean_time()
-        
-        # 시계를 위한 placeholder
-        clock_placeholder = st.empty()
-        with clock_placeholder.container():
-            st.markdown(f"""
-            <div style="text-align: center; padding: 0.5rem; background-color: #f0f2f6; border-radius: 0.5rem;">
-                <h3 style="color: #007bff; font-family: 'Courier New', monospace; margin: 0;">
-                    {current_time.strftime('%Y-%m-%d %H:%M:%S')}
-                </h3>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        # 1초마다 자동 새로고침
-        if 'last_refresh' not in st.session_state:
-            st.session_state.last_refresh = time.time()
-        
-        current_timestamp = time.time()
-        if current_timestamp - st.session_state.last_refresh >= 1.0:
-            st.session_state.last_refresh = current_timestamp
-            st.rerun()
-        
-        # 현재 상태 표시
-        scheduler = st.session_state.tv_scheduler
-        schedules = scheduler.schedules["schedules"]
-        active_schedules = [s for s in schedules if s["active"] and not s["sent"]]
-        
-        st.metric("총 스케줄", f"{len(schedules)}개")
-        st.metric("활성 스케줄", f"{len(active_schedules)}개")
+        show_clock("""
+        <div style="text-align: center; padding: 0.5rem; background-color: #f0f2f6; border-radius: 0.5rem;">
+            <h3 style="color: #007bff; font-family: 'Courier New', monospace; margin: 0;">
+                {now}
+            </h3>
+        </div>
+        """)
         
-        # 오늘의 방송
-        today_schedules = scheduler.get_upcoming_schedules(1)
-        if today_schedules:
-            st.markdown("**📺 오늘의 방송:**")
-            for schedule in today_schedules[:3]:  # 최대 3개만 표시
-                st.write(f"• {schedule['time']} {schedule['program_name']}")
+        show_sidebar_status()
     
     # 페이지 라우팅
     if st.session_state.page == "dashboard":